@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ScannerSettings, AudioTransmission, ScannerSession
+from .models import ScannerSettings, AudioTransmission, ScannerSession, TrafficRollup
 
 
 @admin.register(ScannerSettings)
@@ -23,3 +23,11 @@ class ScannerSessionAdmin(admin.ModelAdmin):
     list_filter = ['is_active']
     search_fields = ['user__username']
     ordering = ['-started_at']
+
+
+@admin.register(TrafficRollup)
+class TrafficRollupAdmin(admin.ModelAdmin):
+    list_display = ['bucket', 'bucket_start', 'dimension', 'value', 'count']
+    list_filter = ['bucket', 'dimension']
+    search_fields = ['value']
+    ordering = ['-bucket_start']
@@ -0,0 +1,198 @@
+import asyncio
+import threading
+import time
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncIngestEngine:
+    """asyncio alternative to ScannerService.fetcher_worker.
+
+    A poll task fetches ``/scanner/last`` pages, schedules audio downloads
+    bounded by a semaphore and pushes them onto an ``asyncio.Queue`` in feed
+    order; a dispatch task awaits each download and hands the transmission
+    to the service queue and listeners.
+    """
+
+    def __init__(self, service, download_concurrency: int = 8, queue_size: int = 200):
+        self.service = service
+        self.download_concurrency = download_concurrency
+        self.queue_size = queue_size
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.queue: Optional[asyncio.Queue] = None
+
+        self._main_task: Optional[asyncio.Future] = None
+        self._wake_event: Optional[asyncio.Event] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._own_loop = False
+        self._loop_thread = None
+        self._stopped = threading.Event()
+
+        self.polls = 0
+        self.downloads = 0
+        self.download_errors = 0
+        self.download_bytes = 0
+        self.download_time = 0.0
+        self.in_flight = 0
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Run on ``loop`` (e.g. the ASGI loop), the caller's running loop, or a private loop thread"""
+        self._stopped.clear()
+
+        if loop is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+
+        if loop is None:
+            loop = asyncio.new_event_loop()
+            self._own_loop = True
+            self._loop_thread = threading.Thread(target=loop.run_forever, daemon=True,
+                                                 name='async-ingest')
+            self._loop_thread.start()
+
+        self.loop = loop
+        if self._in_loop():
+            self._main_task = loop.create_task(self._run())
+        else:
+            self._main_task = asyncio.run_coroutine_threadsafe(self._run(), loop)
+        logger.info(f"Async ingest engine started ({'private' if self._own_loop else 'shared'} loop)")
+
+    def stop(self, timeout: float = 1.0):
+        if not self.loop or not self._main_task:
+            return
+
+        if self._in_loop():
+            self._main_task.cancel()
+        else:
+            self.loop.call_soon_threadsafe(self._main_task.cancel)
+            self._stopped.wait(timeout)
+
+        if self._own_loop:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            if self._loop_thread:
+                self._loop_thread.join(timeout=timeout)
+            self.loop.close()
+
+        self.loop = None
+        self._main_task = None
+        self._own_loop = False
+        self._loop_thread = None
+        logger.info("Async ingest engine stopped")
+
+    def wake(self):
+        if self.loop and self._wake_event:
+            self.loop.call_soon_threadsafe(self._wake_event.set)
+
+    def _in_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    async def _run(self):
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._wake_event = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.download_concurrency)
+
+        poller = asyncio.ensure_future(self._poll_loop())
+        dispatcher = asyncio.ensure_future(self._dispatch_loop())
+        try:
+            await asyncio.gather(poller, dispatcher)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            poller.cancel()
+            dispatcher.cancel()
+            await asyncio.gather(poller, dispatcher, return_exceptions=True)
+            downloads = []
+            while self.queue and not self.queue.empty():
+                _, task = self.queue.get_nowait()
+                task.cancel()
+                downloads.append(task)
+            await asyncio.gather(*downloads, return_exceptions=True)
+            self._stopped.set()
+
+    async def _poll_loop(self):
+        scheduler = self.service.scheduler
+
+        while True:
+            try:
+                audio_list = await asyncio.to_thread(self.service.fetch_audio_batch)
+                self.polls += 1
+                # Routing and filtering a batch are CPU-bound; keep them off the event loop
+                await asyncio.to_thread(self.service._handle_batch, audio_list)
+                accepted = await asyncio.to_thread(self.service.filter_batch, audio_list)
+
+                for audio in accepted:
+                    task = asyncio.ensure_future(self._download(audio))
+                    await self.queue.put((audio, task))
+                await asyncio.to_thread(self.service.cursor.checkpoint)
+
+                delay = scheduler.record_batch(len(audio_list))
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Async fetcher error: {e}")
+                delay = scheduler.record_error()
+
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake_event.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake_event.clear()
+
+    async def _download(self, audio) -> Optional[bytes]:
+        store = self.service.clip_store
+        if audio.id in store:
+            # Reads touch the disk (utime, open, mmap); keep them off the event loop
+            stored = await asyncio.to_thread(store.read, audio.id)
+            if stored is not None:
+                return stored
+
+        async with self._semaphore:
+            self.in_flight += 1
+            started = time.perf_counter()
+            try:
+                response = await asyncio.to_thread(self.service.transport.get, audio.url, timeout=10)
+                response.raise_for_status()
+                content = response.content
+                self.downloads += 1
+                self.download_bytes += len(content)
+                try:
+                    await asyncio.to_thread(store.put, audio.id, content)
+                except OSError as e:
+                    logger.warning(f"Failed to store audio {audio.id}: {e}")
+                return content
+            except Exception as e:
+                self.download_errors += 1
+                logger.warning(f"Failed to download audio {audio.id}: {e}")
+                return None
+            finally:
+                self.download_time += time.perf_counter() - started
+                self.in_flight -= 1
+
+    async def _dispatch_loop(self):
+        while True:
+            audio, task = await self.queue.get()
+            # Wait for the download so the clip is in the store before listeners hear of it
+            await task
+            self.service._enqueue_audio(audio)
+
+    def get_status(self) -> Dict:
+        avg = self.download_time / self.downloads if self.downloads else 0.0
+        return {
+            "polls": self.polls,
+            "pending": self.queue.qsize() if self.queue else 0,
+            "in_flight": self.in_flight,
+            "downloads": self.downloads,
+            "download_errors": self.download_errors,
+            "download_bytes": self.download_bytes,
+            "avg_download_ms": round(avg * 1000, 2),
+        }
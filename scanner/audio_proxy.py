@@ -0,0 +1,155 @@
+"""
+Caching audio proxy: each clip is fetched from upstream once into the
+ClipStore and then served locally to every browser client.
+"""
+
+import re
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from .clip_store import ClipEntry, ClipStore
+from .models import AudioTransmission
+
+logger = logging.getLogger(__name__)
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def sniff_content_type(head: bytes) -> str:
+    if head.startswith(b'RIFF'):
+        return 'audio/wav'
+    if head.startswith(b'OggS'):
+        return 'audio/ogg'
+    if head.startswith(b'fLaC'):
+        return 'audio/flac'
+    return 'audio/mpeg'
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """(start, end) inclusive for a single ``bytes=`` range; None for a full response.
+
+    Raises ValueError when the range cannot be satisfied.
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+def iter_file_range(f: BinaryIO, start: int, length: int, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    try:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
+class AudioProxy:
+    """Coalesces concurrent requests for one clip into a single upstream download"""
+
+    def __init__(self, store: ClipStore, transport, timeout: float = 10, source_window: int = 5000):
+        self.store = store
+        self.transport = transport
+        self.timeout = timeout
+        self.source_window = source_window
+
+        self._sources: 'OrderedDict[int, str]' = OrderedDict()
+        self._inflight: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.fetches = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.bytes_fetched = 0
+
+    def remember(self, audio_list: List):
+        """Record upstream URLs of freshly ingested clips"""
+        with self._lock:
+            for audio in audio_list:
+                self._sources[audio.id] = audio.url
+                self._sources.move_to_end(audio.id)
+            while len(self._sources) > self.source_window:
+                self._sources.popitem(last=False)
+
+    def source_url(self, audio_id: int) -> Optional[str]:
+        with self._lock:
+            url = self._sources.get(audio_id)
+        if url is None:
+            url = AudioTransmission.objects.filter(transmission_id=audio_id).values_list('url', flat=True).first()
+        return url if url and url.startswith('http') else None
+
+    def get(self, audio_id: int) -> Optional[ClipEntry]:
+        """Stored clip entry, downloading it first if needed; None if the id is unknown"""
+        entry = self.store.entry(audio_id)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        with self._lock:
+            future = self._inflight.get(audio_id)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[audio_id] = future
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            # Outlast the leader's download, retries included, so followers never give up first
+            return future.result(timeout=self.transport.max_duration(self.timeout) + self.timeout)
+
+        try:
+            entry = self._fetch(audio_id)
+            future.set_result(entry)
+            return entry
+        except BaseException as e:
+            self.errors += 1
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(audio_id, None)
+
+    def _fetch(self, audio_id: int) -> Optional[ClipEntry]:
+        url = self.source_url(audio_id)
+        if url is None:
+            return None
+        response = self.transport.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        content = response.content
+        self.fetches += 1
+        self.bytes_fetched += len(content)
+        return self.store.put(audio_id, content)
+
+    def get_status(self) -> Dict:
+        return {
+            "hits": self.hits,
+            "fetches": self.fetches,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "bytes_fetched": self.bytes_fetched,
+            "inflight": len(self._inflight),
+        }
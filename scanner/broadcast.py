@@ -0,0 +1,155 @@
+import asyncio
+import json
+import threading
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from .subscriptions import CONTROL_GROUP, transmission_groups
+
+logger = logging.getLogger(__name__)
+
+
+# Group message type -> type seen by the browser
+CLIENT_EVENT_TYPES = {
+    'transmission_batch': 'new_transmissions',
+}
+
+
+def encode_event(message_type: str, data) -> str:
+    """Encode an event to the text frame sent to WebSocket clients"""
+    return json.dumps({
+        'type': CLIENT_EVENT_TYPES.get(message_type, message_type),
+        'data': data
+    })
+
+
+def encode_batch(message_type: str, encoded_items: List[str]) -> str:
+    """``encode_event(message_type, items)`` built from items that are already JSON text"""
+    event_type = json.dumps(CLIENT_EVENT_TYPES.get(message_type, message_type))
+    return f'{{"type": {event_type}, "data": [{", ".join(encoded_items)}]}}'
+
+
+class ChannelsBridge:
+    """ScannerService listener that forwards events to a Channels group.
+
+    Events are buffered and flushed after ``flush_interval`` so a whole
+    fetched batch of transmissions goes out as one ``transmission_batch``
+    message per interest group (all, per airport, per frequency, per flight
+    rules); control events go to the control group. Each transmission is
+    encoded once per flush and every group's frame is joined from those
+    strings; consumers relay that text unchanged to every socket.
+
+    Calling the bridge never blocks on the event loop: when the ASGI loop
+    is known the flush is scheduled onto it, otherwise a short-lived timer
+    thread sends through ``async_to_sync``.
+    """
+
+    def __init__(self, group_name: str = CONTROL_GROUP, flush_interval: float = 0.05,
+                 max_batch: int = 200):
+        self.group_name = group_name
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_pending = False
+
+        self.events_received = 0
+        self.messages_sent = 0
+        self.send_errors = 0
+
+    def attach_loop(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+
+    def __call__(self, event_type: str, data: dict):
+        with self._lock:
+            self._buffer.append((event_type, data))
+            self.events_received += 1
+            if self._flush_pending:
+                return
+            self._flush_pending = True
+
+        loop = self.loop
+        if loop is not None and loop.is_running():
+            loop.call_soon_threadsafe(loop.call_later, self.flush_interval, self._flush_on_loop)
+        else:
+            timer = threading.Timer(self.flush_interval, self._flush_in_thread)
+            timer.daemon = True
+            timer.start()
+
+    def _drain(self) -> List:
+        with self._lock:
+            events, self._buffer = self._buffer, []
+            self._flush_pending = False
+        return events
+
+    def _flush_on_loop(self):
+        asyncio.ensure_future(self.flush())
+
+    def _flush_in_thread(self):
+        try:
+            async_to_sync(self.flush)()
+        except Exception as e:
+            logger.error(f"Channels bridge flush failed: {e}")
+
+    def _group_messages(self, events: List) -> List[Tuple[str, Dict]]:
+        messages = []
+        transmissions = []
+
+        def flush_transmissions():
+            # A transmission lands in several groups; encode it once, not once per group
+            encoded = [json.dumps(item) for item in transmissions]
+            by_group: Dict[str, List[int]] = {}
+            for index, item in enumerate(transmissions):
+                for group in transmission_groups(item):
+                    by_group.setdefault(group, []).append(index)
+
+            for group, indexes in by_group.items():
+                for start in range(0, len(indexes), self.max_batch):
+                    chunk = indexes[start:start + self.max_batch]
+                    # 'data' lets multi-filter subscribers narrow the batch further
+                    messages.append((group, {
+                        'type': 'transmission_batch',
+                        'group': group,
+                        'text': encode_batch('transmission_batch', [encoded[i] for i in chunk]),
+                        'data': [transmissions[i] for i in chunk]
+                    }))
+            transmissions.clear()
+
+        for event_type, data in events:
+            if event_type == 'new_transmission':
+                transmissions.append(data)
+                continue
+            flush_transmissions()
+            messages.append((self.group_name, {'type': event_type, 'text': encode_event(event_type, data)}))
+        flush_transmissions()
+
+        return messages
+
+    async def flush(self):
+        events = self._drain()
+        if not events:
+            return
+
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+
+        for group, message in self._group_messages(events):
+            try:
+                await channel_layer.group_send(group, message)
+                self.messages_sent += 1
+            except Exception as e:
+                self.send_errors += 1
+                logger.error(f"Channels bridge send failed: {e}")
+
+    def get_status(self) -> Dict:
+        return {
+            "events_received": self.events_received,
+            "messages_sent": self.messages_sent,
+            "send_errors": self.send_errors,
+            "pending": len(self._buffer),
+        }
@@ -0,0 +1,122 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class ClipCache:
+    """Thread-safe LRU of audio clips bounded by total size.
+
+    Values are encoded bytes by default; pass ``sizeof`` to hold other
+    payloads such as decoded PCM. Lookups, inserts and evictions are O(1). ``get_or_load`` deduplicates
+    in-flight loads: concurrent requests for one key share a single Future.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, sizeof: Callable[[Any], int] = len):
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+        self.bytes = 0
+        self.peak_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.rejected = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def loading(self, key) -> bool:
+        return key in self._inflight
+
+    def get(self, key) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        size = self._sizeof(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= self._sizeof(old)
+            if size > self.max_bytes:
+                self.rejected += 1
+                return
+            self._entries[key] = value
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= self._sizeof(evicted)
+                self.evictions += 1
+            self.peak_bytes = max(self.peak_bytes, self.bytes)
+
+    def get_or_load(self, key, loader: Callable[[], Any], executor: Executor) -> Future:
+        """Cached value as a completed Future, else one shared load per key"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                future = Future()
+                future.set_result(value)
+                return future
+
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+
+            self.misses += 1
+            future = Future()
+            self._inflight[key] = future
+
+        def run():
+            try:
+                value = loader()
+            except BaseException as e:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                future.set_exception(e)
+                return
+            self.put(key, value)
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_result(value)
+
+        executor.submit(run)
+        return future
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "peak_bytes": self.peak_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "rejected": self.rejected,
+                "inflight": len(self._inflight),
+            }
@@ -0,0 +1,235 @@
+"""
+On-disk audio clip store shared by scanner_live.py and the Django views.
+
+Clips are written atomically as ``<root>/<shard>/<id>-<sha256>.clip``, so
+the directory itself is the index and survives restarts; the content hash
+doubles as an ETag. Total size is capped with LRU eviction (file mtime
+records recency across restarts). Reads return memory-mapped views, so
+bytes go from the page cache to the decoder or socket without a copy.
+
+Each process keeps its own index and enforces the cap on what it has seen;
+a lookup that misses checks the id's shard on disk, so clips written by
+the other process are served without a restart.
+"""
+
+import hashlib
+import mmap
+import os
+import tempfile
+import threading
+import logging
+from collections import OrderedDict
+from typing import BinaryIO, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ClipEntry(NamedTuple):
+    digest: str
+    size: int
+    path: str
+
+
+class ClipStore:
+    """Content-addressed, size-capped clip files keyed by transmission id"""
+
+    def __init__(self, root: str, max_bytes: int = 512 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[int, ClipEntry]' = OrderedDict()
+        # Evicted files still mapped by a reader (Windows refuses to unlink them)
+        self._pending_unlink: List[str] = []
+        self._lock = threading.Lock()
+
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+        os.makedirs(root, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        found = []
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for item in os.scandir(shard.path):
+                name, ext = os.path.splitext(item.name)
+                if ext == '.tmp':
+                    # Left behind by a write interrupted before os.replace
+                    os.unlink(item.path)
+                    continue
+                audio_id, _, digest = name.partition('-')
+                if ext != '.clip' or not audio_id.isdigit() or not digest:
+                    continue
+                stat = item.stat()
+                found.append((stat.st_mtime, int(audio_id), ClipEntry(digest, stat.st_size, item.path)))
+
+        for _, audio_id, entry in sorted(found):
+            stale = self._entries.pop(audio_id, None)
+            if stale is not None:
+                self._remove(stale)
+            self._entries[audio_id] = entry
+            self.bytes += entry.size
+        self._evict()
+        if self._entries:
+            logger.info(f"Clip store {self.root}: {len(self._entries)} clips, {self.bytes} bytes")
+
+    def _path(self, audio_id: int, digest: str) -> str:
+        return os.path.join(self.root, f"{audio_id % 256:02x}", f"{audio_id}-{digest}.clip")
+
+    def _remove(self, entry: ClipEntry):
+        self.bytes -= entry.size
+        self._unlink(entry.path)
+
+    def _unlink(self, path: str) -> bool:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            # Still memory-mapped by a reader; retried on the next eviction pass
+            logger.debug(f"Deferring removal of {path}: {e}")
+            if path not in self._pending_unlink:
+                self._pending_unlink.append(path)
+            return False
+        return True
+
+    def _evict(self):
+        if self._pending_unlink:
+            pending, self._pending_unlink = self._pending_unlink, []
+            for path in pending:
+                self._unlink(path)
+        while self.bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._remove(entry)
+            self.evictions += 1
+
+    def __contains__(self, audio_id: int):
+        return audio_id in self._entries or self._adopt(audio_id) is not None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def put(self, audio_id: int, content: bytes) -> Optional[ClipEntry]:
+        if len(content) > self.max_bytes:
+            return None
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._path(audio_id, digest)
+
+        with self._lock:
+            existing = self._entries.get(audio_id)
+            if existing is not None and existing.digest == digest:
+                self._entries.move_to_end(audio_id)
+                return existing
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        entry = ClipEntry(digest, len(content), path)
+        with self._lock:
+            old = self._entries.pop(audio_id, None)
+            if old is not None and old.path != path:
+                self._remove(old)
+            elif old is not None:
+                self.bytes -= old.size
+            self._entries[audio_id] = entry
+            self.bytes += entry.size
+            self.writes += 1
+            self._evict()
+        return entry
+
+    def _adopt(self, audio_id: int) -> Optional[ClipEntry]:
+        """Index a clip another process wrote into the shared directory"""
+        prefix = f"{audio_id}-"
+        try:
+            for item in os.scandir(os.path.dirname(self._path(audio_id, ''))):
+                if item.name.startswith(prefix) and item.name.endswith('.clip'):
+                    entry = ClipEntry(item.name[len(prefix):-len('.clip')], item.stat().st_size, item.path)
+                    break
+            else:
+                return None
+        except FileNotFoundError:
+            return None
+
+        with self._lock:
+            if audio_id not in self._entries:
+                self._entries[audio_id] = entry
+                self.bytes += entry.size
+                self._evict()
+            return self._entries.get(audio_id)
+
+    def entry(self, audio_id: int) -> Optional[ClipEntry]:
+        """Look up a clip and mark it recently used"""
+        with self._lock:
+            entry = self._entries.get(audio_id)
+        if entry is None:
+            entry = self._adopt(audio_id)
+        with self._lock:
+            if entry is None or self._entries.get(audio_id) is not entry:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(audio_id)
+            self.hits += 1
+        try:
+            os.utime(entry.path)
+        except FileNotFoundError:
+            with self._lock:
+                if self._entries.get(audio_id) is entry:
+                    del self._entries[audio_id]
+                    self.bytes -= entry.size
+            return None
+        return entry
+
+    def read(self, audio_id: int) -> Optional[memoryview]:
+        """Memory-mapped, read-only view of a clip"""
+        entry = self.entry(audio_id)
+        if entry is None:
+            return None
+        try:
+            with open(entry.path, 'rb') as f:
+                if entry.size == 0:
+                    return memoryview(b'')
+                return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except FileNotFoundError:
+            return None
+
+    def open(self, audio_id: int) -> Optional[Tuple[ClipEntry, BinaryIO]]:
+        """Entry and open file for streaming responses (sendfile where available)"""
+        entry = self.entry(audio_id)
+        if entry is None:
+            return None
+        try:
+            return entry, open(entry.path, 'rb')
+        except FileNotFoundError:
+            return None
+
+    def clear(self):
+        with self._lock:
+            for entry in self._entries.values():
+                self._remove(entry)
+            self._entries.clear()
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            return {
+                "root": self.root,
+                "clips": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "pending_unlink": len(self._pending_unlink),
+            }
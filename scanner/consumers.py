@@ -1,24 +1,31 @@
+import asyncio
 import json
 import logging
 from channels.generic.websocket import AsyncWebsocketConsumer
 from asgiref.sync import sync_to_async
 from .scanner_service import ScannerService
+from .broadcast import encode_event
+from .subscriptions import CONTROL_GROUP, Subscription
 
 logger = logging.getLogger(__name__)
 
 
 class ScannerConsumer(AsyncWebsocketConsumer):
     async def connect(self):
-        self.room_group_name = 'scanner_updates'
+        self.room_group_name = CONTROL_GROUP
+        self.subscription = Subscription()
+        self.interest_groups = frozenset()
 
         await self.channel_layer.group_add(
             self.room_group_name,
             self.channel_name
         )
+        await self._apply_subscription(self.subscription)
 
         await self.accept()
 
         scanner_service = ScannerService()
+        scanner_service.channels_bridge.attach_loop(asyncio.get_running_loop())
         status = await sync_to_async(scanner_service.get_status)()
 
         await self.send(text_data=json.dumps({
@@ -31,6 +38,18 @@ class ScannerConsumer(AsyncWebsocketConsumer):
             self.room_group_name,
             self.channel_name
         )
+        for group in self.interest_groups:
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def _apply_subscription(self, subscription: Subscription):
+        # Only touch the groups that changed so live updates never miss a batch
+        new_groups = subscription.groups()
+        for group in new_groups - self.interest_groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+        self.subscription = subscription
+        for group in self.interest_groups - new_groups:
+            await self.channel_layer.group_discard(group, self.channel_name)
+        self.interest_groups = new_groups
 
     async def receive(self, text_data):
         try:
@@ -45,26 +64,30 @@ class ScannerConsumer(AsyncWebsocketConsumer):
                     'data': status
                 }))
 
+            elif message_type == 'subscribe':
+                await self._apply_subscription(Subscription.from_filters(data.get('filters')))
+                await self.send(text_data=json.dumps({
+                    'type': 'subscribed',
+                    'data': self.subscription.to_dict()
+                }))
+
             elif message_type == 'start_scanner':
                 settings = data.get('settings', {})
-                result = await sync_to_async(scanner_service.start)(settings)
-                await self.channel_layer.group_send(
-                    self.room_group_name,
-                    {
+                result = await sync_to_async(scanner_service.start)(settings, asyncio.get_running_loop())
+                # A real start is broadcast to the group by the service's channels bridge
+                if result.get('status') != 'started':
+                    await self.send(text_data=json.dumps({
                         'type': 'scanner_started',
                         'data': result
-                    }
-                )
+                    }))
 
             elif message_type == 'stop_scanner':
                 result = await sync_to_async(scanner_service.stop)()
-                await self.channel_layer.group_send(
-                    self.room_group_name,
-                    {
+                if result.get('status') != 'stopped':
+                    await self.send(text_data=json.dumps({
                         'type': 'scanner_stopped',
                         'data': result
-                    }
-                )
+                    }))
 
         except Exception as e:
             logger.error(f"WebSocket error: {e}")
@@ -73,26 +96,37 @@ class ScannerConsumer(AsyncWebsocketConsumer):
                 'message': str(e)
             }))
 
+    async def _relay(self, message_type, event):
+        # Bridge messages arrive pre-encoded; only direct sends need encoding here
+        text = event.get('text')
+        if text is None:
+            text = encode_event(message_type, event['data'])
+        await self.send(text_data=text)
+
     async def new_transmission(self, event):
-        await self.send(text_data=json.dumps({
-            'type': 'new_transmission',
-            'data': event['data']
-        }))
+        await self._relay('new_transmission', event)
+
+    async def transmission_batch(self, event):
+        # Drop copies still in flight from groups left by a subscription change
+        if event.get('group') not in self.interest_groups:
+            return
+
+        if self.subscription.exact:
+            await self._relay('transmission_batch', event)
+            return
+
+        items = [item for item in event['data'] if self.subscription.matches(item)]
+        if items:
+            await self.send(text_data=encode_event('transmission_batch', items))
 
     async def status_update(self, event):
-        await self.send(text_data=json.dumps({
-            'type': 'status_update',
-            'data': event['data']
-        }))
+        await self._relay('status_update', event)
 
     async def scanner_started(self, event):
-        await self.send(text_data=json.dumps({
-            'type': 'scanner_started',
-            'data': event['data']
-        }))
+        await self._relay('scanner_started', event)
 
     async def scanner_stopped(self, event):
-        await self.send(text_data=json.dumps({
-            'type': 'scanner_stopped',
-            'data': event['data']
-        }))
+        await self._relay('scanner_stopped', event)
+
+    async def settings_updated(self, event):
+        await self._relay('settings_updated', event)
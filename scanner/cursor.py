@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import tempfile
+import threading
+import logging
+from collections import deque
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class IngestCursor:
+    """Durable ``last`` cursor plus a bounded window of recently seen ids.
+
+    ``last_id`` is the highest id seen. ``watermark`` is the highest id below
+    which nothing is missing: it follows ids that arrive contiguously and
+    jumps to the end of any complete REST page, so a client that receives
+    pushes out of order resumes from it without skipping the gap. A hole
+    that persists while half the dedupe window's worth of later ids arrives
+    is treated as an id the upstream never published.
+
+    The state is checkpointed to a JSON file with write-to-temp and
+    ``os.replace``, so a crash leaves either the old or the new checkpoint,
+    never a torn one. Kept free of Django so scanner_live.py can share it.
+    """
+
+    def __init__(self, path: str, dedupe_window: int = 5000, min_interval: float = 1.0):
+        self.path = path
+        self.min_interval = min_interval
+        self.last_id = 0
+        self.watermark = 0
+        self.seen_ids = deque(maxlen=dedupe_window)
+        self.seen_id_set = set()
+        self._ahead = set()
+
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_checkpoint = 0.0
+        self.checkpoints = 0
+        self.duplicates = 0
+        self.errors = 0
+
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable ingest cursor {self.path}: {e}")
+            return
+
+        self.last_id = int(state.get('last_id', 0))
+        self.watermark = int(state.get('watermark', self.last_id))
+        for audio_id in state.get('recent_ids', [])[-self.seen_ids.maxlen:]:
+            self._remember(audio_id)
+            if audio_id > self.watermark:
+                self._ahead.add(audio_id)
+        logger.info(f"Resuming ingest from id {self.last_id}")
+
+    def _remember(self, audio_id: int):
+        if len(self.seen_ids) == self.seen_ids.maxlen:
+            self.seen_id_set.discard(self.seen_ids[0])
+        self.seen_ids.append(audio_id)
+        self.seen_id_set.add(audio_id)
+
+    def mark(self, audio_id: int) -> bool:
+        """Record an id; False if it is a duplicate"""
+        with self._lock:
+            if audio_id in self.seen_id_set:
+                self.duplicates += 1
+                return False
+            self._remember(audio_id)
+            if audio_id > self.last_id:
+                self.last_id = audio_id
+            if audio_id > self.watermark:
+                self._ahead.add(audio_id)
+                self._advance()
+            self._dirty = True
+            return True
+
+    def complete_through(self, audio_id: int):
+        """Everything up to ``audio_id`` has been delivered, e.g. by a full REST page"""
+        with self._lock:
+            if audio_id <= self.watermark:
+                return
+            self.watermark = audio_id
+            self._ahead = {i for i in self._ahead if i > audio_id}
+            self._advance()
+            self._dirty = True
+
+    def _advance(self):
+        if len(self._ahead) > self.seen_ids.maxlen // 2:
+            # Give up on the oldest hole before its neighbours leave the dedupe window
+            self.watermark = min(self._ahead) - 1
+        while self.watermark + 1 in self._ahead:
+            self.watermark += 1
+            self._ahead.discard(self.watermark)
+
+    def filter_new(self, audio_list: List) -> List:
+        return [audio for audio in audio_list if self.mark(audio.id)]
+
+    def checkpoint(self, force: bool = False):
+        with self._lock:
+            if not self._dirty:
+                return
+            if not force and time.monotonic() - self._last_checkpoint < self.min_interval:
+                return
+            state = {'last_id': self.last_id, 'watermark': self.watermark, 'recent_ids': list(self.seen_ids)}
+            self._dirty = False
+            self._last_checkpoint = time.monotonic()
+
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.cursor-', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(state, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            self.checkpoints += 1
+        except OSError as e:
+            self.errors += 1
+            self._dirty = True
+            logger.error(f"Failed to checkpoint ingest cursor: {e}")
+
+    def get_status(self) -> Dict:
+        return {
+            "last_id": self.last_id,
+            "watermark": self.watermark,
+            "window": len(self.seen_ids),
+            "duplicates": self.duplicates,
+            "checkpoints": self.checkpoints,
+            "errors": self.errors,
+            "path": self.path,
+        }
@@ -0,0 +1,86 @@
+"""
+Streaming export of transmission history as NDJSON or CSV.
+
+Rows are read with ``QuerySet.iterator(chunk_size=...)`` and encoded one
+line at a time, so memory stays flat however long the time range is.
+"""
+
+import csv
+import json
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+
+from .geofence import GeofenceIndex
+from .queries import TransmissionFilter
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+EXPORT_FIELDS = ('transmission_id', 'url', 'who_from', 'frequency', 'station_name', 'pilot',
+                 'airport', 'position', 'voice_name', 'from_userid', 'flight_rules',
+                 'latitude', 'longitude', 'timestamp')
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def export_rows(filters: TransmissionFilter,
+                geofence: Optional[GeofenceIndex] = None,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[dict]:
+    """Matching rows oldest-first as dicts; raises ValueError before streaming starts"""
+    if filters.region and (geofence is None or filters.region not in geofence.names):
+        raise ValueError(f"Unknown region: {filters.region}")
+    return _iter_rows(filters, geofence, chunk_size)
+
+
+def _iter_rows(filters: TransmissionFilter, geofence: Optional[GeofenceIndex], chunk_size: int) -> Iterator[dict]:
+    rows = (filters.queryset(geofence)
+            .order_by('transmission_id')
+            .values(*EXPORT_FIELDS)
+            .iterator(chunk_size=chunk_size))
+
+    if not filters.region:
+        yield from rows
+        return
+
+    region_ids = geofence.region_ids([filters.region])
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        inside = geofence.membership(
+            [r['latitude'] for r in chunk], [r['longitude'] for r in chunk]
+        )[:, region_ids].any(axis=1)
+        yield from (r for r, hit in zip(chunk, inside) if hit)
+
+
+def _serializable(row: dict) -> dict:
+    timestamp = row.get('timestamp')
+    if timestamp is not None:
+        row['timestamp'] = timestamp.isoformat()
+    return row
+
+
+def iter_ndjson(rows: Iterable[dict]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(_serializable(row)) + '\n'
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows: Iterable[dict]) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        row = _serializable(row)
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+
+def iter_export(fmt: str, rows: Iterable[dict]) -> Iterator[str]:
+    if fmt == 'csv':
+        return iter_csv(rows)
+    if fmt == 'ndjson':
+        return iter_ndjson(rows)
+    raise ValueError(f"Unknown export format: {fmt}")
@@ -0,0 +1,178 @@
+"""
+Compiled transmission filters shared by ScannerService and scanner_live.py.
+
+Settings are compiled once into a CompiledFilter; a fetched batch is turned
+into column arrays once (AudioBatch) and each filter evaluates it as a
+NumPy mask, so many profiles can be checked against one batch cheaply.
+"""
+
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+import numpy as np
+
+from .geofence import GeofenceIndex
+
+DEFAULT_BOUNDS = {
+    'north': 37.0,
+    'south': 31.0,
+    'east': -103.0,
+    'west': -114.0
+}
+
+
+class AudioBatch:
+    """Columnar view of a list of AudioData, built once per fetched batch.
+
+    ``tagged_by`` is the geofence that already set each item's ``regions``;
+    its membership is read from those tags instead of being classified again.
+    """
+
+    def __init__(self, audio_list: List, tagged_by: Optional[GeofenceIndex] = None):
+        self.items = audio_list
+        count = len(audio_list)
+
+        self.lat = np.fromiter((a.lat if a.lat is not None else np.nan for a in audio_list),
+                               dtype=np.float64, count=count)
+        self.lon = np.fromiter((a.lon if a.lon is not None else np.nan for a in audio_list),
+                               dtype=np.float64, count=count)
+        self.has_position = ~np.isnan(self.lat) & ~np.isnan(self.lon)
+        self.url_ok = np.fromiter((bool(a.url) and a.url.startswith('http') for a in audio_list),
+                                  dtype=bool, count=count)
+
+        self._columns = {
+            'flight_rules': [a.flight_rules for a in audio_list],
+            'airport': [a.airport for a in audio_list],
+        }
+        self._factorized = {}
+        self._membership = {}
+        if tagged_by is not None:
+            self._membership[id(tagged_by)] = tagged_by.membership_from_names([a.regions for a in audio_list])
+
+    def __len__(self):
+        return len(self.items)
+
+    def _factorize(self, column: str):
+        if column not in self._factorized:
+            codes = {}
+            inverse = np.fromiter((codes.setdefault(v, len(codes)) for v in self._columns[column]),
+                                  dtype=np.intp, count=len(self.items))
+            self._factorized[column] = (list(codes), inverse)
+        return self._factorized[column]
+
+    def member_mask(self, column: str, values: FrozenSet) -> np.ndarray:
+        """Vectorized ``item.<column> in values`` via a lookup over distinct values"""
+        uniques, inverse = self._factorize(column)
+        table = np.fromiter((u in values for u in uniques), dtype=bool, count=len(uniques))
+        return table[inverse] if len(inverse) else np.zeros(0, dtype=bool)
+
+    def membership(self, geofence: GeofenceIndex) -> np.ndarray:
+        """Points x regions matrix, classified once per batch and geofence"""
+        key = id(geofence)
+        if key not in self._membership:
+            self._membership[key] = geofence.membership(self.lat, self.lon)
+        return self._membership[key]
+
+    def region_mask(self, geofence: GeofenceIndex, region_ids: np.ndarray) -> np.ndarray:
+        return self.membership(geofence)[:, region_ids].any(axis=1)
+
+    def select(self, mask: np.ndarray) -> List:
+        return [self.items[i] for i in np.flatnonzero(mask)]
+
+
+class CompiledFilter:
+    """Playback filter compiled from scanner settings.
+
+    Semantics match the original ``should_play_audio``: flight rules first,
+    then a usable URL, then with ``geo_filter`` either a listed airport or a
+    position inside one of ``regions`` of the geofence (all regions when
+    none are named). Transmissions without a position pass. Without a
+    geofence, ``bounds`` is used as a single rectangular region.
+    """
+
+    def __init__(self,
+                 vfr_only: bool = False,
+                 geo_filter: bool = False,
+                 airports: Optional[Iterable[str]] = None,
+                 bounds: Optional[Dict[str, float]] = None,
+                 flight_rules: Optional[Iterable[str]] = None,
+                 geofence: Optional[GeofenceIndex] = None,
+                 regions: Optional[Iterable[str]] = None):
+        self.vfr_only = bool(vfr_only)
+        self.geo_filter = bool(geo_filter)
+        self.airports = frozenset(airports or ())
+        self.geofence = geofence or GeofenceIndex.from_bounds(bounds or DEFAULT_BOUNDS)
+        self.regions = tuple(sorted(regions)) if regions else ()
+        self.region_ids = self.geofence.region_ids(self.regions)
+        self._region_id_set = frozenset(self.region_ids.tolist())
+
+        if flight_rules:
+            self.flight_rules = frozenset(flight_rules)
+        elif self.vfr_only:
+            self.flight_rules = frozenset(['VFR'])
+        else:
+            self.flight_rules = None
+
+        self.signature = (
+            self.flight_rules,
+            self.geo_filter,
+            self.airports if self.geo_filter else None,
+            (id(self.geofence), self.regions) if self.geo_filter else None,
+        )
+
+    @classmethod
+    def from_settings(cls, settings: dict, bounds: Optional[Dict[str, float]] = None,
+                      geofence: Optional[GeofenceIndex] = None) -> 'CompiledFilter':
+        return cls(
+            vfr_only=settings.get('vfr_only', False),
+            geo_filter=settings.get('geo_filter', False),
+            airports=settings.get('airports') or (),
+            bounds=bounds,
+            flight_rules=settings.get('flight_rules'),
+            geofence=geofence,
+            regions=settings.get('regions')
+        )
+
+    def __call__(self, audio) -> bool:
+        if self.flight_rules is not None and audio.flight_rules not in self.flight_rules:
+            return False
+
+        if not audio.url or not audio.url.startswith('http'):
+            return False
+
+        if self.geo_filter:
+            if audio.airport in self.airports:
+                return True
+
+            if audio.lat is not None and audio.lon is not None:
+                if not self.geofence.contains(audio.lat, audio.lon, self._region_id_set):
+                    return False
+
+        return True
+
+    def mask(self, batch: AudioBatch) -> np.ndarray:
+        mask = batch.url_ok.copy()
+
+        if self.flight_rules is not None:
+            mask &= batch.member_mask('flight_rules', self.flight_rules)
+
+        if self.geo_filter:
+            geo_ok = ~batch.has_position | batch.region_mask(self.geofence, self.region_ids)
+            if self.airports:
+                geo_ok |= batch.member_mask('airport', self.airports)
+            mask &= geo_ok
+
+        return mask
+
+    def filter(self, audio_list: List) -> List:
+        if not audio_list:
+            return []
+        batch = audio_list if isinstance(audio_list, AudioBatch) else AudioBatch(audio_list)
+        return batch.select(self.mask(batch))
+
+    def to_dict(self) -> dict:
+        return {
+            'vfr_only': self.vfr_only,
+            'geo_filter': self.geo_filter,
+            'airports': sorted(self.airports),
+            'regions': list(self.regions),
+        }
@@ -0,0 +1,183 @@
+"""
+Named polygon regions with a uniform grid index.
+
+Each grid cell lists the regions whose bounding box overlaps it, so a point
+is only tested against the few polygons near it. Batch classification runs
+a vectorized ray-casting test per candidate region. Points on a polygon's
+boundary count as inside, so a box built from ``zab_bounds`` includes its
+north and east edges like its south and west ones.
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Ray casting over points x edges is chunked to keep temporaries small
+_PIP_CHUNK = 4096
+# Cross-product tolerance (degrees squared) for a point lying on an edge
+_EDGE_EPSILON = 1e-12
+
+
+def _points_in_polygon(lat: np.ndarray, lon: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """Vectorized even-odd test, boundary inclusive; ``polygon`` is an (N, 2) array of (lat, lon)"""
+    yi = polygon[:, 0]
+    xi = polygon[:, 1]
+    yj = np.roll(yi, 1)
+    xj = np.roll(xi, 1)
+
+    inside = np.zeros(lat.shape[0], dtype=bool)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for start in range(0, lat.shape[0], _PIP_CHUNK):
+            y = lat[start:start + _PIP_CHUNK, None]
+            x = lon[start:start + _PIP_CHUNK, None]
+            crosses = (yi > y) != (yj > y)
+            x_cross = (xj - xi) * (y - yi) / (yj - yi) + xi
+            hits = crosses & (x < x_cross)
+            on_edge = ((np.abs((x - xi) * (yj - yi) - (y - yi) * (xj - xi)) <= _EDGE_EPSILON)
+                       & (np.minimum(yi, yj) <= y) & (y <= np.maximum(yi, yj))
+                       & (np.minimum(xi, xj) <= x) & (x <= np.maximum(xi, xj)))
+            inside[start:start + _PIP_CHUNK] = (np.count_nonzero(hits, axis=1) % 2 == 1) | on_edge.any(axis=1)
+    return inside
+
+
+def _point_in_polygon(lat: float, lon: float, polygon: List[Tuple[float, float]]) -> bool:
+    inside = False
+    y_j, x_j = polygon[-1]
+    for y_i, x_i in polygon:
+        if (abs((lon - x_i) * (y_j - y_i) - (lat - y_i) * (x_j - x_i)) <= _EDGE_EPSILON
+                and min(y_i, y_j) <= lat <= max(y_i, y_j) and min(x_i, x_j) <= lon <= max(x_i, x_j)):
+            return True
+        if (y_i > lat) != (y_j > lat) and lon < (x_j - x_i) * (lat - y_i) / (y_j - y_i) + x_i:
+            inside = not inside
+        y_j, x_j = y_i, x_i
+    return inside
+
+
+class GeofenceIndex:
+    """Classifies points into named polygon regions"""
+
+    def __init__(self, regions: Dict[str, Sequence[Sequence[float]]], cell_size: float = 0.5):
+        if not regions:
+            raise ValueError("GeofenceIndex needs at least one region")
+
+        self.names: List[str] = list(regions)
+        self.cell_size = float(cell_size)
+        self._polygons = []
+        self._polygon_lists = []
+        self._bboxes = np.zeros((len(self.names), 4))
+
+        for index, name in enumerate(self.names):
+            polygon = np.asarray(regions[name], dtype=np.float64)
+            if polygon.ndim != 2 or polygon.shape[0] < 3 or polygon.shape[1] != 2:
+                raise ValueError(f"Region {name} must be a list of at least 3 [lat, lon] points")
+            self._polygons.append(polygon)
+            self._polygon_lists.append([tuple(point) for point in polygon.tolist()])
+            self._bboxes[index] = (polygon[:, 0].min(), polygon[:, 1].min(),
+                                   polygon[:, 0].max(), polygon[:, 1].max())
+
+        self.south = self._bboxes[:, 0].min()
+        self.west = self._bboxes[:, 1].min()
+        self.rows = max(1, int(np.ceil((self._bboxes[:, 2].max() - self.south) / self.cell_size)) + 1)
+        self.cols = max(1, int(np.ceil((self._bboxes[:, 3].max() - self.west) / self.cell_size)) + 1)
+
+        # candidates[row, col, region]: region bbox overlaps the cell
+        self._candidates = np.zeros((self.rows, self.cols, len(self.names)), dtype=bool)
+        for index, (south, west, north, east) in enumerate(self._bboxes):
+            r0, c0 = self._cell(south, west)
+            r1, c1 = self._cell(north, east)
+            self._candidates[r0:r1 + 1, c0:c1 + 1, index] = True
+        self._cell_regions = {
+            (row, col): tuple(np.flatnonzero(self._candidates[row, col]).tolist())
+            for row in range(self.rows) for col in range(self.cols)
+            if self._candidates[row, col].any()
+        }
+
+    @classmethod
+    def from_bounds(cls, bounds: Dict[str, float], name: str = 'ZAB') -> 'GeofenceIndex':
+        return _bounds_index(name, bounds['north'], bounds['south'], bounds['east'], bounds['west'])
+
+    @classmethod
+    def from_config(cls, config: Optional[dict], fallback_bounds: Dict[str, float]) -> 'GeofenceIndex':
+        """Build from the ``geofences`` config section, or a single box from ``zab_bounds``"""
+        regions = (config or {}).get('regions')
+        if not regions:
+            return cls.from_bounds(fallback_bounds)
+        return cls(regions, cell_size=(config or {}).get('cell_size', 0.5))
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        row = int(np.clip((lat - self.south) // self.cell_size, 0, self.rows - 1))
+        col = int(np.clip((lon - self.west) // self.cell_size, 0, self.cols - 1))
+        return row, col
+
+    def region_ids(self, names: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Indices of the named regions (all when none are named); ValueError on an unknown name"""
+        if not names:
+            return np.arange(len(self.names))
+        lookup = {name: index for index, name in enumerate(self.names)}
+        unknown = [name for name in names if name not in lookup]
+        if unknown:
+            raise ValueError(f"Unknown region: {', '.join(unknown)}")
+        return np.array([lookup[name] for name in names], dtype=np.intp)
+
+    def bbox(self, name: str) -> Tuple[float, float, float, float]:
+        """(south, west, north, east) of a region, for coarse DB prefiltering"""
+        return tuple(self._bboxes[self.names.index(name)])
+
+    def membership(self, lat, lon) -> np.ndarray:
+        """Boolean (points x regions) matrix; points without a position match nothing"""
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        result = np.zeros((lat.shape[0], len(self.names)), dtype=bool)
+
+        valid = ~np.isnan(lat) & ~np.isnan(lon)
+        rows = np.floor((lat - self.south) / self.cell_size)
+        cols = np.floor((lon - self.west) / self.cell_size)
+        valid &= (rows >= 0) & (rows < self.rows) & (cols >= 0) & (cols < self.cols)
+
+        points = np.flatnonzero(valid)
+        if points.size == 0:
+            return result
+
+        candidates = self._candidates[rows[points].astype(np.intp), cols[points].astype(np.intp)]
+        for region in np.flatnonzero(candidates.any(axis=0)):
+            subset = points[candidates[:, region]]
+            result[subset, region] = _points_in_polygon(lat[subset], lon[subset], self._polygons[region])
+        return result
+
+    def regions_at(self, lat: Optional[float], lon: Optional[float]) -> Tuple[int, ...]:
+        """Region ids containing a single point, without NumPy overhead"""
+        if lat is None or lon is None:
+            return ()
+        row = (lat - self.south) // self.cell_size
+        col = (lon - self.west) // self.cell_size
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            return ()
+        return tuple(
+            region for region in self._cell_regions.get((int(row), int(col)), ())
+            if _point_in_polygon(lat, lon, self._polygon_lists[region])
+        )
+
+    def contains(self, lat: Optional[float], lon: Optional[float], region_ids=None) -> bool:
+        hits = self.regions_at(lat, lon)
+        if region_ids is None:
+            return bool(hits)
+        return any(region in region_ids for region in hits)
+
+    def classify(self, lat, lon) -> List[Tuple[str, ...]]:
+        """Region names each point falls in"""
+        matrix = self.membership(lat, lon)
+        return [tuple(self.names[i] for i in np.flatnonzero(row)) for row in matrix]
+
+    def membership_from_names(self, names: Sequence[Sequence[str]]) -> np.ndarray:
+        """Rebuild the ``membership`` matrix from ``classify`` output without testing any points"""
+        lookup = {name: index for index, name in enumerate(self.names)}
+        result = np.zeros((len(names), len(self.names)), dtype=bool)
+        for row, point_names in enumerate(names):
+            result[row, [lookup[name] for name in point_names]] = True
+        return result
+
+
+@lru_cache(maxsize=32)
+def _bounds_index(name: str, north: float, south: float, east: float, west: float) -> GeofenceIndex:
+    return GeofenceIndex({name: [[north, west], [north, east], [south, east], [south, west]]})
@@ -0,0 +1,90 @@
+from django.core.management.base import BaseCommand
+from scanner.scanner_service import AudioData
+from scanner.filters import AudioBatch, CompiledFilter, DEFAULT_BOUNDS
+import random
+import time
+
+AIRPORTS = ['KABQ', 'KTUS', 'KPHX', 'KELP', 'KSAF', 'KFLG', 'KAMA', 'KLBB', 'KROW', 'KDMA',
+            'KIWA', 'KSDL', 'KPRC', 'KGUP', 'KFMN', 'KLRU', 'KHOB', 'KCVN', 'KSVC', 'KTCS']
+FLIGHT_RULES = ['VFR', 'IFR', 'UNK']
+
+
+class Command(BaseCommand):
+    help = 'Benchmark scalar vs vectorized transmission filtering'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=10000, help='Transmissions per batch')
+        parser.add_argument('--profiles', type=int, default=200, help='Number of filter profiles')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed repetitions (best is reported)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        items = [self._make_audio(rng, i) for i in range(options['items'])]
+        profiles = [self._make_profile(rng) for _ in range(options['profiles'])]
+        evaluations = len(items) * len(profiles)
+
+        scalar_time = min(self._time(lambda: [[p(a) for a in items] for p in profiles])
+                          for _ in range(options['repeat']))
+
+        def vectorized():
+            batch = AudioBatch(items)
+            return [p.mask(batch) for p in profiles]
+
+        vector_time = min(self._time(vectorized) for _ in range(options['repeat']))
+
+        batch = AudioBatch(items)
+        for profile in profiles:
+            expected = [profile(a) for a in items]
+            if profile.mask(batch).tolist() != expected:
+                self.stderr.write(self.style.ERROR(f'Mismatch for profile {profile.to_dict()}'))
+                return
+
+        self.stdout.write(f'{len(items)} items x {len(profiles)} profiles ({evaluations:,} evaluations)')
+        for label, elapsed in (('scalar', scalar_time), ('vectorized', vector_time)):
+            self.stdout.write(
+                f'  {label:<11} {elapsed * 1000:9.1f} ms  '
+                f'{evaluations / elapsed:14,.0f} evals/s  '
+                f'{len(items) / elapsed:12,.0f} items/s'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Speedup: {scalar_time / vector_time:.1f}x'))
+
+    @staticmethod
+    def _time(fn) -> float:
+        started = time.perf_counter()
+        fn()
+        return time.perf_counter() - started
+
+    @staticmethod
+    def _make_audio(rng: random.Random, audio_id: int) -> AudioData:
+        position = rng.random()
+        if position < 0.1:
+            lat = lon = None
+        else:
+            lat = rng.uniform(28.0, 40.0)
+            lon = rng.uniform(-118.0, -100.0)
+        flight_rules = rng.choice(FLIGHT_RULES)
+        return AudioData(
+            id=audio_id,
+            url=f'https://example.invalid/{audio_id}.mp3' if rng.random() > 0.02 else '',
+            who_from='-',
+            frequency=f'1{rng.randint(18, 35)}.{rng.randint(0, 975):03d}',
+            station_name='-',
+            pilot=f'[{flight_rules}] N{audio_id}',
+            airport=rng.choice(AIRPORTS),
+            position='-',
+            voice_name='-',
+            from_userid='-',
+            flight_rules=flight_rules,
+            lat=lat,
+            lon=lon
+        )
+
+    @staticmethod
+    def _make_profile(rng: random.Random) -> CompiledFilter:
+        return CompiledFilter(
+            vfr_only=rng.random() < 0.3,
+            geo_filter=rng.random() < 0.6,
+            airports=rng.sample(AIRPORTS, rng.randint(0, 4)),
+            bounds=DEFAULT_BOUNDS
+        )
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+from scanner.scanner_service import ScannerService
+from scanner.queries import TransmissionFilter
+from scanner.export import EXPORT_FORMATS, DEFAULT_CHUNK_SIZE, export_rows, iter_export
+import sys
+
+
+class Command(BaseCommand):
+    help = 'Stream transmission history to NDJSON or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='ndjson', help='Output format')
+        parser.add_argument('--output', '-o', help='Output file (default: stdout)')
+        parser.add_argument('--airport', help='Comma-separated airports')
+        parser.add_argument('--flight-rules', help='Comma-separated flight rules')
+        parser.add_argument('--frequency', help='Exact frequency')
+        parser.add_argument('--since', help='Start time (epoch seconds or ISO-8601)')
+        parser.add_argument('--until', help='End time, exclusive (epoch seconds or ISO-8601)')
+        parser.add_argument('--region', help='Geofence region name')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows fetched per DB round trip')
+
+    def handle(self, *args, **options):
+        try:
+            filters = TransmissionFilter.from_params({
+                'airport': options['airport'],
+                'flight_rules': options['flight_rules'],
+                'frequency': options['frequency'],
+                'since': options['since'],
+                'until': options['until'],
+                'region': options['region'],
+            })
+            geofence = ScannerService().geofence if filters.region else None
+            rows = export_rows(filters, geofence=geofence, chunk_size=options['chunk_size'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        exported = 0
+
+        def counted():
+            nonlocal exported
+            for row in rows:
+                exported += 1
+                yield row
+
+        out = open(options['output'], 'w', newline='') if options['output'] else sys.stdout
+        try:
+            for line in iter_export(options['format'], counted()):
+                out.write(line)
+        finally:
+            if options['output']:
+                out.close()
+
+        if options['output']:
+            self.stderr.write(self.style.SUCCESS(f'Exported {exported} transmissions to {options["output"]}'))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from scanner.retention import prune
+import json
+
+
+class Command(BaseCommand):
+    help = 'Delete transmissions older than the retention window, optionally archiving them'
+
+    def add_arguments(self, parser):
+        # Defaults come from config.json in handle(), so building the parser (e.g. for --help) reads no files
+        parser.add_argument('--days', type=float, help='Retention window in days (default: retention.days or 30)')
+        parser.add_argument('--batch-size', type=int,
+                            help='Rows deleted per transaction (default: retention.batch_size or 1000)')
+        parser.add_argument('--archive-dir',
+                            help='Write gzip NDJSON archives here before deleting (default: retention.archive_dir)')
+        parser.add_argument('--pause', type=float, help='Seconds to sleep between batches (default: retention.pause or 0.05)')
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches')
+
+    def handle(self, *args, **options):
+        with open('config.json', 'r') as f:
+            retention = json.load(f).get('retention', {})
+
+        def option(name, key, default):
+            return options[name] if options[name] is not None else retention.get(key, default)
+
+        result = prune(
+            option('days', 'days', 30),
+            batch_size=option('batch_size', 'batch_size', 1000),
+            archive_dir=option('archive_dir', 'archive_dir', None),
+            pause=option('pause', 'pause', 0.05),
+            max_batches=options['max_batches']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Pruned {result['rows_pruned']} transmissions in {result['batches']} batches "
+            f"({result['seconds']:.2f}s, cutoff {result['cutoff']})"
+        ))
+        if result['archive']:
+            self.stdout.write(f"Archived to {result['archive']}")
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from scanner.rollups import rebuild
+from scanner.queries import parse_time
+import time
+
+
+class Command(BaseCommand):
+    help = 'Rebuild traffic rollup tables from raw transmissions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Only rebuild buckets from this time (epoch seconds or ISO-8601)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rollup rows written per INSERT')
+
+    def handle(self, *args, **options):
+        try:
+            since = parse_time(options['since'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        started = time.perf_counter()
+        written = rebuild(since=since, batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} rollup rows in {elapsed:.2f}s'))
@@ -12,6 +12,7 @@ class Command(BaseCommand):
         parser.add_argument('--vfr-only', action='store_true', help='Only VFR transmissions')
         parser.add_argument('--geo-filter', action='store_true', help='Enable geographic filtering')
         parser.add_argument('--airports', nargs='+', help='Filter by airports')
+        parser.add_argument('--regions', nargs='+', help='Geofence regions for --geo-filter')
 
     def handle(self, *args, **options):
         scanner = ScannerService()
@@ -22,6 +23,7 @@ class Command(BaseCommand):
             'vfr_only': options['vfr_only'],
             'geo_filter': options['geo_filter'],
             'airports': options.get('airports', []),
+            'regions': options.get('regions') or [],
         }
 
         self.stdout.write(self.style.SUCCESS('Starting Aviation Scanner...'))
@@ -0,0 +1,96 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AudioTransmission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transmission_id', models.IntegerField(unique=True)),
+                ('url', models.URLField(max_length=500)),
+                ('who_from', models.CharField(max_length=100)),
+                ('frequency', models.CharField(max_length=50)),
+                ('station_name', models.CharField(max_length=100)),
+                ('pilot', models.CharField(max_length=100)),
+                ('airport', models.CharField(max_length=10)),
+                ('position', models.CharField(max_length=100)),
+                ('voice_name', models.CharField(max_length=100)),
+                ('from_userid', models.CharField(max_length=100)),
+                ('flight_rules', models.CharField(max_length=10)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('timestamp', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'audio_transmissions',
+                'ordering': ['-transmission_id'],
+                'indexes': [models.Index(fields=['-transmission_id'], name='audio_trans_transmi_0a6e87_idx'), models.Index(fields=['airport'], name='audio_trans_airport_532399_idx'), models.Index(fields=['flight_rules'], name='audio_trans_flight__a9505e_idx'), models.Index(fields=['timestamp'], name='audio_trans_timesta_ddb8b7_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScannerSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('ended_at', models.DateTimeField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('transmissions_count', models.IntegerField(default=0)),
+                ('settings_snapshot', models.JSONField(default=dict)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='scanner_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'scanner_sessions',
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScannerSettings',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('volume', models.FloatField(default=0.7)),
+                ('fetch_interval', models.IntegerField(default=20)),
+                ('vfr_only', models.BooleanField(default=False)),
+                ('geo_filter', models.BooleanField(default=False)),
+                ('prefetch_audio', models.BooleanField(default=True)),
+                ('use_websocket', models.BooleanField(default=True)),
+                ('airports', models.JSONField(blank=True, default=list)),
+                ('regions', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='scanner_settings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Scanner Settings',
+                'db_table': 'scanner_settings',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrafficRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.CharField(choices=[('minute', 'Minute'), ('hour', 'Hour')], max_length=10)),
+                ('dimension', models.CharField(choices=[('airport', 'Airport'), ('frequency', 'Frequency'), ('flight_rules', 'Flight Rules')], max_length=20)),
+                ('bucket_start', models.DateTimeField()),
+                ('value', models.CharField(max_length=100)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'traffic_rollups',
+                'ordering': ['bucket_start'],
+                'constraints': [models.UniqueConstraint(fields=('bucket', 'dimension', 'bucket_start', 'value'), name='traffic_rollup_key')],
+            },
+        ),
+    ]
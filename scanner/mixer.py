@@ -0,0 +1,218 @@
+"""
+Multi-frequency mixer for the live player.
+
+Up to ``max_voices`` transmissions play at once. Each is down-mixed to
+mono, scaled by its frequency's gain and panned with a constant-power
+law when it is added; a render thread then sums the active voices block
+by block, soft-clips the result and feeds it to the OutputStream.
+Transmissions on the same frequency never overlap: a new one is
+scheduled to start when the previous one on that frequency ends.
+"""
+
+import math
+import threading
+import logging
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .output import OutputStream, resample
+
+logger = logging.getLogger(__name__)
+
+# Auto-assigned pan positions, in the order frequencies are first heard
+PAN_SLOTS = (0.0, -0.6, 0.6, -0.3, 0.3, -0.9, 0.9)
+
+
+def soft_clip(mix: np.ndarray, threshold: float = 0.8) -> np.ndarray:
+    """Leave samples below ``threshold`` alone and squash the rest smoothly towards 1.0"""
+    magnitude = np.abs(mix)
+    over = magnitude > threshold
+    if over.any():
+        knee = 1.0 - threshold
+        squashed = threshold + knee * np.tanh((magnitude[over] - threshold) / knee)
+        mix[over] = np.sign(mix[over]) * squashed
+    return mix
+
+
+class Voice:
+    __slots__ = ('frequency', 'samples', 'position', 'delay', 'on_first_sample')
+
+    def __init__(self, frequency: str, samples: np.ndarray, delay: int,
+                 on_first_sample: Optional[Callable[[], None]]):
+        self.frequency = frequency
+        self.samples = samples
+        self.position = 0
+        self.delay = delay
+        self.on_first_sample = on_first_sample
+
+    @property
+    def remaining(self) -> int:
+        return self.delay + len(self.samples) - self.position
+
+
+class Mixer:
+    """Sums overlapping transmissions into one OutputStream"""
+
+    def __init__(self, output: OutputStream,
+                 max_voices: int = 4,
+                 volume: float = 1.0,
+                 gains: Optional[Dict[str, float]] = None,
+                 pans: Optional[Dict[str, float]] = None,
+                 default_gain: float = 1.0,
+                 block_frames: int = 1024,
+                 lead_seconds: float = 0.1,
+                 clip_threshold: float = 0.8):
+        self.output = output
+        self.max_voices = max_voices
+        self.volume = volume
+        self.gains = dict(gains or {})
+        self.pans = dict(pans or {})
+        self.default_gain = default_gain
+        self.block_frames = block_frames
+        self.lead_seconds = lead_seconds
+        self.clip_threshold = clip_threshold
+
+        self._voices: List[Voice] = []
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._stop_event = threading.Event()
+        self.thread = None
+        self.is_running = False
+
+        self.depth = 0
+        self.peak_depth = 0
+        self.mixed = 0
+        self.overlapped = 0
+        self.clipped_blocks = 0
+
+    def _pan(self, frequency: str) -> float:
+        pan = self.pans.get(frequency)
+        if pan is None:
+            pan = PAN_SLOTS[len(self.pans) % len(PAN_SLOTS)]
+            self.pans[frequency] = pan
+        return pan
+
+    def _weights(self, frequency: str) -> np.ndarray:
+        gain = self.gains.get(frequency, self.default_gain) * self.volume
+        channels = self.output.channels
+        if channels == 1:
+            return np.array([gain], dtype=np.float32)
+        # Constant-power pan: -1 is hard left, +1 hard right
+        angle = (self._pan(frequency) + 1) * math.pi / 4
+        weights = np.zeros(channels, dtype=np.float32)
+        weights[0] = gain * math.cos(angle)
+        weights[1] = gain * math.sin(angle)
+        return weights
+
+    def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._worker, daemon=True, name='audio-mixer')
+        self.thread.start()
+
+    def stop(self):
+        if not self.is_running:
+            return
+        self.is_running = False
+        self._stop_event.set()
+        with self._changed:
+            self._voices.clear()
+            self._changed.notify_all()
+        if self.thread:
+            self.thread.join(timeout=2)
+            self.thread = None
+
+    def wait_for_voice(self, stop_event: Optional[threading.Event] = None):
+        """Block until a voice is free"""
+        with self._changed:
+            while len(self._voices) >= self.max_voices and self.is_running:
+                if stop_event is not None and stop_event.is_set():
+                    return
+                self._changed.wait(0.1)
+
+    def add(self, samples: np.ndarray, sample_rate: int, frequency: str,
+            on_first_sample: Optional[Callable[[], None]] = None):
+        """Schedule a decoded clip; it starts now or after the frequency's current transmission"""
+        if sample_rate != self.output.sample_rate:
+            samples = resample(samples, sample_rate, self.output.sample_rate)
+        mono = samples.mean(axis=1) if samples.shape[1] > 1 else samples[:, 0]
+
+        with self._changed:
+            weights = self._weights(frequency)
+            delay = max((voice.remaining for voice in self._voices if voice.frequency == frequency), default=0)
+            if any(voice.frequency != frequency for voice in self._voices):
+                self.overlapped += 1
+            self._voices.append(Voice(frequency, mono[:, None] * weights, delay, on_first_sample))
+            self.mixed += 1
+            self._changed.notify_all()
+
+    def render(self, frames: int):
+        """Next mixed block and the first-sample callbacks of voices starting in it; None when idle"""
+        with self._changed:
+            if not self._voices:
+                self.depth = 0
+                return None, []
+            mix = np.zeros((frames, self.output.channels), dtype=np.float32)
+            callbacks = []
+            depth = 0
+            for voice in self._voices:
+                if voice.delay >= frames:
+                    voice.delay -= frames
+                    continue
+                offset = voice.delay
+                voice.delay = 0
+                chunk = voice.samples[voice.position:voice.position + frames - offset]
+                if voice.position == 0 and voice.on_first_sample:
+                    callbacks.append(voice.on_first_sample)
+                mix[offset:offset + len(chunk)] += chunk
+                voice.position += len(chunk)
+                depth += 1
+
+            finished = [voice for voice in self._voices if voice.remaining <= 0]
+            if finished:
+                self._voices = [voice for voice in self._voices if voice.remaining > 0]
+                self._changed.notify_all()
+            self.depth = depth
+            self.peak_depth = max(self.peak_depth, depth)
+
+        if np.abs(mix).max() > self.clip_threshold:
+            self.clipped_blocks += 1
+            soft_clip(mix, self.clip_threshold)
+        return mix, callbacks
+
+    def _worker(self):
+        while not self._stop_event.is_set():
+            self.output.wait_below(self.lead_seconds, self._stop_event)
+            block, callbacks = self.render(self.block_frames)
+            if block is None:
+                with self._changed:
+                    if not self._voices:
+                        self._changed.wait(0.05)
+                continue
+            self.output.feed(block, callbacks, self._stop_event)
+
+    def scheduled_seconds(self) -> float:
+        """Audio still to be mixed, counting same-frequency transmissions queued back to back"""
+        with self._lock:
+            tails: Dict[str, int] = {}
+            for voice in self._voices:
+                tails[voice.frequency] = max(tails.get(voice.frequency, 0), voice.remaining)
+        return max(tails.values(), default=0) / self.output.sample_rate
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            voices = len(self._voices)
+        return {
+            "running": self.is_running,
+            "max_voices": self.max_voices,
+            "voices": voices,
+            "mix_depth": self.depth,
+            "peak_depth": self.peak_depth,
+            "mixed": self.mixed,
+            "overlapped": self.overlapped,
+            "clipped_blocks": self.clipped_blocks,
+            "scheduled_seconds": round(self.scheduled_seconds(), 2),
+        }
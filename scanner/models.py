@@ -10,6 +10,7 @@ class ScannerSettings(models.Model):
     prefetch_audio = models.BooleanField(default=True)
     use_websocket = models.BooleanField(default=True)
     airports = models.JSONField(default=list, blank=True)
+    regions = models.JSONField(default=list, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -45,6 +46,7 @@ class AudioTransmission(models.Model):
             models.Index(fields=['-transmission_id']),
             models.Index(fields=['airport']),
             models.Index(fields=['flight_rules']),
+            models.Index(fields=['timestamp']),
         ]
 
     def __str__(self):
@@ -66,3 +68,24 @@ class ScannerSession(models.Model):
     def __str__(self):
         status = "Active" if self.is_active else "Ended"
         return f"Session {self.id} - {status} - {self.started_at}"
+
+
+class TrafficRollup(models.Model):
+    BUCKET_CHOICES = [('minute', 'Minute'), ('hour', 'Hour')]
+    DIMENSION_CHOICES = [('airport', 'Airport'), ('frequency', 'Frequency'), ('flight_rules', 'Flight Rules')]
+
+    bucket = models.CharField(max_length=10, choices=BUCKET_CHOICES)
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    bucket_start = models.DateTimeField()
+    value = models.CharField(max_length=100)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'traffic_rollups'
+        ordering = ['bucket_start']
+        constraints = [
+            models.UniqueConstraint(fields=['bucket', 'dimension', 'bucket_start', 'value'], name='traffic_rollup_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.bucket} {self.bucket_start} {self.dimension}={self.value}: {self.count}"
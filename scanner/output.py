@@ -0,0 +1,413 @@
+"""
+Session-long audio output for the live player.
+
+One output stream is opened per session and pulls fixed-size blocks from
+a single-producer/single-consumer ring of float32 frames. The player
+thread writes whole clips into the ring back to back, so transmissions
+play gaplessly and no device is opened per clip. Clips whose rate or
+channel count differ from the stream's are converted on the way in.
+
+Sinks: miniaudio and sounddevice devices, plus ``null`` (discards audio
+at realtime pace) and ``file`` (writes a WAV) for machines without audio
+hardware.
+"""
+
+import os
+import threading
+import time
+import wave
+import logging
+from collections import deque
+from typing import Callable, Dict, Iterable, Optional
+
+import numpy as np
+
+try:
+    import miniaudio
+    MINIAUDIO_AVAILABLE = True
+except ImportError:
+    MINIAUDIO_AVAILABLE = False
+
+try:
+    import sounddevice as sd
+    SOUNDDEVICE_AVAILABLE = True
+except (ImportError, OSError):
+    SOUNDDEVICE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('auto', 'miniaudio', 'sounddevice', 'null', 'file')
+
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """Linear-interpolation resample of (frames, channels) float32 samples"""
+    if src_rate == dst_rate or len(samples) == 0:
+        return samples
+    frames = max(1, int(round(len(samples) * dst_rate / src_rate)))
+    positions = np.arange(frames, dtype=np.float64) * (src_rate / dst_rate)
+    index = np.minimum(positions.astype(np.int64), len(samples) - 1)
+    following = np.minimum(index + 1, len(samples) - 1)
+    weight = (positions - index).astype(np.float32)[:, None]
+    return samples[index] * (1 - weight) + samples[following] * weight
+
+
+def match_channels(samples: np.ndarray, channels: int) -> np.ndarray:
+    current = samples.shape[1]
+    if current == channels:
+        return samples
+    if current == 1:
+        return np.repeat(samples, channels, axis=1)
+    if channels == 1:
+        return samples.mean(axis=1, keepdims=True)
+    if current > channels:
+        return samples[:, :channels]
+    return np.concatenate([samples, np.repeat(samples[:, -1:], channels - current, axis=1)], axis=1)
+
+
+class FrameRing:
+    """Lock-free single-producer/single-consumer ring of float32 frames.
+
+    The producer only advances ``written`` and the consumer only advances
+    ``read``; each publishes its counter after copying, so neither side
+    ever waits on a lock.
+    """
+
+    def __init__(self, capacity: int, channels: int):
+        self.capacity = capacity
+        self.channels = channels
+        self._buffer = np.zeros((capacity, channels), dtype=np.float32)
+        self.written = 0
+        self.read = 0
+
+    def available(self) -> int:
+        return self.written - self.read
+
+    def free(self) -> int:
+        return self.capacity - (self.written - self.read)
+
+    def write(self, frames: np.ndarray) -> int:
+        count = min(len(frames), self.free())
+        if count <= 0:
+            return 0
+        start = self.written % self.capacity
+        first = min(count, self.capacity - start)
+        self._buffer[start:start + first] = frames[:first]
+        self._buffer[:count - first] = frames[first:count]
+        self.written += count
+        return count
+
+    def read_into(self, out: np.ndarray) -> int:
+        """Fill ``out`` with buffered frames, padding with silence; returns frames read"""
+        count = min(len(out), self.available())
+        start = self.read % self.capacity
+        first = min(count, self.capacity - start)
+        out[:first] = self._buffer[start:start + first]
+        out[first:count] = self._buffer[:count - first]
+        out[count:] = 0
+        self.read += count
+        return count
+
+
+class MiniaudioSink:
+    def __init__(self, pull: Callable[[int], np.ndarray], sample_rate: int, channels: int, buffer_ms: int):
+        self._pull = pull
+        self.device = miniaudio.PlaybackDevice(
+            output_format=miniaudio.SampleFormat.FLOAT32,
+            nchannels=channels,
+            sample_rate=sample_rate,
+            buffersize_msec=buffer_ms
+        )
+
+    def _frames(self):
+        required = yield b''
+        while True:
+            required = yield self._pull(required)
+
+    def start(self):
+        frames = self._frames()
+        next(frames)
+        self.device.start(frames)
+
+    def close(self):
+        self.device.close()
+
+
+class SoundDeviceSink:
+    def __init__(self, pull_into: Callable[[np.ndarray], int], sample_rate: int, channels: int, buffer_ms: int):
+        self._pull_into = pull_into
+        self.stream = sd.OutputStream(
+            samplerate=sample_rate,
+            channels=channels,
+            dtype='float32',
+            latency=buffer_ms / 1000,
+            callback=lambda outdata, frames, time_info, status: self._pull_into(outdata)
+        )
+
+    def start(self):
+        self.stream.start()
+
+    def close(self):
+        self.stream.stop()
+        self.stream.close()
+
+
+class NullSink:
+    """Consumes frames at realtime pace without a device, optionally writing a WAV file"""
+
+    def __init__(self, pull: Callable[[int], np.ndarray], sample_rate: int, channels: int, buffer_ms: int,
+                 path: Optional[str] = None):
+        self._pull = pull
+        self.sample_rate = sample_rate
+        self.block = max(1, sample_rate * buffer_ms // 1000)
+        self._stop_event = threading.Event()
+        self.thread = None
+        self._wav = None
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._wav = wave.open(path, 'wb')
+            self._wav.setnchannels(channels)
+            self._wav.setsampwidth(2)
+            self._wav.setframerate(sample_rate)
+
+    def start(self):
+        self.thread = threading.Thread(target=self._worker, daemon=True, name='audio-null-sink')
+        self.thread.start()
+
+    def _worker(self):
+        period = self.block / self.sample_rate
+        deadline = time.perf_counter()
+        while not self._stop_event.is_set():
+            frames = self._pull(self.block)
+            if self._wav is not None:
+                self._wav.writeframes((np.clip(frames, -1, 1) * 32767).astype(np.int16).tobytes())
+            deadline += period
+            self._stop_event.wait(max(0.0, deadline - time.perf_counter()))
+
+    def close(self):
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=2)
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+
+class OutputStream:
+    """Long-lived output stream fed clip by clip through a FrameRing"""
+
+    def __init__(self, backend: Optional[str] = 'auto', sample_rate: int = 44100, channels: int = 2,
+                 ring_seconds: float = 2.0, buffer_ms: int = 50, path: Optional[str] = None):
+        backend = backend or 'auto'
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown playback backend: {backend}")
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.buffer_ms = buffer_ms
+        self.path = path
+        self.ring = FrameRing(max(1, int(ring_seconds * sample_rate)), channels)
+
+        self.sink = None
+        self._open_lock = threading.Lock()
+        self._space = threading.Event()
+        self._markers: deque = deque()
+        self._writing = False
+
+        self.clips = 0
+        self.resampled = 0
+        self.frames_played = 0
+        self.underruns = 0
+
+    def _resolve_backend(self) -> str:
+        if self.backend != 'auto':
+            return self.backend
+        if MINIAUDIO_AVAILABLE:
+            return 'miniaudio'
+        if SOUNDDEVICE_AVAILABLE:
+            return 'sounddevice'
+        return 'null'
+
+    def _make_sink(self, backend: str):
+        if backend == 'miniaudio':
+            return MiniaudioSink(self.pull, self.sample_rate, self.channels, self.buffer_ms)
+        if backend == 'sounddevice':
+            return SoundDeviceSink(self.pull_into, self.sample_rate, self.channels, self.buffer_ms)
+        return NullSink(self.pull, self.sample_rate, self.channels, self.buffer_ms,
+                        path=self.path if backend == 'file' else None)
+
+    def open(self):
+        with self._open_lock:
+            if self.sink is not None:
+                return
+            backend = self._resolve_backend()
+            try:
+                sink = self._make_sink(backend)
+                sink.start()
+            except Exception as e:
+                if self.backend != 'auto':
+                    raise
+                logger.warning(f"Audio output {backend} unavailable ({e}), using null sink")
+                backend = 'null'
+                sink = self._make_sink(backend)
+                sink.start()
+            self.sink = sink
+            self.backend = backend
+            logger.info(f"Audio output opened: {backend}, {self.sample_rate} Hz, {self.channels} ch")
+
+    def close(self):
+        with self._open_lock:
+            if self.sink is None:
+                return
+            self.sink.close()
+            self.sink = None
+        self.flush()
+
+    @property
+    def is_playing(self) -> bool:
+        return self.ring.available() > 0
+
+    def pull_into(self, out: np.ndarray) -> int:
+        """Device callback: copy the next frames out of the ring"""
+        count = self.ring.read_into(out)
+        self.frames_played += count
+        if count < len(out) and self._writing:
+            # The player could not keep the ring ahead of the device
+            self.underruns += 1
+
+        # Fire first-sample callbacks for clips that started in this block
+        while self._markers and self._markers[0][0] < self.ring.read:
+            _, callback = self._markers.popleft()
+            if callback:
+                callback()
+        self._space.set()
+        return count
+
+    def pull(self, frames: int) -> np.ndarray:
+        out = np.empty((frames, self.channels), dtype=np.float32)
+        self.pull_into(out)
+        return out
+
+    def _convert(self, samples: np.ndarray, sample_rate: int) -> np.ndarray:
+        if sample_rate != self.sample_rate:
+            samples = resample(samples, sample_rate, self.sample_rate)
+        return np.ascontiguousarray(match_channels(samples, self.channels), dtype=np.float32)
+
+    def _write(self, samples: np.ndarray, stop_event: Optional[threading.Event]) -> bool:
+        position = 0
+        while position < len(samples):
+            written = self.ring.write(samples[position:])
+            position += written
+            if written == 0:
+                if stop_event is not None and stop_event.is_set():
+                    return False
+                self._space.clear()
+                self._space.wait(0.1)
+        return True
+
+    def _begin(self, on_first_sample: Optional[Callable[[], None]], sample_rate: int):
+        self._markers.append((self.ring.written, on_first_sample))
+        self.clips += 1
+        if sample_rate != self.sample_rate:
+            self.resampled += 1
+
+    def play(self, samples: np.ndarray, sample_rate: int,
+             on_first_sample: Optional[Callable[[], None]] = None,
+             stop_event: Optional[threading.Event] = None) -> bool:
+        """Queue a clip behind whatever is playing; returns once it is fully buffered"""
+        if stop_event is not None and stop_event.is_set():
+            return False
+        self.open()
+        samples = self._convert(samples, sample_rate)
+
+        self._begin(on_first_sample, sample_rate)
+        self._writing = True
+        try:
+            return self._write(samples, stop_event)
+        finally:
+            self._writing = False
+
+    def play_stream(self, blocks: Iterable[np.ndarray], sample_rate: int,
+                    on_first_sample: Optional[Callable[[], None]] = None,
+                    stop_event: Optional[threading.Event] = None,
+                    prebuffer: float = 0.2) -> bool:
+        """Queue a clip as it is decoded, starting once ``prebuffer`` seconds are ready"""
+        if stop_event is not None and stop_event.is_set():
+            return False
+        self.open()
+
+        pending = []
+        pending_frames = 0
+        started = False
+        self._writing = True
+        try:
+            for block in blocks:
+                block = self._convert(block, sample_rate)
+                if not started:
+                    # Jitter buffer: absorb uneven chunk arrival before the first sample
+                    pending.append(block)
+                    pending_frames += len(block)
+                    if pending_frames < prebuffer * self.sample_rate:
+                        continue
+                    block = np.concatenate(pending)
+                    self._begin(on_first_sample, sample_rate)
+                    started = True
+                if not self._write(block, stop_event):
+                    return False
+
+            if not started:
+                if not pending:
+                    return False
+                self._begin(on_first_sample, sample_rate)
+                return self._write(np.concatenate(pending), stop_event)
+            return True
+        finally:
+            self._writing = False
+
+    def feed(self, block: np.ndarray, callbacks: Iterable[Callable[[], None]] = (),
+             stop_event: Optional[threading.Event] = None) -> bool:
+        """Queue frames already in the stream's rate and layout, e.g. from the mixer"""
+        self.open()
+        for callback in callbacks:
+            self._markers.append((self.ring.written, callback))
+        self._writing = True
+        try:
+            return self._write(block, stop_event)
+        finally:
+            self._writing = False
+
+    def buffered_seconds(self) -> float:
+        return self.ring.available() / self.sample_rate
+
+    def wait_below(self, seconds: float, stop_event: Optional[threading.Event] = None):
+        """Block until no more than ``seconds`` of audio is buffered"""
+        while self.ring.available() > seconds * self.sample_rate:
+            if stop_event is not None and stop_event.is_set():
+                return
+            self._space.clear()
+            self._space.wait(0.05)
+
+    def drain(self, timeout: float = 5.0) -> bool:
+        """Wait until everything buffered has been played"""
+        deadline = time.monotonic() + timeout
+        while self.ring.available() and time.monotonic() < deadline:
+            self._space.clear()
+            self._space.wait(0.05)
+        return not self.ring.available()
+
+    def flush(self):
+        """Drop buffered audio (only while the sink is closed)"""
+        self.ring.read = self.ring.written
+        self._markers.clear()
+
+    def get_status(self) -> Dict:
+        return {
+            "backend": self.backend,
+            "open": self.sink is not None,
+            "sample_rate": self.sample_rate,
+            "channels": self.channels,
+            "buffered_ms": round(self.buffered_seconds() * 1000, 1),
+            "clips": self.clips,
+            "resampled": self.resampled,
+            "frames_played": self.frames_played,
+            "underruns": self.underruns,
+        }
@@ -0,0 +1,149 @@
+"""
+Decoded PCM clips for the live player.
+
+Clips are decoded to float32 frames as soon as they are prefetched, in a
+worker pool, so the player thread only hands ready samples to the output
+device. Every clip is decoded straight to one sample rate and channel
+count, which keeps the output side free of per-clip format changes.
+"""
+
+import io
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+
+try:
+    import miniaudio
+    MINIAUDIO_AVAILABLE = True
+except ImportError:
+    MINIAUDIO_AVAILABLE = False
+
+try:
+    from pydub import AudioSegment
+    PYDUB_AVAILABLE = True
+except ImportError:
+    PYDUB_AVAILABLE = False
+
+DEFAULT_SAMPLE_RATE = 44100
+DEFAULT_CHANNELS = 1
+
+
+class PCMClip(NamedTuple):
+    samples: np.ndarray  # float32, shape (frames, channels)
+    sample_rate: int
+    decode_seconds: float
+
+    @property
+    def frames(self) -> int:
+        return self.samples.shape[0]
+
+    @property
+    def channels(self) -> int:
+        return self.samples.shape[1]
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sample_rate
+
+    @property
+    def nbytes(self) -> int:
+        return self.samples.nbytes
+
+
+def decode_clip(data, sample_rate: int = DEFAULT_SAMPLE_RATE, channels: int = DEFAULT_CHANNELS) -> PCMClip:
+    """Decode an encoded clip (bytes or a buffer such as an mmap view) to float32 frames"""
+    started = time.perf_counter()
+    if MINIAUDIO_AVAILABLE:
+        # Hand the decoder a pointer to mmap'd clips rather than a copy
+        source = data if isinstance(data, bytes) else miniaudio.ffi.from_buffer(data)
+        decoded = miniaudio.decode(source, output_format=miniaudio.SampleFormat.FLOAT32,
+                                   nchannels=channels, sample_rate=sample_rate)
+        samples = np.frombuffer(decoded.samples, dtype=np.float32)
+    elif PYDUB_AVAILABLE:
+        segment = AudioSegment.from_file(io.BytesIO(bytes(data)))
+        segment = segment.set_frame_rate(sample_rate).set_channels(channels).set_sample_width(2)
+        samples = np.frombuffer(segment.raw_data, dtype=np.int16).astype(np.float32) / 32768.0
+    else:
+        raise RuntimeError("No audio decoder available")
+    return PCMClip(samples.reshape(-1, channels), sample_rate, time.perf_counter() - started)
+
+
+class LatencyStats:
+    """Running count, last, mean and max of a duration in milliseconds"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.last: Optional[float] = None
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.last = seconds
+            self.max = max(self.max, seconds)
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            return {
+                "count": self.count,
+                "last_ms": round(self.last * 1000, 2) if self.last is not None else None,
+                "avg_ms": round(self.total / self.count * 1000, 2) if self.count else None,
+                "max_ms": round(self.max * 1000, 2),
+            }
+
+
+def time_compress(samples: np.ndarray, rate: float, sample_rate: int = DEFAULT_SAMPLE_RATE,
+                  frame_ms: float = 40.0, decimate: int = 4) -> np.ndarray:
+    """Speed up (frames, channels) float32 audio by ``rate`` without changing its pitch.
+
+    WSOLA: Hann frames at 50% overlap are taken from the input every
+    ``rate`` synthesis hops, each nudged within a tolerance window to the
+    offset that best continues the previous frame, then overlap-added.
+    The offset search runs on a decimated mono copy; the overlap-add is a
+    single vectorized pass.
+    """
+    if rate <= 1.0:
+        return samples
+    hop = max(decimate, int(sample_rate * frame_ms / 2000) // decimate * decimate)
+    size = 2 * hop
+    tolerance = hop // 2
+    analysis_hop = hop * rate
+    if len(samples) < size + tolerance:
+        return samples
+
+    mono = samples.mean(axis=1) if samples.shape[1] > 1 else samples[:, 0]
+    coarse = mono[::decimate]
+    coarse_size = size // decimate
+    coarse_hop = hop // decimate
+    coarse_tolerance = tolerance // decimate
+    windows = np.lib.stride_tricks.sliding_window_view(coarse, coarse_size)
+
+    last = len(samples) - size
+    count = int(last // analysis_hop) + 1
+    positions = np.empty(count, dtype=np.int64)
+    positions[0] = 0
+    for k in range(1, count):
+        # Natural continuation of the previous frame, and the candidates around the nominal position
+        follow = positions[k - 1] // decimate + coarse_hop
+        nominal = int(k * analysis_hop) // decimate
+        low = max(0, nominal - coarse_tolerance)
+        high = min(len(windows) - 1, nominal + coarse_tolerance)
+        if follow >= len(windows) or low > high:
+            count = k
+            break
+        scores = windows[low:high + 1] @ windows[follow]
+        positions[k] = min((low + int(np.argmax(scores))) * decimate, last)
+    positions = positions[:count]
+
+    window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(size) / size)).astype(np.float32)
+    frames = samples[positions[:, None] + np.arange(size)] * window[None, :, None]
+    # With 50% overlap each output hop is the second half of one frame plus the first half of the next
+    out = np.zeros((count + 1, hop, samples.shape[1]), dtype=np.float32)
+    out[:count] += frames[:, :hop]
+    out[1:] += frames[:, hop:]
+    return out.reshape(-1, samples.shape[1])
@@ -0,0 +1,177 @@
+import queue
+import threading
+import time
+import logging
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, List
+
+from django.db import close_old_connections, transaction
+
+from .models import AudioTransmission
+from .scheduler import parse_stamp
+from .rollups import apply_rollups, rollup_counts
+
+logger = logging.getLogger(__name__)
+
+
+def _truncate(model, field_name: str, value):
+    max_length = model._meta.get_field(field_name).max_length
+    if max_length and isinstance(value, str) and len(value) > max_length:
+        return value[:max_length]
+    return value
+
+
+def to_model(audio) -> AudioTransmission:
+    """Build an unsaved AudioTransmission row from an AudioData"""
+    stamp = parse_stamp(audio.stamp)
+    timestamp = datetime.fromtimestamp(stamp, tz=dt_timezone.utc) if stamp is not None \
+        else datetime.now(tz=dt_timezone.utc)
+
+    values = {
+        'transmission_id': audio.id,
+        'url': audio.url,
+        'who_from': audio.who_from,
+        'frequency': audio.frequency,
+        'station_name': audio.station_name,
+        'pilot': audio.pilot,
+        'airport': audio.airport,
+        'position': audio.position,
+        'voice_name': audio.voice_name,
+        'from_userid': audio.from_userid,
+        'flight_rules': audio.flight_rules,
+    }
+    # One oversized upstream value must not fail the whole bulk insert
+    values = {name: _truncate(AudioTransmission, name, value) for name, value in values.items()}
+    return AudioTransmission(latitude=audio.lat, longitude=audio.lon, timestamp=timestamp, **values)
+
+
+class TransmissionWriter:
+    """Persists fetched transmissions from a background thread.
+
+    The fetcher only enqueues; rows are flushed with ``bulk_create`` when
+    ``batch_size`` rows are pending or ``flush_interval`` seconds have
+    passed, so a slow database never stalls polling. With ``rollups`` the
+    traffic rollup counts are updated in the same transaction.
+    """
+
+    def __init__(self, batch_size: int = 200, flush_interval: float = 2.0, max_pending: int = 10000,
+                 rollups: bool = True):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.rollups = rollups
+
+        self.pending = queue.Queue()
+        self.is_running = False
+        self.thread = None
+        self._stop_event = threading.Event()
+
+        self.flushes = 0
+        self.rows_flushed = 0
+        self.rows_inserted = 0
+        self.errors = 0
+        self.dropped = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_time = 0.0
+        self.last_rows = 0
+
+    def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._worker, daemon=True, name='transmission-writer')
+        self.thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        if not self.is_running:
+            return
+        self.is_running = False
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=timeout)
+            self.thread = None
+
+    def submit(self, audio_list: List):
+        for audio in audio_list:
+            if self.pending.qsize() >= self.max_pending:
+                self.dropped += 1
+                continue
+            self.pending.put(audio)
+
+    def _take(self, buffer: List, deadline: float):
+        while len(buffer) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                return
+            try:
+                buffer.append(self.pending.get(timeout=timeout))
+            except queue.Empty:
+                return
+
+    def _worker(self):
+        logger.info("Transmission writer started")
+        buffer = []
+
+        while self.is_running or not self.pending.empty() or buffer:
+            self._take(buffer, time.monotonic() + (self.flush_interval if self.is_running else 0.1))
+            if not buffer:
+                continue
+
+            if self._flush(buffer):
+                buffer = []
+            elif self.is_running:
+                self._stop_event.wait(self.flush_interval)
+            else:
+                logger.error(f"Dropping {len(buffer)} unsaved transmissions on shutdown")
+                self.dropped += len(buffer)
+                buffer = []
+
+        close_old_connections()
+        logger.info("Transmission writer stopped")
+
+    def _flush(self, buffer: List) -> bool:
+        close_old_connections()
+        started = time.perf_counter()
+        try:
+            with transaction.atomic():
+                # Rows already stored are skipped so rollups never count them twice
+                existing = set(AudioTransmission.objects.filter(
+                    transmission_id__in=[audio.id for audio in buffer]
+                ).values_list('transmission_id', flat=True))
+                fresh = {audio.id: audio for audio in buffer if audio.id not in existing}
+                rows = [to_model(audio) for audio in fresh.values()]
+                AudioTransmission.objects.bulk_create(rows, batch_size=self.batch_size, ignore_conflicts=True)
+                if self.rollups:
+                    apply_rollups(rollup_counts(rows))
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Failed to persist {len(buffer)} transmissions: {e}")
+            return False
+
+        elapsed = time.perf_counter() - started
+        self.flushes += 1
+        self.rows_flushed += len(buffer)
+        self.rows_inserted += len(rows)
+        self.last_rows = len(buffer)
+        self.total_flush_time += elapsed
+        self.last_flush_ms = elapsed * 1000
+        self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+        return True
+
+    def get_status(self) -> Dict:
+        return {
+            "running": self.is_running,
+            "pending": self.pending.qsize(),
+            "flushes": self.flushes,
+            "rows_flushed": self.rows_flushed,
+            "rows_inserted": self.rows_inserted,
+            "last_rows": self.last_rows,
+            "avg_rows_per_flush": round(self.rows_flushed / self.flushes, 1) if self.flushes else 0,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "avg_flush_ms": round(self.total_flush_time * 1000 / self.flushes, 2) if self.flushes else 0,
+            "max_flush_ms": round(self.max_flush_ms, 2),
+            "errors": self.errors,
+            "dropped": self.dropped,
+        }
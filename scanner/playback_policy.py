@@ -0,0 +1,89 @@
+"""
+Backlog-aware playback policy shared by the live player and the web queue.
+
+Each transmission's lag behind live is measured from its upstream
+``stamp`` when it reaches the front of the queue. Below ``compress_after``
+it plays normally; between ``compress_after`` and ``drop_after`` it is
+played faster, the rate rising linearly from ``min_rate`` to ``max_rate``;
+past ``drop_after`` it is dropped as stale.
+"""
+
+import threading
+from typing import Dict, Optional
+
+from .scheduler import stamp_lag
+
+
+class PlaybackPolicy:
+    def __init__(self, enabled: bool = True,
+                 compress_after: float = 60.0,
+                 drop_after: float = 180.0,
+                 min_rate: float = 1.25,
+                 max_rate: float = 2.0):
+        if drop_after <= compress_after:
+            raise ValueError("drop_after must be greater than compress_after")
+        self.enabled = enabled
+        self.compress_after = compress_after
+        self.drop_after = drop_after
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+
+        self._lock = threading.Lock()
+        self.played = 0
+        self.dropped = 0
+        self.compressed = 0
+        self.unstamped = 0
+        self.last_lag: Optional[float] = None
+        self.max_lag = 0.0
+
+    @classmethod
+    def from_config(cls, config: Optional[dict]) -> 'PlaybackPolicy':
+        config = config or {}
+        return cls(
+            enabled=config.get('enabled', True),
+            compress_after=config.get('compress_after', 60.0),
+            drop_after=config.get('drop_after', 180.0),
+            min_rate=config.get('min_rate', 1.25),
+            max_rate=config.get('max_rate', 2.0)
+        )
+
+    def rate_for(self, lag: Optional[float]) -> Optional[float]:
+        """Playback rate for a given lag; None means drop"""
+        if not self.enabled or lag is None or lag < self.compress_after:
+            return 1.0
+        if lag >= self.drop_after:
+            return None
+        progress = (lag - self.compress_after) / (self.drop_after - self.compress_after)
+        return round(self.min_rate + (self.max_rate - self.min_rate) * progress, 3)
+
+    def decide(self, stamp, now: Optional[float] = None) -> Optional[float]:
+        """Record a transmission leaving the queue and return its rate (None: drop it)"""
+        lag = stamp_lag(stamp, now)
+        rate = self.rate_for(lag)
+        with self._lock:
+            if lag is None:
+                self.unstamped += 1
+            else:
+                self.last_lag = lag
+                self.max_lag = max(self.max_lag, lag)
+            if rate is None:
+                self.dropped += 1
+            else:
+                self.played += 1
+                if rate > 1.0:
+                    self.compressed += 1
+        return rate
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "compress_after": self.compress_after,
+                "drop_after": self.drop_after,
+                "played": self.played,
+                "dropped": self.dropped,
+                "compressed": self.compressed,
+                "unstamped": self.unstamped,
+                "lag_seconds": round(self.last_lag, 2) if self.last_lag is not None else None,
+                "max_lag_seconds": round(self.max_lag, 2),
+            }
@@ -0,0 +1,169 @@
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+
+class PrefetchWindow:
+    """Downloads only the next K clips ahead of the player.
+
+    ``upcoming(n)`` returns the next n queued items in play order and
+    ``prefetch(item)`` starts (or joins) a download returning a Future.
+    Concurrency and K follow the measured download time d and clip
+    duration c: keeping up needs about d / c parallel downloads, started
+    at least d / c clips ahead of the play position.
+    """
+
+    def __init__(self,
+                 upcoming: Callable[[int], List],
+                 prefetch: Callable[[object], Future],
+                 is_cached: Callable[[int], bool],
+                 min_ahead: int = 2,
+                 max_ahead: int = 8,
+                 min_concurrency: int = 1,
+                 max_concurrency: int = 6,
+                 smoothing: float = 0.2):
+        self._upcoming = upcoming
+        self._prefetch = prefetch
+        self._is_cached = is_cached
+        self.min_ahead = min_ahead
+        self.max_ahead = max_ahead
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.smoothing = smoothing
+
+        self.ahead = min_ahead
+        self.concurrency = min_concurrency
+        self.download_seconds: Optional[float] = None
+        self.clip_seconds: Optional[float] = None
+
+        self._inflight: Dict[int, Future] = {}
+        self._prefetched: 'OrderedDict[int, int]' = OrderedDict()
+        # Failed downloads are left to the player rather than retried in a loop
+        self._failed: 'OrderedDict[int, None]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.started = 0
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.failed = 0
+        self.wasted = 0
+        self.wasted_bytes = 0
+        self.prefetched_bytes = 0
+
+    def _ewma(self, current: Optional[float], sample: float) -> float:
+        return sample if current is None else current + self.smoothing * (sample - current)
+
+    def _adapt(self):
+        if not self.download_seconds or not self.clip_seconds:
+            return
+        ratio = self.download_seconds / self.clip_seconds
+        self.concurrency = max(self.min_concurrency, min(self.max_concurrency, math.ceil(ratio * 1.5)))
+        self.ahead = max(self.min_ahead, min(self.max_ahead, max(self.concurrency, math.ceil(ratio) + 1)))
+
+    def record_download(self, seconds: float):
+        with self._lock:
+            self.download_seconds = self._ewma(self.download_seconds, seconds)
+            self._adapt()
+
+    def record_playback(self, seconds: float):
+        if seconds <= 0:
+            return
+        with self._lock:
+            self.clip_seconds = self._ewma(self.clip_seconds, seconds)
+            self._adapt()
+
+    def pump(self):
+        """Start downloads for upcoming items until the concurrency budget is used"""
+        with self._lock:
+            ahead = self.ahead
+            slots = self.concurrency - len(self._inflight)
+        if slots <= 0:
+            return
+
+        for item in self._upcoming(ahead):
+            if slots <= 0:
+                break
+            with self._lock:
+                if item.id in self._inflight or item.id in self._prefetched or item.id in self._failed:
+                    continue
+            if self._is_cached(item.id):
+                continue
+
+            future = self._prefetch(item)
+            with self._lock:
+                self._inflight[item.id] = future
+                self.started += 1
+            slots -= 1
+            future.add_done_callback(lambda f, audio_id=item.id: self._done(audio_id, f))
+
+    def _done(self, audio_id: int, future: Future):
+        with self._lock:
+            self._inflight.pop(audio_id, None)
+            if future.cancelled() or future.exception():
+                self.failed += 1
+                self._failed[audio_id] = None
+                while len(self._failed) > 4 * self.max_ahead:
+                    self._failed.popitem(last=False)
+            else:
+                size = len(future.result())
+                self._prefetched[audio_id] = size
+                self.prefetched_bytes += size
+                while len(self._prefetched) > 4 * self.max_ahead:
+                    # Prefetched long ago and never played
+                    _, size = self._prefetched.popitem(last=False)
+                    self.wasted += 1
+                    self.wasted_bytes += size
+        self.pump()
+
+    def on_dequeue(self, item):
+        """Classify the clip the player is about to play"""
+        with self._lock:
+            self._failed.pop(item.id, None)
+            if item.id in self._inflight:
+                self.partial_hits += 1
+                return
+            size = self._prefetched.pop(item.id, None)
+        if size is None:
+            with self._lock:
+                self.misses += 1
+        elif self._is_cached(item.id):
+            with self._lock:
+                self.hits += 1
+        else:
+            # Downloaded ahead of time but evicted before its turn
+            with self._lock:
+                self.misses += 1
+                self.wasted += 1
+                self.wasted_bytes += size
+
+    def discard(self, item):
+        """An item left the queue without playing"""
+        with self._lock:
+            self._failed.pop(item.id, None)
+            size = self._prefetched.pop(item.id, None)
+            if size is not None:
+                self.wasted += 1
+                self.wasted_bytes += size
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            played = self.hits + self.partial_hits + self.misses
+            return {
+                "ahead": self.ahead,
+                "concurrency": self.concurrency,
+                "inflight": len(self._inflight),
+                "download_ms": round(self.download_seconds * 1000, 1) if self.download_seconds else None,
+                "clip_seconds": round(self.clip_seconds, 2) if self.clip_seconds else None,
+                "started": self.started,
+                "hits": self.hits,
+                "partial_hits": self.partial_hits,
+                "misses": self.misses,
+                "failed": self.failed,
+                "hit_rate": round(self.hits / played, 3) if played else 0,
+                "wasted": self.wasted,
+                "wasted_bytes": self.wasted_bytes,
+                "prefetched_bytes": self.prefetched_bytes,
+            }
@@ -0,0 +1,147 @@
+import queue
+import threading
+import time
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional
+from .filters import AudioBatch, CompiledFilter
+from .geofence import GeofenceIndex
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FILTER_KEYS = ('vfr_only', 'geo_filter', 'airports', 'regions')
+
+
+class _Subscriber:
+    def __init__(self, profile: CompiledFilter, queue_size: int):
+        self.profile = profile
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.last_seen = time.monotonic()
+        self.dropped = 0
+
+    def put(self, audio):
+        while True:
+            try:
+                self.queue.put_nowait(audio)
+                return
+            except queue.Full:
+                # Keep the newest traffic for listeners who fell behind
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+
+class ProfileRouter:
+    """Fans one upstream batch out to many per-user filtered queues.
+
+    The batch is converted to columns once; subscribers with identical
+    filter settings share one vectorized mask, so cost grows with the
+    number of distinct profiles rather than the number of listeners.
+    """
+
+    def __init__(self, geofence: GeofenceIndex, queue_size: int = 200, idle_timeout: float = 600):
+        self.geofence = geofence
+        self.queue_size = queue_size
+        self.idle_timeout = idle_timeout
+
+        self._subscribers: Dict[str, _Subscriber] = {}
+        self._lock = threading.Lock()
+
+        self.batches_routed = 0
+        self.items_routed = 0
+        self.deliveries = 0
+
+    def register(self, key: str, settings: dict) -> CompiledFilter:
+        profile = CompiledFilter.from_settings(settings, geofence=self.geofence)
+        with self._lock:
+            subscriber = self._subscribers.get(key)
+            if subscriber is None:
+                self._subscribers[key] = _Subscriber(profile, self.queue_size)
+            else:
+                subscriber.profile = profile
+                subscriber.last_seen = time.monotonic()
+        return profile
+
+    def unregister(self, key: str):
+        with self._lock:
+            self._subscribers.pop(key, None)
+
+    def has_profile(self, key: str) -> bool:
+        return key in self._subscribers
+
+    def get_profile(self, key: str) -> Optional[CompiledFilter]:
+        subscriber = self._subscribers.get(key)
+        return subscriber.profile if subscriber else None
+
+    def __bool__(self):
+        return bool(self._subscribers)
+
+    def route(self, audio_list: List) -> int:
+        if not audio_list:
+            return 0
+
+        with self._lock:
+            self._expire_idle()
+            groups = defaultdict(list)
+            for subscriber in self._subscribers.values():
+                groups[subscriber.profile.signature].append(subscriber)
+
+        batch = audio_list if isinstance(audio_list, AudioBatch) else AudioBatch(audio_list)
+        deliveries = 0
+        for subscribers in groups.values():
+            matched = batch.select(subscribers[0].profile.mask(batch))
+            for subscriber in subscribers:
+                for audio in matched:
+                    subscriber.put(audio)
+            deliveries += len(matched) * len(subscribers)
+
+        self.batches_routed += 1
+        self.items_routed += len(audio_list)
+        self.deliveries += deliveries
+        return deliveries
+
+    def _expire_idle(self):
+        if not self.idle_timeout:
+            return
+        cutoff = time.monotonic() - self.idle_timeout
+        for key in [k for k, s in self._subscribers.items() if s.last_seen < cutoff]:
+            del self._subscribers[key]
+            logger.info(f"Dropped idle filter profile {key}")
+
+    def get_next(self, key: str):
+        subscriber = self._subscribers.get(key)
+        if subscriber is None:
+            return None
+        subscriber.last_seen = time.monotonic()
+        try:
+            return subscriber.queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def queue_size_for(self, key: str) -> int:
+        subscriber = self._subscribers.get(key)
+        return subscriber.queue.qsize() if subscriber else 0
+
+    def clear(self):
+        with self._lock:
+            for subscriber in self._subscribers.values():
+                while not subscriber.queue.empty():
+                    try:
+                        subscriber.queue.get_nowait()
+                    except queue.Empty:
+                        break
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+        return {
+            "profiles": len(subscribers),
+            "distinct_filters": len({s.profile.signature for s in subscribers}),
+            "queued": sum(s.queue.qsize() for s in subscribers),
+            "dropped": sum(s.dropped for s in subscribers),
+            "batches_routed": self.batches_routed,
+            "items_routed": self.items_routed,
+            "deliveries": self.deliveries,
+        }
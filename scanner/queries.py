@@ -0,0 +1,142 @@
+"""
+Keyset-paginated transmission queries shared by the API, history and dashboard.
+
+Pages are ordered by ``-transmission_id`` and continue with
+``transmission_id < before``, so every page costs O(page) on the existing
+index no matter how deep it is. Rows are fetched as ``.values()`` dicts
+limited to the columns each caller needs.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .geofence import GeofenceIndex
+from .models import AudioTransmission
+from .scheduler import parse_stamp
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+API_FIELDS = ('transmission_id', 'station_name', 'frequency', 'pilot', 'airport',
+              'flight_rules', 'latitude', 'longitude', 'timestamp')
+DASHBOARD_FIELDS = ('transmission_id', 'station_name', 'frequency', 'pilot', 'airport',
+                    'flight_rules', 'timestamp')
+HISTORY_FIELDS = API_FIELDS + ('position', 'voice_name', 'from_userid')
+
+
+def page_size(value, default: int = DEFAULT_PAGE_SIZE) -> int:
+    """Clamp a requested page size to 1..MAX_PAGE_SIZE"""
+    if value in (None, ''):
+        return default
+    return max(1, min(int(value), MAX_PAGE_SIZE))
+
+
+def parse_time(value) -> Optional[datetime]:
+    """Epoch seconds/ms or ISO-8601 to an aware UTC datetime; ValueError if unparseable"""
+    if value in (None, ''):
+        return None
+    stamp = parse_stamp(value)
+    if stamp is None:
+        raise ValueError(f"Invalid time: {value}")
+    return datetime.fromtimestamp(stamp, tz=dt_timezone.utc)
+
+
+def _split(value) -> Tuple[str, ...]:
+    return tuple(v.strip() for v in (value or '').split(',') if v.strip())
+
+
+@dataclass(frozen=True)
+class TransmissionFilter:
+    airports: Tuple[str, ...] = ()
+    flight_rules: Tuple[str, ...] = ()
+    frequency: Optional[str] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    region: Optional[str] = None
+
+    @classmethod
+    def from_params(cls, params) -> 'TransmissionFilter':
+        """Build from query parameters; raises ValueError on bad input"""
+        return cls(
+            airports=tuple(a.upper() for a in _split(params.get('airport'))),
+            flight_rules=tuple(r.upper() for r in _split(params.get('flight_rules'))),
+            frequency=params.get('frequency') or None,
+            since=parse_time(params.get('since')),
+            until=parse_time(params.get('until')),
+            region=params.get('region') or None
+        )
+
+    def to_params(self) -> Dict[str, str]:
+        params = {}
+        if self.airports:
+            params['airport'] = ','.join(self.airports)
+        if self.flight_rules:
+            params['flight_rules'] = ','.join(self.flight_rules)
+        if self.frequency:
+            params['frequency'] = self.frequency
+        if self.since:
+            params['since'] = self.since.isoformat()
+        if self.until:
+            params['until'] = self.until.isoformat()
+        if self.region:
+            params['region'] = self.region
+        return params
+
+    def queryset(self, geofence: Optional[GeofenceIndex] = None):
+        transmissions = AudioTransmission.objects.order_by('-transmission_id')
+        if self.airports:
+            transmissions = transmissions.filter(airport__in=self.airports)
+        if self.flight_rules:
+            transmissions = transmissions.filter(flight_rules__in=self.flight_rules)
+        if self.frequency:
+            transmissions = transmissions.filter(frequency=self.frequency)
+        if self.since:
+            transmissions = transmissions.filter(timestamp__gte=self.since)
+        if self.until:
+            transmissions = transmissions.filter(timestamp__lt=self.until)
+        if self.region and geofence is not None:
+            # Coarse bbox in SQL; the exact polygon test runs per page
+            south, west, north, east = geofence.bbox(self.region)
+            transmissions = transmissions.filter(
+                latitude__gte=south, latitude__lte=north,
+                longitude__gte=west, longitude__lte=east
+            )
+        return transmissions
+
+
+def fetch_page(filters: TransmissionFilter,
+               before: Optional[int] = None,
+               limit: int = DEFAULT_PAGE_SIZE,
+               fields: Sequence[str] = API_FIELDS,
+               geofence: Optional[GeofenceIndex] = None) -> Tuple[List[dict], Optional[int]]:
+    """One page of rows newest-first and the ``before`` cursor for the next page"""
+    if filters.region and (geofence is None or filters.region not in geofence.names):
+        raise ValueError(f"Unknown region: {filters.region}")
+    transmissions = filters.queryset(geofence)
+    if filters.region:
+        fields = tuple(dict.fromkeys(tuple(fields) + ('latitude', 'longitude')))
+    transmissions = transmissions.values(*fields)
+
+    if not filters.region:
+        page_qs = transmissions if before is None else transmissions.filter(transmission_id__lt=before)
+        rows = list(page_qs[:limit + 1])
+        next_before = rows[limit - 1]['transmission_id'] if len(rows) > limit else None
+        return rows[:limit], next_before
+
+    region_ids = geofence.region_ids([filters.region])
+    rows = []
+    cursor = before
+    while len(rows) <= limit:
+        chunk_qs = transmissions if cursor is None else transmissions.filter(transmission_id__lt=cursor)
+        chunk = list(chunk_qs[:limit + 1])
+        if not chunk:
+            break
+        inside = geofence.membership(
+            [r['latitude'] for r in chunk], [r['longitude'] for r in chunk]
+        )[:, region_ids].any(axis=1)
+        rows.extend(r for r, hit in zip(chunk, inside) if hit)
+        cursor = chunk[-1]['transmission_id']
+
+    next_before = rows[limit - 1]['transmission_id'] if len(rows) > limit else None
+    return rows[:limit], next_before
@@ -0,0 +1,161 @@
+"""
+Time-based retention for AudioTransmission.
+
+Expired rows are removed oldest-first in bounded batches keyed on
+``transmission_id``, each batch in its own short transaction, so pruning
+never holds long locks. Rows can be archived to gzip NDJSON before they
+are deleted; a crash between the two only duplicates archive lines.
+"""
+
+import gzip
+import os
+import threading
+import time
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Optional
+
+from django.db import close_old_connections, transaction
+
+from .export import EXPORT_FIELDS, iter_ndjson
+from .models import AudioTransmission
+
+logger = logging.getLogger(__name__)
+
+
+def prune(days: float,
+          batch_size: int = 1000,
+          archive_dir: Optional[str] = None,
+          pause: float = 0.0,
+          max_batches: Optional[int] = None,
+          stop_event: Optional[threading.Event] = None) -> Dict:
+    """Delete (and optionally archive) transmissions older than ``days``"""
+    started = time.perf_counter()
+    cutoff = datetime.now(tz=dt_timezone.utc) - timedelta(days=days)
+    expired = AudioTransmission.objects.filter(timestamp__lt=cutoff).order_by('transmission_id')
+
+    archive = None
+    archive_path = None
+    pruned = 0
+    batches = 0
+    try:
+        while max_batches is None or batches < max_batches:
+            if stop_event is not None and stop_event.is_set():
+                break
+
+            with transaction.atomic():
+                if archive_dir:
+                    rows = list(expired.values(*EXPORT_FIELDS)[:batch_size])
+                    ids = [row['transmission_id'] for row in rows]
+                else:
+                    rows = None
+                    ids = list(expired.values_list('transmission_id', flat=True)[:batch_size])
+                if not ids:
+                    break
+
+                if rows:
+                    if archive is None:
+                        os.makedirs(archive_dir, exist_ok=True)
+                        archive_path = os.path.join(
+                            archive_dir, f"transmissions-{cutoff:%Y%m%dT%H%M%S}-{int(time.time())}.ndjson.gz")
+                        archive = gzip.open(archive_path, 'wt', encoding='utf-8')
+                    archive.writelines(iter_ndjson(rows))
+                    archive.flush()
+
+                deleted, _ = AudioTransmission.objects.filter(transmission_id__in=ids).delete()
+
+            pruned += deleted
+            batches += 1
+            if len(ids) < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+    finally:
+        if archive is not None:
+            archive.close()
+
+    elapsed = time.perf_counter() - started
+    if pruned:
+        logger.info(f"Pruned {pruned} transmissions older than {cutoff.isoformat()} in {elapsed:.2f}s")
+    return {
+        "rows_pruned": pruned,
+        "batches": batches,
+        "seconds": round(elapsed, 3),
+        "cutoff": cutoff.isoformat(),
+        "archive": archive_path,
+    }
+
+
+class RetentionScheduler:
+    """Runs ``prune`` periodically on a background thread"""
+
+    def __init__(self, days: float, interval: float = 3600, batch_size: int = 1000,
+                 archive_dir: Optional[str] = None, pause: float = 0.05):
+        self.days = days
+        self.interval = interval
+        self.batch_size = batch_size
+        self.archive_dir = archive_dir
+        self.pause = pause
+
+        self.is_running = False
+        self.thread = None
+        self._stop_event = threading.Event()
+
+        self.runs = 0
+        self.errors = 0
+        self.total_pruned = 0
+        self.total_seconds = 0.0
+        self.last_run = None
+
+    def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._worker, daemon=True, name='retention')
+        self.thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        if not self.is_running:
+            return
+        self.is_running = False
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=timeout)
+            self.thread = None
+
+    def run_once(self) -> Dict:
+        close_old_connections()
+        try:
+            result = prune(self.days, batch_size=self.batch_size, archive_dir=self.archive_dir,
+                           pause=self.pause, stop_event=self._stop_event)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Retention run failed: {e}")
+            return {"error": str(e)}
+        finally:
+            close_old_connections()
+
+        self.runs += 1
+        self.total_pruned += result['rows_pruned']
+        self.total_seconds += result['seconds']
+        self.last_run = result
+        return result
+
+    def _worker(self):
+        logger.info(f"Retention scheduler started ({self.days} day window)")
+        while self.is_running:
+            self.run_once()
+            self._stop_event.wait(self.interval)
+        logger.info("Retention scheduler stopped")
+
+    def get_status(self) -> Dict:
+        return {
+            "running": self.is_running,
+            "days": self.days,
+            "runs": self.runs,
+            "errors": self.errors,
+            "rows_pruned": self.total_pruned,
+            "seconds": round(self.total_seconds, 3),
+            "last_run": self.last_run,
+        }
@@ -0,0 +1,140 @@
+"""
+Per-minute and per-hour traffic counts by airport, frequency and flight rules.
+
+The ingest writer folds each flushed batch into ``traffic_rollups`` with an
+``INSERT ... ON CONFLICT DO UPDATE SET count = count + excluded.count``
+upsert (PostgreSQL and SQLite), so analytics never scan raw transmissions.
+``rebuild`` backfills the table from raw rows.
+"""
+
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Iterable, List, Optional
+
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import Trunc
+
+from .models import AudioTransmission, TrafficRollup
+
+BUCKETS = {'minute': 60, 'hour': 3600}
+DIMENSIONS = ('airport', 'frequency', 'flight_rules')
+MAX_BUCKETS = 10080
+
+
+def bucket_start(timestamp: datetime, bucket: str) -> datetime:
+    size = BUCKETS[bucket]
+    epoch = int(timestamp.timestamp()) // size * size
+    return datetime.fromtimestamp(epoch, tz=dt_timezone.utc)
+
+
+def rollup_counts(transmissions: Iterable) -> Counter:
+    """Counts keyed by (bucket, dimension, bucket_start, value)"""
+    counts = Counter()
+    for t in transmissions:
+        for bucket in BUCKETS:
+            start = bucket_start(t.timestamp, bucket)
+            for dimension in DIMENSIONS:
+                counts[(bucket, dimension, start, getattr(t, dimension))] += 1
+    return counts
+
+
+def apply_rollups(counts: Counter):
+    """Add counts to the rollup table; call inside the inserting transaction"""
+    if not counts:
+        return
+    table = connection.ops.quote_name(TrafficRollup._meta.db_table)
+    sql = (
+        f"INSERT INTO {table} (bucket, dimension, bucket_start, value, count) "
+        f"VALUES (%s, %s, %s, %s, %s) "
+        f"ON CONFLICT (bucket, dimension, bucket_start, value) "
+        f"DO UPDATE SET count = {table}.count + EXCLUDED.count"
+    )
+    params = [
+        (bucket, dimension, connection.ops.adapt_datetimefield_value(start), value, count)
+        for (bucket, dimension, start, value), count in counts.items()
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def rebuild(since: Optional[datetime] = None, batch_size: int = 1000) -> int:
+    """Recompute rollups from raw rows (all of them, or from ``since``); returns rows written"""
+    if since is not None:
+        since = bucket_start(since, 'hour')
+
+    written = 0
+    with transaction.atomic():
+        rollups = TrafficRollup.objects.all()
+        raw = AudioTransmission.objects.all()
+        if since is not None:
+            rollups = rollups.filter(bucket_start__gte=since)
+            raw = raw.filter(timestamp__gte=since)
+        rollups.delete()
+
+        for bucket in BUCKETS:
+            for dimension in DIMENSIONS:
+                grouped = (raw.annotate(start=Trunc('timestamp', bucket, tzinfo=dt_timezone.utc))
+                           .values('start', dimension)
+                           .annotate(n=Count('id'))
+                           .order_by())
+                batch = []
+                for row in grouped.iterator(chunk_size=batch_size):
+                    batch.append(TrafficRollup(bucket=bucket, dimension=dimension, bucket_start=row['start'],
+                                               value=row[dimension], count=row['n']))
+                    if len(batch) >= batch_size:
+                        TrafficRollup.objects.bulk_create(batch)
+                        written += len(batch)
+                        batch = []
+                if batch:
+                    TrafficRollup.objects.bulk_create(batch)
+                    written += len(batch)
+    return written
+
+
+def query(bucket: str, dimension: str,
+          since: Optional[datetime] = None,
+          until: Optional[datetime] = None,
+          top: Optional[int] = None) -> Dict:
+    """Time series and totals for one dimension, read only from the rollup table"""
+    if bucket not in BUCKETS:
+        raise ValueError(f"Unknown bucket: {bucket}")
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"Unknown dimension: {dimension}")
+
+    size = timedelta(seconds=BUCKETS[bucket])
+    until = until or datetime.now(tz=dt_timezone.utc)
+    since = since or until - size * (60 if bucket == 'minute' else 24)
+    if (until - since) / size > MAX_BUCKETS:
+        raise ValueError(f"Range too large: at most {MAX_BUCKETS} {bucket} buckets")
+
+    rows = (TrafficRollup.objects
+            .filter(bucket=bucket, dimension=dimension,
+                    bucket_start__gte=bucket_start(since, bucket), bucket_start__lt=until)
+            .order_by('bucket_start')
+            .values_list('bucket_start', 'value', 'count'))
+
+    series = defaultdict(dict)
+    totals = Counter()
+    for start, value, count in rows:
+        series[start][value] = count
+        totals[value] += count
+
+    keep = None
+    if top:
+        keep = {value for value, _ in totals.most_common(top)}
+        totals = Counter({value: n for value, n in totals.items() if value in keep})
+
+    points: List[Dict] = [{
+        'bucket_start': start.isoformat(),
+        'counts': counts if keep is None else {v: n for v, n in counts.items() if v in keep},
+    } for start, counts in series.items()]
+
+    return {
+        'bucket': bucket,
+        'dimension': dimension,
+        'since': since.isoformat(),
+        'until': until.isoformat(),
+        'series': points,
+        'totals': dict(totals.most_common()),
+    }
@@ -1,19 +1,31 @@
 import os
-import time
-import requests
 import threading
 import queue
 import json
 import logging
-from typing import Dict, List, Optional
-from dataclasses import dataclass, asdict
+from typing import ClassVar, Dict, List, Optional, Tuple
+from dataclasses import dataclass, fields, replace
+from functools import cached_property
 from urllib.parse import urljoin
 from django.conf import settings
+from .scheduler import PollScheduler, stamp_lag
+from .transport import get_transport
+from .async_ingest import AsyncIngestEngine
+from .broadcast import ChannelsBridge
+from .profiles import ProfileRouter
+from .filters import AudioBatch, CompiledFilter
+from .geofence import GeofenceIndex
+from .persistence import TransmissionWriter
+from .cursor import IngestCursor
+from .retention import RetentionScheduler
+from .clip_store import ClipStore
+from .audio_proxy import AudioProxy
+from .playback_policy import PlaybackPolicy
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(frozen=True)
 class AudioData:
     id: int
     url: str
@@ -30,9 +42,31 @@ class AudioData:
     lon: Optional[float] = None
     stamp: Optional[str] = None
     priority: int = 0
+    regions: Tuple[str, ...] = ()
+    # Set by the playback policy when the client should play faster to catch up
+    playback_rate: float = 1.0
 
-    def to_dict(self):
-        return asdict(self)
+    # Set when the audio proxy is enabled; clients then fetch clips from us, not upstream
+    proxy_prefix: ClassVar[Optional[str]] = None
+
+    @cached_property
+    def _wire_dict(self) -> dict:
+        # Fields are scalars or tuples of strings, so a flat copy is as safe as asdict()
+        wire = {f.name: getattr(self, f.name) for f in fields(self)}
+        if self.proxy_prefix and self.url:
+            wire['source_url'] = self.url
+            wire['url'] = f"{self.proxy_prefix}{self.id}/"
+        return wire
+
+    @cached_property
+    def _wire_json(self) -> str:
+        return json.dumps(self._wire_dict)
+
+    def to_dict(self) -> dict:
+        return dict(self._wire_dict)
+
+    def to_json(self) -> str:
+        return self._wire_json
 
 
 class ScannerService:
@@ -68,6 +102,83 @@ class ScannerService:
             'west': -114.0
         })
 
+        self.geofence = GeofenceIndex.from_config(config.get('geofences'), self.zab_bounds)
+
+        cursor_config = config.get('cursor', {})
+        self.cursor = IngestCursor(
+            cursor_config.get('path', 'data/ingest_cursor.json'),
+            dedupe_window=cursor_config.get('dedupe_window', 5000),
+            min_interval=cursor_config.get('min_interval', 1.0)
+        )
+        self.last_played_id = self.cursor.last_id
+
+        scheduler_config = config.get('scheduler', {})
+        self.batch_limit = scheduler_config.get('batch_limit', 50)
+        self.scheduler = PollScheduler(
+            base_interval=self.current_settings.get('fetch_interval', 20),
+            page_size=self.batch_limit,
+            max_interval=scheduler_config.get('max_interval', 120),
+            backoff_factor=scheduler_config.get('backoff_factor', 2.0),
+            jitter=scheduler_config.get('jitter', 0.1)
+        )
+        self.newest_stamp = None
+        self.lag_seconds = None
+        self._compile_filter()
+
+        self.transport = get_transport(config.get('transport'))
+        self.ingest_config = config.get('ingest', {})
+        store_config = config.get('clip_store', {})
+        self.clip_store = ClipStore(
+            store_config.get('path', 'data/clips'),
+            max_bytes=store_config.get('max_bytes', 512 * 1024 * 1024)
+        )
+        proxy_config = config.get('audio_proxy', {})
+        self.audio_proxy = AudioProxy(
+            self.clip_store,
+            self.transport,
+            timeout=proxy_config.get('timeout', 10),
+            source_window=proxy_config.get('source_window', 5000)
+        )
+        if proxy_config.get('enabled', True):
+            AudioData.proxy_prefix = proxy_config.get('url_prefix', '/api/audio/')
+        self.ingest_engine = None
+        self.playback_policy = PlaybackPolicy.from_config(config.get('playback_policy'))
+
+        broadcast_config = config.get('broadcast', {})
+        self.channels_bridge = ChannelsBridge(
+            flush_interval=broadcast_config.get('flush_interval', 0.05),
+            max_batch=broadcast_config.get('max_batch', 200)
+        )
+        self.add_listener(self.channels_bridge)
+
+        tenant_config = config.get('multi_tenant', {})
+        self.multi_tenant = tenant_config.get('enabled', False)
+        self.profile_router = ProfileRouter(
+            self.geofence,
+            queue_size=tenant_config.get('queue_size', 200),
+            idle_timeout=tenant_config.get('idle_timeout', 600)
+        )
+
+        persistence_config = config.get('persistence', {})
+        self.persist_transmissions = persistence_config.get('enabled', True)
+        self.writer = TransmissionWriter(
+            batch_size=persistence_config.get('batch_size', 200),
+            flush_interval=persistence_config.get('flush_interval', 2.0),
+            max_pending=persistence_config.get('max_pending', 10000),
+            rollups=persistence_config.get('rollups', True)
+        )
+
+        retention_config = config.get('retention', {})
+        self.retention = None
+        if retention_config.get('enabled', False):
+            self.retention = RetentionScheduler(
+                days=retention_config.get('days', 30),
+                interval=retention_config.get('interval', 3600),
+                batch_size=retention_config.get('batch_size', 1000),
+                archive_dir=retention_config.get('archive_dir'),
+                pause=retention_config.get('pause', 0.05)
+            )
+
     def _load_default_settings(self):
         with open('config.json', 'r') as f:
             config = json.load(f)
@@ -111,8 +222,8 @@ class ScannerService:
 
     def fetch_audio_batch(self) -> List[AudioData]:
         try:
-            url = urljoin(self.api_base_url, f"/scanner/last?last={self.last_played_id}&limit=50")
-            response = requests.get(url, timeout=10)
+            url = urljoin(self.api_base_url, f"/scanner/last?last={self.last_played_id}&limit={self.batch_limit}")
+            response = self.transport.get(url, timeout=10)
             response.raise_for_status()
 
             audio_list = []
@@ -121,8 +232,14 @@ class ScannerService:
                 if audio_obj:
                     audio_list.append(audio_obj)
 
+            # Overlapping fetches (initial poll, gap fill, restarts) never yield an id twice
+            audio_list = self.cursor.filter_new(audio_list)
             if audio_list:
-                self.last_played_id = max(a.id for a in audio_list)
+                audio_list = self._tag_regions(audio_list)
+                newest = max(audio_list, key=lambda a: a.id)
+                self.last_played_id = self.cursor.last_id
+                self.newest_stamp = newest.stamp
+                self.lag_seconds = stamp_lag(newest.stamp)
                 logger.info(f"Fetched {len(audio_list)} audio files")
 
             return audio_list
@@ -131,68 +248,105 @@ class ScannerService:
             logger.error(f"Failed to fetch audio: {e}")
             return []
 
-    def should_play_audio(self, audio: AudioData) -> bool:
-        vfr_only = self.current_settings.get('vfr_only', False)
-        geo_filter = self.current_settings.get('geo_filter', False)
-        airports = self.current_settings.get('airports', [])
-
-        if vfr_only and audio.flight_rules != 'VFR':
-            return False
+    def _tag_regions(self, audio_list: List[AudioData]) -> List[AudioData]:
+        regions = self.geofence.classify(
+            [a.lat if a.lat is not None else float('nan') for a in audio_list],
+            [a.lon if a.lon is not None else float('nan') for a in audio_list]
+        )
+        return [replace(audio, regions=names) for audio, names in zip(audio_list, regions)]
 
-        if not audio.url or not audio.url.startswith('http'):
-            return False
+    def _compile_filter(self):
+        self.audio_filter = CompiledFilter.from_settings(self.current_settings, geofence=self.geofence)
 
-        if geo_filter:
-            if audio.airport in airports:
-                return True
+    def should_play_audio(self, audio: AudioData) -> bool:
+        return self.audio_filter(audio)
 
-            if audio.lat and audio.lon:
-                in_bounds = (
-                    self.zab_bounds['south'] <= audio.lat <= self.zab_bounds['north'] and
-                    self.zab_bounds['west'] <= audio.lon <= self.zab_bounds['east']
-                )
-                if not in_bounds:
-                    return False
+    def _batch(self, audio_list: List[AudioData]) -> AudioBatch:
+        # fetch_audio_batch already tagged regions; filters and profiles reuse them
+        return AudioBatch(audio_list, tagged_by=self.geofence)
 
-        return True
+    def filter_batch(self, audio_list: List[AudioData]) -> List[AudioData]:
+        return self.audio_filter.filter(self._batch(audio_list)) if audio_list else []
 
     def fetcher_worker(self):
         logger.info("Fetcher started")
-        fetch_interval = self.current_settings.get('fetch_interval', 20)
+        self.scheduler.set_base_interval(self.current_settings.get('fetch_interval', 20))
 
         while self.is_running:
             try:
                 audio_list = self.fetch_audio_batch()
+                self._handle_batch(audio_list)
 
-                for audio in audio_list:
-                    if self.should_play_audio(audio):
-                        self.audio_queue.put(audio)
-                        self._notify_listeners('new_transmission', audio.to_dict())
+                for audio in self.filter_batch(audio_list):
+                    self._enqueue_audio(audio)
+                self.cursor.checkpoint()
 
-                time.sleep(fetch_interval)
+                delay = self.scheduler.record_batch(len(audio_list))
+                if delay == 0:
+                    logger.info(f"Full batch received, draining backlog (page {self.scheduler.backlog_pages})")
 
             except Exception as e:
                 logger.error(f"Fetcher error: {e}")
-                time.sleep(5)
+                delay = self.scheduler.record_error()
+
+            if self.is_running:
+                self.scheduler.wait(delay)
+
+    def _handle_batch(self, audio_list: List[AudioData]):
+        self.audio_proxy.remember(audio_list)
+        if self.persist_transmissions and audio_list:
+            self.writer.submit(audio_list)
+        self._route_profiles(audio_list)
+
+    def _route_profiles(self, audio_list: List[AudioData]):
+        if self.profile_router and audio_list:
+            self.profile_router.route(self._batch(audio_list))
 
-    def start(self, settings: dict = None):
+    def register_profile(self, key: str, settings: dict):
+        return self.profile_router.register(key, settings)
+
+    def has_profile(self, key: str) -> bool:
+        return self.profile_router.has_profile(key)
+
+    def _enqueue_audio(self, audio: AudioData):
+        # In multi-tenant mode listeners read their own profile queues; nothing drains the global one
+        if not self.multi_tenant:
+            self.audio_queue.put(audio)
+        self._notify_listeners('new_transmission', audio.to_dict())
+
+    def wake_fetcher(self):
+        self.scheduler.wake()
+        if self.ingest_engine:
+            self.ingest_engine.wake()
+
+    def start(self, settings: dict = None, loop=None):
         if self.is_running:
             return {"status": "already_running"}
 
         if settings:
-            self.current_settings.update(settings)
+            self._apply_settings(settings)
 
         logger.info("Starting Scanner Service...")
         self.is_running = True
-
-        self.fetch_thread = threading.Thread(target=self.fetcher_worker, daemon=True)
-        self.fetch_thread.start()
-
-        initial_audio = self.fetch_audio_batch()
-        for audio in initial_audio:
-            if self.should_play_audio(audio):
-                self.audio_queue.put(audio)
-                self._notify_listeners('new_transmission', audio.to_dict())
+        if loop is not None:
+            self.channels_bridge.attach_loop(loop)
+        self.scheduler.reset()
+        if self.persist_transmissions:
+            self.writer.start()
+        if self.retention:
+            self.retention.start()
+
+        if self.current_settings.get('ingest_mode', 'thread') == 'async':
+            self.scheduler.set_base_interval(self.current_settings.get('fetch_interval', 20))
+            self.ingest_engine = AsyncIngestEngine(
+                self,
+                download_concurrency=self.ingest_config.get('download_concurrency', 8),
+                queue_size=self.ingest_config.get('queue_size', 200)
+            )
+            self.ingest_engine.start(loop)
+        else:
+            self.fetch_thread = threading.Thread(target=self.fetcher_worker, daemon=True)
+            self.fetch_thread.start()
 
         logger.info("Scanner Service is running!")
         self._notify_listeners('scanner_started', {'settings': self.current_settings})
@@ -204,35 +358,90 @@ class ScannerService:
 
         logger.info("Stopping Scanner Service...")
         self.is_running = False
+        self.wake_fetcher()
+
+        if self.ingest_engine:
+            self.ingest_engine.stop()
+            self.ingest_engine = None
 
         if self.fetch_thread:
             self.fetch_thread.join(timeout=2)
+            self.fetch_thread = None
 
         while not self.audio_queue.empty():
             try:
                 self.audio_queue.get_nowait()
             except queue.Empty:
                 break
+        self.profile_router.clear()
+        self.writer.stop()
+        if self.retention:
+            self.retention.stop()
+        self.cursor.checkpoint(force=True)
 
         logger.info("Scanner Service stopped")
         self._notify_listeners('scanner_stopped', {})
         return {"status": "stopped"}
 
-    def get_status(self) -> Dict:
-        return {
+    def get_status(self, profile_key: Optional[str] = None) -> Dict:
+        status = {
             "running": self.is_running,
             "queue_size": self.audio_queue.qsize(),
             "last_played_id": self.last_played_id,
+            "cursor": self.cursor.get_status(),
+            "effective_interval": round(self.scheduler.effective_interval, 3),
+            "backlog_pages": self.scheduler.total_backlog_pages,
+            "lag_seconds": round(self.lag_seconds, 3) if self.lag_seconds is not None else None,
+            "newest_stamp": self.newest_stamp,
+            "scheduler": self.scheduler.get_status(),
+            "http": self.transport.get_stats(),
+            "ingest_mode": self.current_settings.get('ingest_mode', 'thread'),
+            "ingest": self.ingest_engine.get_status() if self.ingest_engine else None,
+            "clip_store": self.clip_store.get_status(),
+            "audio_proxy": self.audio_proxy.get_status(),
+            "broadcast": self.channels_bridge.get_status(),
+            "multi_tenant": self.multi_tenant,
+            "profiles": self.profile_router.get_status(),
+            "persistence": self.writer.get_status() if self.persist_transmissions else None,
+            "retention": self.retention.get_status() if self.retention else None,
+            "playback_policy": self.playback_policy.get_status(),
             "settings": self.current_settings
         }
 
-    def get_next_audio(self) -> Optional[AudioData]:
-        try:
-            return self.audio_queue.get_nowait()
-        except queue.Empty:
-            return None
+        profile = self.profile_router.get_profile(profile_key) if profile_key else None
+        if profile:
+            status["queue_size"] = self.profile_router.queue_size_for(profile_key)
+            status["settings"] = {**self.current_settings, **profile.to_dict()}
+        return status
+
+    def get_next_audio(self, profile_key: Optional[str] = None) -> Optional[AudioData]:
+        while True:
+            if profile_key:
+                audio = self.profile_router.get_next(profile_key)
+            else:
+                try:
+                    audio = self.audio_queue.get_nowait()
+                except queue.Empty:
+                    audio = None
+            if audio is None:
+                return None
+
+            # Stale items are skipped; lagging ones are handed out with a faster playback rate
+            rate = self.playback_policy.decide(audio.stamp)
+            if rate is None:
+                continue
+            return audio if rate == 1.0 else replace(audio, playback_rate=rate)
+
+    def _apply_settings(self, settings: dict):
+        # Compile before committing, so settings with an unknown region are rejected whole
+        audio_filter = CompiledFilter.from_settings({**self.current_settings, **settings}, geofence=self.geofence)
+        self.current_settings.update(settings)
+        self.audio_filter = audio_filter
 
     def update_settings(self, settings: dict):
-        self.current_settings.update(settings)
+        self._apply_settings(settings)
+        if 'fetch_interval' in settings:
+            self.scheduler.set_base_interval(self.current_settings['fetch_interval'])
+            self.wake_fetcher()
         self._notify_listeners('settings_updated', {'settings': self.current_settings})
         return {"status": "updated", "settings": self.current_settings}
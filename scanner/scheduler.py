@@ -0,0 +1,119 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+
+def parse_stamp(stamp) -> Optional[float]:
+    """Convert an upstream ``stamp`` (epoch s/ms or ISO-8601) to epoch seconds."""
+    if stamp is None or stamp == '':
+        return None
+    try:
+        value = float(stamp)
+        # Millisecond epochs are ~1000x larger than any plausible second epoch
+        return value / 1000.0 if value > 1e11 else value
+    except (TypeError, ValueError):
+        pass
+    try:
+        text = str(stamp).strip().replace('Z', '+00:00')
+        parsed = datetime.fromisoformat(text)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    except ValueError:
+        return None
+
+
+class PollScheduler:
+    """Decides how long the fetcher waits between upstream polls.
+
+    Full pages are drained back-to-back, partial pages wait the base
+    interval and empty pages back off exponentially up to ``max_interval``.
+    """
+
+    def __init__(self,
+                 base_interval: float = 20,
+                 page_size: int = 50,
+                 max_interval: float = 120,
+                 backoff_factor: float = 2.0,
+                 jitter: float = 0.1):
+        self.base_interval = float(base_interval)
+        self.page_size = page_size
+        self.max_interval = float(max_interval)
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
+
+        self.effective_interval = self.base_interval
+        self.empty_streak = 0
+        self.backlog_pages = 0
+        self.total_backlog_pages = 0
+
+        self._wake_event = threading.Event()
+
+    def record_batch(self, count: int) -> float:
+        """Record the size of the last batch and return the next delay."""
+        if count >= self.page_size:
+            self.empty_streak = 0
+            self.backlog_pages += 1
+            self.total_backlog_pages += 1
+            self.effective_interval = 0.0
+            return 0.0
+
+        self.backlog_pages = 0
+
+        if count > 0:
+            self.empty_streak = 0
+            delay = self.base_interval
+        else:
+            self.empty_streak += 1
+            delay = self.base_interval * (self.backoff_factor ** (self.empty_streak - 1))
+
+        delay = min(delay, self.max_interval)
+        if self.jitter:
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        self.effective_interval = max(0.0, delay)
+        return self.effective_interval
+
+    def record_error(self) -> float:
+        """Back off after a failed poll as if the page had been empty."""
+        return self.record_batch(0)
+
+    def wait(self, delay: float) -> bool:
+        """Sleep up to ``delay`` seconds; returns True if woken early."""
+        if delay <= 0:
+            return False
+        # Clear first: a wake() that lands after the wait returns stays set for the next call
+        self._wake_event.clear()
+        return self._wake_event.wait(delay)
+
+    def wake(self):
+        self._wake_event.set()
+
+    def set_base_interval(self, interval: float):
+        self.base_interval = float(interval)
+        self.empty_streak = 0
+
+    def reset(self):
+        self.effective_interval = self.base_interval
+        self.empty_streak = 0
+        self.backlog_pages = 0
+        self._wake_event.clear()
+
+    def get_status(self) -> Dict:
+        return {
+            "effective_interval": round(self.effective_interval, 3),
+            "base_interval": self.base_interval,
+            "max_interval": self.max_interval,
+            "empty_streak": self.empty_streak,
+            "backlog_pages": self.backlog_pages,
+            "total_backlog_pages": self.total_backlog_pages,
+        }
+
+
+def stamp_lag(stamp, now: Optional[float] = None) -> Optional[float]:
+    """Seconds between an upstream ``stamp`` and ``now``."""
+    ts = parse_stamp(stamp)
+    if ts is None:
+        return None
+    return max(0.0, (now if now is not None else time.time()) - ts)
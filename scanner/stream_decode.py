@@ -0,0 +1,143 @@
+"""
+Progressive decode of a clip while it is still downloading.
+
+A background thread copies the HTTP body into a ChunkSource as chunks
+arrive; miniaudio's streaming decoder reads from it and blocks only when
+it has caught up with the download. Playback can therefore start after
+the first few frames instead of after the whole body. The complete body
+is kept so the caller can cache it once the download finishes.
+"""
+
+import threading
+import time
+import logging
+from typing import Callable, Iterable, Iterator, Optional
+
+import numpy as np
+
+try:
+    import miniaudio
+    MINIAUDIO_AVAILABLE = True
+except ImportError:
+    MINIAUDIO_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def sniff_format(head: bytes):
+    if head.startswith(b'RIFF'):
+        return miniaudio.FileFormat.WAV
+    if head.startswith(b'fLaC'):
+        return miniaudio.FileFormat.FLAC
+    if head.startswith(b'OggS'):
+        return miniaudio.FileFormat.VORBIS
+    return miniaudio.FileFormat.MP3
+
+
+class ChunkSource(miniaudio.StreamableSource if MINIAUDIO_AVAILABLE else object):
+    """Growing byte buffer read by the decoder while a download appends to it"""
+
+    def __init__(self, timeout: float = 10):
+        self.timeout = timeout
+        self._data = bytearray()
+        self._position = 0
+        self._done = False
+        self.error: Optional[BaseException] = None
+        self._cond = threading.Condition()
+
+    def feed(self, chunk: bytes):
+        with self._cond:
+            self._data += chunk
+            self._cond.notify_all()
+
+    def finish(self, error: Optional[BaseException] = None):
+        with self._cond:
+            self._done = True
+            self.error = error
+            self._cond.notify_all()
+
+    def wait_for(self, size: int) -> bytes:
+        """First ``size`` bytes (or fewer if the body is shorter)"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: len(self._data) >= size or self._done, self.timeout):
+                raise TimeoutError("Timed out waiting for audio data")
+            return bytes(self._data[:size])
+
+    def read(self, num_bytes: int) -> bytes:
+        with self._cond:
+            if not self._cond.wait_for(lambda: len(self._data) > self._position or self._done, self.timeout):
+                # An empty read ends the stream; the caller sees a short clip
+                logger.warning("Audio download stalled; ending stream early")
+                return b''
+            chunk = bytes(self._data[self._position:self._position + num_bytes])
+            self._position += len(chunk)
+            return chunk
+
+    @property
+    def complete(self) -> bool:
+        return self._done and self.error is None
+
+    @property
+    def content(self) -> bytes:
+        return bytes(self._data)
+
+
+class ProgressiveDecoder:
+    """Decodes float32 blocks from a chunk iterator as the chunks arrive"""
+
+    def __init__(self, chunks: Iterable[bytes], sample_rate: int = 44100, channels: int = 1,
+                 block_frames: int = 2048, timeout: float = 10,
+                 on_complete: Optional[Callable[[bytes], None]] = None):
+        if not MINIAUDIO_AVAILABLE:
+            raise RuntimeError("Progressive decode requires miniaudio")
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.block_frames = block_frames
+        self.on_complete = on_complete
+        self.source = ChunkSource(timeout=timeout)
+        self.frames = 0
+        self.download_seconds: Optional[float] = None
+
+        self._chunks = chunks
+        self.thread = threading.Thread(target=self._download, daemon=True, name='audio-stream')
+        self.thread.start()
+
+    def _download(self):
+        started = time.perf_counter()
+        try:
+            for chunk in self._chunks:
+                if chunk:
+                    self.source.feed(chunk)
+        except Exception as e:
+            self.source.finish(e)
+            logger.warning(f"Audio stream download failed: {e}")
+            return
+        self.source.finish()
+        self.download_seconds = time.perf_counter() - started
+        if self.on_complete:
+            try:
+                self.on_complete(self.source.content)
+            except Exception as e:
+                logger.warning(f"Failed to keep streamed audio: {e}")
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sample_rate
+
+    def blocks(self) -> Iterator[np.ndarray]:
+        """Decoded (frames, channels) float32 blocks, ending when the body is exhausted"""
+        source_format = sniff_format(self.source.wait_for(4))
+        stream = miniaudio.stream_any(
+            self.source,
+            source_format=source_format,
+            output_format=miniaudio.SampleFormat.FLOAT32,
+            nchannels=self.channels,
+            sample_rate=self.sample_rate,
+            frames_to_read=self.block_frames
+        )
+        for samples in stream:
+            block = np.frombuffer(samples, dtype=np.float32).reshape(-1, self.channels)
+            if not len(block):
+                break
+            self.frames += len(block)
+            yield block
@@ -0,0 +1,106 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional
+
+CONTROL_GROUP = 'scanner_updates'
+ALL_TRANSMISSIONS_GROUP = 'scanner_tx_all'
+
+# Dimensions a client can be grouped by, most selective first
+GROUP_DIMENSIONS = ('airport', 'frequency', 'flight_rules')
+
+_GROUP_UNSAFE = re.compile(r'[^A-Za-z0-9_.-]')
+
+
+def interest_group(dimension: str, value) -> str:
+    """Channels group name for one value of a filter dimension"""
+    safe = _GROUP_UNSAFE.sub('-', str(value).strip().upper())
+    return f"scanner_tx_{dimension}_{safe}"[:99]
+
+
+def transmission_groups(item: dict) -> List[str]:
+    """Every interest group a transmission is published to"""
+    return [ALL_TRANSMISSIONS_GROUP] + [
+        interest_group(dimension, item.get(dimension)) for dimension in GROUP_DIMENSIONS
+        if item.get(dimension) not in (None, '', '-')
+    ]
+
+
+def _normalize(values) -> FrozenSet[str]:
+    if not values:
+        return frozenset()
+    if isinstance(values, str):
+        values = [values]
+    return frozenset(str(v).strip().upper() for v in values if str(v).strip())
+
+
+@dataclass(frozen=True)
+class Subscription:
+    """What one WebSocket client wants to receive"""
+    airports: FrozenSet[str] = field(default_factory=frozenset)
+    flight_rules: FrozenSet[str] = field(default_factory=frozenset)
+    frequencies: FrozenSet[str] = field(default_factory=frozenset)
+    region: Optional[Dict[str, float]] = None
+
+    @classmethod
+    def from_filters(cls, filters: Optional[dict]) -> 'Subscription':
+        filters = filters or {}
+        region = filters.get('region')
+        if region:
+            region = {key: float(region[key]) for key in ('north', 'south', 'east', 'west')}
+        return cls(
+            airports=_normalize(filters.get('airports')),
+            flight_rules=_normalize(filters.get('flight_rules')),
+            frequencies=_normalize(filters.get('frequencies')),
+            region=region or None
+        )
+
+    @property
+    def group_dimension(self) -> Optional[str]:
+        if self.airports:
+            return 'airport'
+        if self.frequencies:
+            return 'frequency'
+        if self.flight_rules:
+            return 'flight_rules'
+        return None
+
+    def groups(self) -> FrozenSet[str]:
+        dimension = self.group_dimension
+        if dimension is None:
+            return frozenset([ALL_TRANSMISSIONS_GROUP])
+        values = {
+            'airport': self.airports,
+            'frequency': self.frequencies,
+            'flight_rules': self.flight_rules,
+        }[dimension]
+        return frozenset(interest_group(dimension, value) for value in values)
+
+    @property
+    def exact(self) -> bool:
+        """True when group membership alone already implies a match"""
+        active = sum(1 for values in (self.airports, self.frequencies, self.flight_rules) if values)
+        return active <= 1 and self.region is None
+
+    def matches(self, item: dict) -> bool:
+        if self.airports and str(item.get('airport', '')).upper() not in self.airports:
+            return False
+        if self.frequencies and str(item.get('frequency', '')).upper() not in self.frequencies:
+            return False
+        if self.flight_rules and str(item.get('flight_rules', '')).upper() not in self.flight_rules:
+            return False
+        if self.region:
+            lat, lon = item.get('lat'), item.get('lon')
+            if lat is None or lon is None:
+                return False
+            if not (self.region['south'] <= lat <= self.region['north'] and
+                    self.region['west'] <= lon <= self.region['east']):
+                return False
+        return True
+
+    def to_dict(self) -> dict:
+        return {
+            'airports': sorted(self.airports),
+            'flight_rules': sorted(self.flight_rules),
+            'frequencies': sorted(self.frequencies),
+            'region': self.region,
+        }
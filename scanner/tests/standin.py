@@ -0,0 +1,210 @@
+"""
+Local stand-in for the upstream scanner API, used by the live ingest tests.
+
+One standard-library HTTP server answers ``/scanner/last?last=<id>&limit=<n>``
+from the transmissions published so far and upgrades WebSocket requests on
+the same port. Subscribers receive ``{"type": "audio"}`` pushes, and tests
+can drop connections, withhold or reorder pushes, and make REST fail.
+"""
+
+import base64
+import hashlib
+import json
+import socket
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List
+from urllib.parse import parse_qs, urlparse
+
+_WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+OP_TEXT, OP_CLOSE, OP_PING, OP_PONG = 0x1, 0x8, 0x9, 0xA
+
+
+def wait_until(predicate: Callable[[], bool], timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+class _Client:
+    """Server side of one WebSocket connection"""
+
+    def __init__(self, connection: socket.socket):
+        self.connection = connection
+        self._lock = threading.Lock()
+
+    def send(self, opcode: int, payload: bytes = b''):
+        length = len(payload)
+        if length < 126:
+            header = struct.pack('!BB', 0x80 | opcode, length)
+        elif length < 1 << 16:
+            header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+        with self._lock:
+            self.connection.sendall(header + payload)
+
+    def close(self):
+        try:
+            self.send(OP_CLOSE, struct.pack('!H', 1001))
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        upstream = self.server.upstream
+        url = urlparse(self.path)
+        if self.headers.get('Upgrade', '').lower() == 'websocket':
+            self._websocket(upstream)
+        elif url.path == '/scanner/last':
+            query = parse_qs(url.query)
+            upstream.rest_requests.append(int(query.get('last', ['0'])[0]))
+            if upstream.fail_rest:
+                self._reply(503, b'{"error": "unavailable"}')
+                return
+            body = json.dumps(upstream.page(int(query.get('last', ['0'])[0]),
+                                            int(query.get('limit', ['50'])[0]))).encode()
+            self._reply(200, body)
+        else:
+            self._reply(404, b'{}')
+
+    def _reply(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _websocket(self, upstream: 'StandInUpstream'):
+        key = self.headers['Sec-WebSocket-Key']
+        accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest()).decode()
+        self.send_response(101, 'Switching Protocols')
+        self.send_header('Upgrade', 'websocket')
+        self.send_header('Connection', 'Upgrade')
+        self.send_header('Sec-WebSocket-Accept', accept)
+        self.end_headers()
+        self.wfile.flush()
+
+        client = _Client(self.connection)
+        try:
+            while True:
+                frame = self._read_frame()
+                if frame is None:
+                    break
+                opcode, payload = frame
+                if opcode == OP_TEXT:
+                    # Register once the subscribe message is in, so pushes follow it
+                    upstream.subscriptions.append(json.loads(payload))
+                    with upstream.lock:
+                        if client not in upstream.clients:
+                            upstream.clients.append(client)
+                elif opcode == OP_PING:
+                    client.send(OP_PONG, payload)
+                elif opcode == OP_CLOSE:
+                    client.send(OP_CLOSE, payload[:2])
+                    break
+        except OSError:
+            pass
+        finally:
+            with upstream.lock:
+                if client in upstream.clients:
+                    upstream.clients.remove(client)
+            self.close_connection = True
+
+    def _read_frame(self):
+        header = self.rfile.read(2)
+        if len(header) < 2:
+            return None
+        opcode = header[0] & 0x0F
+        length = header[1] & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', self.rfile.read(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', self.rfile.read(8))[0]
+        mask = self.rfile.read(4) if header[1] & 0x80 else b'\0\0\0\0'
+        payload = self.rfile.read(length)
+        return opcode, bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInUpstream:
+    """In-process upstream serving REST pages and WebSocket pushes on one port"""
+
+    def __init__(self):
+        self.items: Dict[int, dict] = {}
+        self.clients: List[_Client] = []
+        self.subscriptions: List[dict] = []
+        self.rest_requests: List[int] = []
+        self.fail_rest = False
+        self.lock = threading.Lock()
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.upstream = self
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True, name='standin-upstream')
+        self.thread.start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def item(self, audio_id: int) -> dict:
+        return {
+            'id': audio_id,
+            'url': f"{self.url}/audio/{audio_id}.mp3",
+            'frequency': '118.300',
+            'station_name': 'ABQ_TWR',
+            'airport': 'KABQ',
+            'flight_rules': 'VFR',
+            'stamp': time.time(),
+        }
+
+    def page(self, last: int, limit: int) -> List[dict]:
+        with self.lock:
+            return [self.items[i] for i in sorted(self.items) if i > last][:limit]
+
+    def publish(self, *audio_ids: int, push: bool = True):
+        """Record transmissions for REST and, unless ``push`` is False, push them to subscribers"""
+        with self.lock:
+            for audio_id in audio_ids:
+                self.items[audio_id] = self.item(audio_id)
+        if push:
+            self.push(*audio_ids)
+
+    def push(self, *audio_ids: int):
+        with self.lock:
+            clients = list(self.clients)
+            items = [self.items[audio_id] for audio_id in audio_ids]
+        for item in items:
+            message = json.dumps({'type': 'audio', 'data': item}).encode()
+            for client in clients:
+                try:
+                    client.send(OP_TEXT, message)
+                except OSError:
+                    pass
+
+    def drop_clients(self):
+        """Close every WebSocket connection, as an upstream restart would"""
+        with self.lock:
+            clients, self.clients = self.clients, []
+        for client in clients:
+            client.close()
+
+    def wait_for_subscribers(self, count: int = 1, timeout: float = 5.0) -> bool:
+        return wait_until(lambda: len(self.clients) >= count, timeout)
+
+    def close(self):
+        self.drop_clients()
+        self.server.shutdown()
+        self.server.server_close()
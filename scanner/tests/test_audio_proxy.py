@@ -0,0 +1,132 @@
+import shutil
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import TestCase
+
+from scanner import views
+from scanner.audio_proxy import AudioProxy
+from scanner.clip_store import ClipStore
+from scanner.tests.standin import wait_until
+
+CLIP = b'RIFF' + bytes(range(16))
+
+
+class _Response:
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+class _Transport:
+    """Upstream stand-in that counts fetches; ``delay`` holds each one open"""
+
+    def __init__(self, delay=0.0, max_duration=1.0):
+        self.delay = delay
+        self._max_duration = max_duration
+        self.calls = []
+
+    def get(self, url, timeout=None):
+        self.calls.append(url)
+        time.sleep(self.delay)
+        return _Response(CLIP)
+
+    def max_duration(self, timeout=None):
+        return self._max_duration
+
+
+class AudioProxyViewTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        self.store = ClipStore(root)
+        self.transport = _Transport()
+        self.proxy = AudioProxy(self.store, self.transport, timeout=0.05)
+        self.proxy.remember([SimpleNamespace(id=7, url='https://example.com/7.wav')])
+        for name, value in (('clip_store', self.store), ('audio_proxy', self.proxy)):
+            patcher = mock.patch.object(views.scanner_service, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get(self, **headers):
+        response = self.client.get('/api/audio/7/', headers=headers)
+        self.addCleanup(response.close)
+        return response
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_full_response(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), CLIP)
+        self.assertEqual(response['Content-Type'], 'audio/wav')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['ETag'], f'"{self.store.entry(7).digest}"')
+
+    def test_range_requests(self):
+        cases = [
+            ('bytes=2-5', 206, f'bytes 2-5/{len(CLIP)}', CLIP[2:6]),
+            ('bytes=-4', 206, f'bytes {len(CLIP) - 4}-{len(CLIP) - 1}/{len(CLIP)}', CLIP[-4:]),
+            ('bytes=10-', 206, f'bytes 10-{len(CLIP) - 1}/{len(CLIP)}', CLIP[10:]),
+        ]
+        for header, status, content_range, body in cases:
+            with self.subTest(header):
+                response = self.get(Range=header)
+                self.assertEqual(response.status_code, status)
+                self.assertEqual(response['Content-Range'], content_range)
+                self.assertEqual(response['Content-Length'], str(len(body)))
+                self.assertEqual(self.body(response), body)
+
+    def test_unsatisfiable_range(self):
+        for header in (f'bytes={len(CLIP)}-', 'bytes=-0'):
+            with self.subTest(header):
+                response = self.get(Range=header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response['Content-Range'], f'bytes */{len(CLIP)}')
+
+    def test_etag_revalidation(self):
+        etag = self.get()['ETag']
+        response = self.get(If_None_Match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_upstream_is_fetched_once(self):
+        self.transport.delay = 0.1
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.proxy.get(7))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for _ in range(3):
+            self.assertEqual(self.body(self.get()), CLIP)
+        self.assertEqual(len(self.transport.calls), 1)
+        self.assertEqual(len({entry.digest for entry in results}), 1)
+        self.assertEqual(self.proxy.get_status()['coalesced'], 4)
+
+    def test_followers_wait_out_the_leaders_retries(self):
+        # The leader takes several proxy timeouts, as a retried download would
+        self.transport.delay = 0.3
+        leader = threading.Thread(target=self.proxy.get, args=(7,))
+        leader.start()
+        self.addCleanup(leader.join)
+        self.assertTrue(wait_until(lambda: self.transport.calls, timeout=1))
+
+        self.assertEqual(self.proxy.get(7).digest, self.store.entry(7).digest)
+        self.assertEqual(len(self.transport.calls), 1)
+
+    def test_unknown_transmission(self):
+        self.assertEqual(self.client.get('/api/audio/8/').status_code, 404)
+        self.assertEqual(self.transport.calls, [])
+
+    def test_upstream_failure_is_a_bad_gateway(self):
+        with mock.patch.object(self.transport, 'get', side_effect=OSError('unavailable')):
+            response = self.client.get('/api/audio/7/')
+        self.assertEqual(response.status_code, 502)
@@ -0,0 +1,59 @@
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from scanner import broadcast
+from scanner.broadcast import ChannelsBridge, encode_batch, encode_event
+from scanner.subscriptions import ALL_TRANSMISSIONS_GROUP, CONTROL_GROUP, interest_group
+
+
+def _item(audio_id, airport='KPHX', frequency='120.900', flight_rules='VFR'):
+    return {'id': audio_id, 'airport': airport, 'frequency': frequency, 'flight_rules': flight_rules,
+            'url': f'https://example.com/{audio_id}.mp3', 'regions': ['PHX'], 'lat': None}
+
+
+class GroupMessageTests(SimpleTestCase):
+    def setUp(self):
+        self.bridge = ChannelsBridge(max_batch=2)
+
+    def test_batch_text_matches_encode_event(self):
+        items = [_item(1), _item(2, airport='KTUS')]
+        self.assertEqual(encode_batch('transmission_batch', [json.dumps(item) for item in items]),
+                         encode_event('transmission_batch', items))
+        self.assertEqual(encode_batch('transmission_batch', []), encode_event('transmission_batch', []))
+
+    def test_each_transmission_is_encoded_once(self):
+        items = [_item(1), _item(2, airport='KTUS'), _item(3)]
+        events = [('new_transmission', item) for item in items]
+
+        with mock.patch.object(broadcast.json, 'dumps', wraps=json.dumps) as dumps:
+            messages = self.bridge._group_messages(events)
+        encoded = [call.args[0] for call in dumps.call_args_list if isinstance(call.args[0], dict)]
+        self.assertEqual(encoded, items)
+
+        for group, message in messages:
+            with self.subTest(group=group):
+                self.assertEqual(message['text'], encode_event('transmission_batch', message['data']))
+
+    def test_groups_are_chunked(self):
+        items = [_item(1), _item(2, airport='KTUS'), _item(3)]
+        messages = self.bridge._group_messages([('new_transmission', item) for item in items])
+
+        batches = {}
+        for group, message in messages:
+            batches.setdefault(group, []).append([item['id'] for item in message['data']])
+        self.assertEqual(batches[ALL_TRANSMISSIONS_GROUP], [[1, 2], [3]])
+        self.assertEqual(batches[interest_group('airport', 'KPHX')], [[1, 3]])
+        self.assertEqual(batches[interest_group('airport', 'KTUS')], [[2]])
+
+    def test_control_events_keep_their_order(self):
+        events = [('new_transmission', _item(1)), ('scanner_stopped', {}), ('new_transmission', _item(2))]
+        messages = self.bridge._group_messages(events)
+
+        sequence = [(group, message['type']) for group, message in messages if group in
+                    (ALL_TRANSMISSIONS_GROUP, CONTROL_GROUP)]
+        self.assertEqual(sequence, [(ALL_TRANSMISSIONS_GROUP, 'transmission_batch'),
+                                    (CONTROL_GROUP, 'scanner_stopped'),
+                                    (ALL_TRANSMISSIONS_GROUP, 'transmission_batch')])
+        self.assertEqual(json.loads(messages[-1][1]['text'])['type'], 'new_transmissions')
@@ -0,0 +1,92 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.test import SimpleTestCase
+
+from scanner.clip_cache import ClipCache
+
+
+class ClipCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.addCleanup(self.executor.shutdown, wait=True)
+
+    def test_concurrent_requests_share_one_load(self):
+        cache = ClipCache(max_bytes=100)
+        release = threading.Event()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            release.wait(5)
+            return b'x' * 10
+
+        futures = [cache.get_or_load(1, loader, self.executor) for _ in range(5)]
+        self.assertTrue(cache.loading(1))
+        release.set()
+
+        self.assertEqual({f.result(timeout=5) for f in futures}, {b'x' * 10})
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.get_status()['coalesced'], 4)
+        self.assertFalse(cache.loading(1))
+        self.assertEqual(cache.get_or_load(1, loader, self.executor).result(timeout=5), b'x' * 10)
+        self.assertEqual(len(calls), 1)
+
+    def test_failed_load_is_retried(self):
+        cache = ClipCache(max_bytes=100)
+
+        def fail():
+            raise OSError('unavailable')
+
+        with self.assertRaises(OSError):
+            cache.get_or_load(1, fail, self.executor).result(timeout=5)
+        self.assertFalse(cache.loading(1))
+        self.assertEqual(cache.get_or_load(1, lambda: b'ok', self.executor).result(timeout=5), b'ok')
+
+    def test_lru_eviction_holds_the_byte_cap(self):
+        cache = ClipCache(max_bytes=30)
+        for key in range(3):
+            cache.put(key, b'x' * 10)
+        cache.get(0)
+        cache.put(3, b'x' * 10)
+
+        self.assertNotIn(1, cache)
+        self.assertEqual([key in cache for key in (0, 2, 3)], [True, True, True])
+        self.assertEqual(cache.bytes, 30)
+        self.assertEqual(cache.get_status()['evictions'], 1)
+
+        cache.put(4, b'x' * 25)
+        self.assertEqual(cache.bytes, 25)
+        self.assertEqual(cache.peak_bytes, 30)
+
+        cache.put(5, b'x' * 31)
+        self.assertNotIn(5, cache)
+        self.assertEqual(cache.get_status()['rejected'], 1)
+
+    def test_load_finishing_after_eviction_stays_under_the_cap(self):
+        cache = ClipCache(max_bytes=30)
+        release = threading.Event()
+
+        def slow():
+            release.wait(5)
+            return b'y' * 20
+
+        future = cache.get_or_load('slow', slow, self.executor)
+        # The cache fills up, and is cleared, while the load is in flight
+        for key in range(3):
+            cache.put(key, b'x' * 10)
+        cache.clear()
+        for key in range(3):
+            cache.put(key, b'x' * 10)
+        release.set()
+
+        self.assertEqual(future.result(timeout=5), b'y' * 20)
+        self.assertEqual(cache.bytes, 30)
+        self.assertEqual([key in cache for key in (0, 1, 2, 'slow')], [False, False, True, True])
+
+    def test_sizeof_counts_decoded_payloads(self):
+        cache = ClipCache(max_bytes=100, sizeof=lambda value: value['nbytes'])
+        cache.put(1, {'nbytes': 60})
+        cache.put(2, {'nbytes': 60})
+        self.assertEqual((len(cache), cache.bytes), (1, 60))
+        self.assertIn(2, cache)
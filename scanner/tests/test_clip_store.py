@@ -0,0 +1,42 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from scanner.clip_store import ClipStore
+
+
+class SharedClipStoreTests(SimpleTestCase):
+    """scanner_live.py and the Django views open the same directory"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.live = ClipStore(self.root, max_bytes=1024)
+        self.web = ClipStore(self.root, max_bytes=1024)
+
+    def test_serves_clips_written_by_the_other_process(self):
+        self.live.put(7, b'clip-7')
+
+        self.assertIn(7, self.web)
+        self.assertEqual(bytes(self.web.read(7)), b'clip-7')
+        entry, f = self.web.open(7)
+        with f:
+            self.assertEqual(f.read(), b'clip-7')
+        self.assertEqual(entry.digest, self.live.entry(7).digest)
+        self.assertEqual(self.web.get_status()['bytes'], 6)
+
+    def test_missing_clip_is_a_miss(self):
+        self.assertNotIn(8, self.web)
+        self.assertIsNone(self.web.read(8))
+        self.assertEqual(self.web.get_status()['misses'], 1)
+
+    def test_forgets_clips_evicted_by_the_other_process(self):
+        self.live.put(7, b'clip-7')
+        self.assertIsNotNone(self.web.read(7))
+
+        os.unlink(self.live.entry(7).path)
+
+        self.assertIsNone(self.web.read(7))
+        self.assertEqual(self.web.get_status()['clips'], 0)
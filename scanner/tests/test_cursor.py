@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from scanner.cursor import IngestCursor
+
+
+class IngestCursorTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.path = os.path.join(self.directory, 'cursor.json')
+
+    def test_watermark_waits_for_the_gap(self):
+        cursor = IngestCursor(self.path)
+        for audio_id in (1, 2, 4, 5):
+            self.assertTrue(cursor.mark(audio_id))
+        self.assertEqual((cursor.last_id, cursor.watermark), (5, 2))
+
+        self.assertTrue(cursor.mark(3))
+        self.assertEqual(cursor.watermark, 5)
+        self.assertFalse(cursor.mark(4))
+
+    def test_complete_page_moves_the_watermark_past_holes(self):
+        cursor = IngestCursor(self.path)
+        cursor.mark(1)
+        cursor.mark(9)
+        cursor.complete_through(5)
+        self.assertEqual(cursor.watermark, 5)
+        cursor.complete_through(8)
+        self.assertEqual(cursor.watermark, 9)
+
+    def test_persistent_hole_is_given_up_before_leaving_the_window(self):
+        cursor = IngestCursor(self.path, dedupe_window=10)
+        cursor.mark(1)
+        for audio_id in range(3, 9):
+            cursor.mark(audio_id)
+        self.assertEqual(cursor.watermark, 8)
+
+    def test_watermark_survives_a_restart(self):
+        cursor = IngestCursor(self.path, min_interval=0)
+        for audio_id in (1, 2, 4):
+            cursor.mark(audio_id)
+        cursor.checkpoint(force=True)
+
+        restored = IngestCursor(self.path)
+        self.assertEqual((restored.last_id, restored.watermark), (4, 2))
+        restored.mark(3)
+        self.assertEqual(restored.watermark, 4)
+
+    def test_checkpoint_without_watermark_resumes_from_last_id(self):
+        with open(self.path, 'w') as f:
+            f.write('{"last_id": 7, "recent_ids": [6, 7]}')
+        self.assertEqual(IngestCursor(self.path).watermark, 7)
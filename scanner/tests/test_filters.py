@@ -0,0 +1,115 @@
+import random
+from dataclasses import replace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from scanner.filters import AudioBatch, CompiledFilter
+from scanner.geofence import GeofenceIndex
+from scanner.scanner_service import AudioData
+
+GEOFENCE = GeofenceIndex({
+    'ZAB': [[37.0, -114.0], [37.0, -103.0], [31.0, -103.0], [31.0, -114.0]],
+    'PHX': [[34.2, -112.8], [34.0, -111.2], [32.9, -111.5], [33.1, -112.9]],
+    'ABQ': [[36.0, -107.5], [35.8, -105.8], [34.5, -106.2], [34.9, -107.4]],
+})
+
+SETTINGS = [
+    {},
+    {'vfr_only': True},
+    {'flight_rules': ['IFR', 'SVFR']},
+    {'geo_filter': True},
+    {'geo_filter': True, 'airports': ['KPHX', 'KDEN']},
+    {'geo_filter': True, 'regions': ['PHX']},
+    {'geo_filter': True, 'regions': ['PHX', 'ABQ'], 'airports': ['KLAX'], 'vfr_only': True},
+]
+
+
+def _random_audio(rng, audio_id):
+    if rng.random() < 0.15:
+        lat = lon = None
+    else:
+        lat = rng.uniform(29.0, 39.0)
+        lon = rng.uniform(-116.0, -101.0)
+    return AudioData(
+        id=audio_id,
+        url=rng.choice(['https://example.com/a.mp3', 'http://example.com/b.mp3', '', 'ftp://example.com/c']),
+        who_from='pilot', frequency='120.900', station_name='TWR', pilot='N1',
+        airport=rng.choice(['KPHX', 'KDEN', 'KLAX', 'KABQ', '']),
+        position='TWR', voice_name='', from_userid='1',
+        flight_rules=rng.choice(['VFR', 'IFR', 'SVFR', '']),
+        lat=lat, lon=lon
+    )
+
+
+class CompiledFilterParityTests(SimpleTestCase):
+    """The per-item __call__ and the batch mask must agree on every transmission"""
+
+    def assertParity(self, audio_list):
+        batch = AudioBatch(audio_list)
+        for settings in SETTINGS:
+            compiled = CompiledFilter.from_settings(settings, geofence=GEOFENCE)
+            scalar = [compiled(audio) for audio in audio_list]
+            vector = compiled.mask(batch).tolist()
+            with self.subTest(settings=settings):
+                self.assertEqual(scalar, vector)
+                self.assertEqual(compiled.filter(audio_list), [a for a, keep in zip(audio_list, scalar) if keep])
+
+    def test_random_transmissions(self):
+        rng = random.Random(1234)
+        self.assertParity([_random_audio(rng, i) for i in range(2000)])
+
+    def test_polygon_vertices_and_edges(self):
+        rng = random.Random(99)
+        points = []
+        for polygon in (GEOFENCE._polygon_lists[i] for i in range(len(GEOFENCE.names))):
+            for (lat1, lon1), (lat2, lon2) in zip(polygon, polygon[1:] + polygon[:1]):
+                points.append((lat1, lon1))
+                points.append(((lat1 + lat2) / 2, (lon1 + lon2) / 2))
+        self.assertParity([
+            replace(_random_audio(rng, i), lat=lat, lon=lon, url='https://example.com/a.mp3')
+            for i, (lat, lon) in enumerate(points)
+        ])
+
+    def test_region_tags_are_reused(self):
+        rng = random.Random(7)
+        audio_list = [_random_audio(rng, i) for i in range(500)]
+        lat = [a.lat if a.lat is not None else float('nan') for a in audio_list]
+        lon = [a.lon if a.lon is not None else float('nan') for a in audio_list]
+        tagged = [replace(a, regions=names) for a, names in zip(audio_list, GEOFENCE.classify(lat, lon))]
+
+        with mock.patch.object(GEOFENCE, 'membership', side_effect=AssertionError('classified again')):
+            batch = AudioBatch(tagged, tagged_by=GEOFENCE)
+            for settings in SETTINGS:
+                compiled = CompiledFilter.from_settings(settings, geofence=GEOFENCE)
+                with self.subTest(settings=settings):
+                    self.assertEqual(compiled.filter(batch), [a for a in tagged if compiled(a)])
+
+    def test_empty_batch(self):
+        compiled = CompiledFilter.from_settings({'geo_filter': True}, geofence=GEOFENCE)
+        self.assertEqual(compiled.filter([]), [])
+        self.assertEqual(compiled.mask(AudioBatch([])).tolist(), [])
+
+
+class GeofenceRegionTests(SimpleTestCase):
+    def test_unknown_region_names_are_rejected(self):
+        with self.assertRaisesMessage(ValueError, 'Unknown region: BOGUS'):
+            GEOFENCE.region_ids(['PHX', 'BOGUS'])
+        with self.assertRaisesMessage(ValueError, 'Unknown region: BOGUS'):
+            CompiledFilter.from_settings({'geo_filter': True, 'regions': ['BOGUS']}, geofence=GEOFENCE)
+
+    def test_boundary_points_are_inside(self):
+        box = GeofenceIndex.from_bounds({'north': 37.0, 'south': 31.0, 'east': -103.0, 'west': -114.0})
+        edges = [(37.0, -110.0), (34.0, -103.0), (31.0, -110.0), (34.0, -114.0), (37.0, -103.0), (31.0, -114.0)]
+        outside = [(37.0001, -110.0), (34.0, -102.9999), (30.9999, -110.0), (34.0, -114.0001)]
+        for lat, lon in edges:
+            self.assertTrue(box.contains(lat, lon), (lat, lon))
+        for lat, lon in outside:
+            self.assertFalse(box.contains(lat, lon), (lat, lon))
+        points = edges + outside
+        self.assertEqual(box.membership([p[0] for p in points], [p[1] for p in points])[:, 0].tolist(),
+                         [True] * len(edges) + [False] * len(outside))
+
+    def test_no_names_selects_every_region(self):
+        self.assertEqual(GEOFENCE.region_ids().tolist(), [0, 1, 2])
+        self.assertEqual(GEOFENCE.region_ids(['ABQ', 'PHX']).tolist(), [2, 1])
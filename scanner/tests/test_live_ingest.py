@@ -0,0 +1,129 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from scanner.tests.standin import StandInUpstream, wait_until
+
+try:
+    import scanner_live
+except ImportError:
+    scanner_live = None
+
+
+@unittest.skipUnless(scanner_live is not None and scanner_live.WEBSOCKET_AVAILABLE,
+                     "scanner_live needs websocket-client")
+class PushIngestTests(SimpleTestCase):
+    """RealtimeScanner against the stand-in upstream: push, reconnect and gap-fill"""
+
+    def setUp(self):
+        self.upstream = StandInUpstream()
+        self.addCleanup(self.upstream.close)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+
+        config = {
+            'cursor': {'live_path': os.path.join(directory, 'cursor.json'), 'min_interval': 0},
+            'websocket': {'reconnect_min': 0.05, 'reconnect_max': 0.1},
+            'playback': {'backend': 'null'},
+        }
+        for patcher in (mock.patch.dict(scanner_live.CONFIG, config),
+                        mock.patch.object(scanner_live, 'WS_URL', self.upstream.url)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.scanner = scanner_live.RealtimeScanner(api_base_url=self.upstream.url, fetch_interval=0.1,
+                                                    prefetch_audio=False)
+        # Leave queued transmissions in place for the assertions
+        self.scanner.audio_player_worker = lambda: None
+
+    def start(self):
+        self.scanner.start()
+        self.addCleanup(self.scanner.stop)
+        self.assertTrue(wait_until(lambda: self.scanner.ws_connected), "never connected")
+
+    def queued(self):
+        """(id, priority) of every queued transmission in arrival order"""
+        with self.scanner.audio_queue.mutex:
+            entries = sorted(self.scanner.audio_queue.queue, key=lambda entry: entry[2])
+        return [(entry[3].id, entry[0]) for entry in entries]
+
+    def queued_ids(self):
+        return sorted(audio_id for audio_id, _ in self.queued())
+
+    def wait_for_ids(self, expected):
+        wait_until(lambda: self.queued_ids() == expected)
+        self.assertEqual(self.queued_ids(), expected)
+
+    def reconnect(self):
+        subscriptions = len(self.upstream.subscriptions)
+        self.upstream.drop_clients()
+        self.assertTrue(wait_until(lambda: len(self.upstream.subscriptions) > subscriptions), "never resubscribed")
+
+    def test_push_delivery(self):
+        # Keep the REST poller from picking up 4 and 5 before their pushes arrive
+        self.scanner.fetch_interval = 30
+        self.upstream.publish(1, 2, 3, push=False)
+        self.start()
+        self.wait_for_ids([1, 2, 3])
+
+        self.upstream.publish(4, 5)
+        self.wait_for_ids([1, 2, 3, 4, 5])
+        self.assertEqual(dict(self.queued())[4], 0)
+        self.assertEqual(dict(self.queued())[5], 0)
+        # The counter is bumped just after the push is queued
+        self.assertTrue(wait_until(lambda: self.scanner.ws_stats['pushed'] == 2), self.scanner.ws_stats)
+        self.assertEqual(self.upstream.subscriptions[0]['type'], 'subscribe')
+
+    def test_reconnect_fills_the_gap(self):
+        self.start()
+        self.upstream.publish(1, 2)
+        self.wait_for_ids([1, 2])
+
+        self.upstream.drop_clients()
+        self.upstream.publish(3, 4, 5, push=False)
+        self.assertTrue(wait_until(lambda: len(self.upstream.subscriptions) >= 2), "never resubscribed")
+        self.assertTrue(wait_until(lambda: self.scanner.ws_connected))
+        self.upstream.publish(6)
+
+        self.wait_for_ids([1, 2, 3, 4, 5, 6])
+        self.assertGreaterEqual(self.upstream.subscriptions[-1]['last_id'], 2)
+        self.assertGreaterEqual(self.scanner.ws_stats['reconnects'], 1)
+
+    def test_failed_gap_fill_keeps_polling_until_it_succeeds(self):
+        self.start()
+        self.upstream.publish(1)
+        self.wait_for_ids([1])
+
+        self.upstream.fail_rest = True
+        self.upstream.publish(2, 3, push=False)
+        self.reconnect()
+        self.assertTrue(wait_until(lambda: self.scanner.ws_open))
+        self.assertFalse(wait_until(lambda: self.scanner.ws_connected, timeout=0.5))
+        self.assertEqual(self.scanner.get_status()['websocket'], 'disconnected')
+        self.assertEqual(self.queued_ids(), [1])
+
+        self.upstream.fail_rest = False
+        self.assertTrue(wait_until(lambda: self.scanner.ws_connected), "gap-fill was never retried")
+        self.wait_for_ids([1, 2, 3])
+
+    def test_out_of_order_pushes_resume_from_the_contiguous_watermark(self):
+        # Keep the REST poller out of the way so the reconnect itself fills the gap
+        self.scanner.fetch_interval = 30
+        self.start()
+        self.upstream.publish(1)
+        self.wait_for_ids([1])
+
+        # 3 is pushed before 2, then the connection drops
+        self.upstream.publish(2, push=False)
+        self.upstream.publish(3)
+        self.wait_for_ids([1, 3])
+        self.assertEqual(self.scanner.last_played_id, 1)
+
+        self.reconnect()
+        self.assertEqual(self.upstream.subscriptions[-1]['last_id'], 1)
+        self.wait_for_ids([1, 2, 3])
+        self.assertTrue(wait_until(lambda: self.scanner.last_played_id == 3))
@@ -0,0 +1,109 @@
+import math
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from scanner.mixer import Mixer
+
+try:
+    import scanner_live
+except ImportError:
+    scanner_live = None
+
+RATE = 8000
+
+
+def _clip(frames, value=1.0, channels=1):
+    return np.full((frames, channels), value, dtype=np.float32)
+
+
+class MixerTests(SimpleTestCase):
+    def mixer(self, channels=1, **kwargs):
+        kwargs.setdefault('clip_threshold', 2.0)
+        return Mixer(SimpleNamespace(channels=channels, sample_rate=RATE), **kwargs)
+
+    def test_frequency_gain_and_volume(self):
+        mixer = self.mixer(gains={'118.300': 0.5}, volume=0.8)
+        mixer.add(_clip(100), RATE, '118.300')
+        mixer.add(_clip(100, channels=2), RATE, '120.900')
+
+        block, _ = mixer.render(100)
+        np.testing.assert_allclose(block[:, 0], 0.4 + 0.8)
+
+    def test_constant_power_pan(self):
+        mixer = self.mixer(channels=2, pans={'left': -1.0, 'centre': 0.0})
+        mixer.add(_clip(10), RATE, 'left')
+        block, _ = mixer.render(10)
+        np.testing.assert_allclose(block[0], [1.0, 0.0], atol=1e-6)
+
+        mixer.add(_clip(10), RATE, 'centre')
+        block, _ = mixer.render(10)
+        np.testing.assert_allclose(block[0], [math.sqrt(0.5)] * 2, atol=1e-6)
+
+    def test_other_frequencies_overlap(self):
+        mixer = self.mixer()
+        mixer.add(_clip(100, 0.25), RATE, '118.300')
+        mixer.add(_clip(50, 0.5), RATE, '120.900')
+
+        block, _ = mixer.render(100)
+        np.testing.assert_allclose(block[:50, 0], 0.75)
+        np.testing.assert_allclose(block[50:, 0], 0.25)
+        status = mixer.get_status()
+        self.assertEqual((status['overlapped'], status['peak_depth'], status['voices']), (1, 2, 0))
+
+    def test_same_frequency_plays_back_to_back(self):
+        mixer = self.mixer()
+        first, second = [], []
+        mixer.add(_clip(100, 0.25), RATE, '118.300', lambda: first.append(1))
+        mixer.add(_clip(100, 0.5), RATE, '118.300', lambda: second.append(1))
+        self.assertEqual(mixer.scheduled_seconds(), 200 / RATE)
+        self.assertEqual(mixer.get_status()['overlapped'], 0)
+
+        block, callbacks = mixer.render(150)
+        np.testing.assert_allclose(block[:100, 0], 0.25)
+        np.testing.assert_allclose(block[100:, 0], 0.5)
+        self.assertEqual(len(callbacks), 2)
+
+        block, callbacks = mixer.render(150)
+        np.testing.assert_allclose(block[:50, 0], 0.5)
+        np.testing.assert_allclose(block[50:, 0], 0.0)
+        self.assertEqual(callbacks, [])
+        self.assertEqual(mixer.render(150), (None, []))
+
+    def test_loud_overlap_is_soft_clipped(self):
+        mixer = self.mixer(clip_threshold=0.8)
+        mixer.add(_clip(10, 0.7), RATE, '118.300')
+        mixer.add(_clip(10, 0.7), RATE, '120.900')
+
+        block, _ = mixer.render(10)
+        self.assertTrue((block > 0.8).all() and (block < 1.0).all())
+        self.assertEqual(mixer.get_status()['clipped_blocks'], 1)
+
+    def test_clips_are_resampled_to_the_output_rate(self):
+        mixer = self.mixer()
+        mixer.add(_clip(RATE // 2), RATE // 2, '118.300')
+        self.assertAlmostEqual(mixer.scheduled_seconds(), 1.0, places=2)
+
+
+@unittest.skipUnless(scanner_live is not None, "scanner_live needs its dependencies")
+class QueueLagTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(scanner_live.CONFIG, {'playback': {'backend': 'null'}})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.scanner = scanner_live.RealtimeScanner(api_base_url='http://127.0.0.1:9', prefetch_audio=False,
+                                                    use_websocket=False)
+
+    def test_lag_is_the_oldest_queued_wait(self):
+        self.assertEqual(self.scanner.get_status()['queue_lag_seconds'], 0.0)
+
+        now = time.time()
+        self.scanner.audio_queue.put((1, now - 2, 1, SimpleNamespace(id=1)))
+        self.scanner.audio_queue.put((0, now - 5, 2, SimpleNamespace(id=2)))
+        self.scanner.audio_queue.put((0, now, 3, SimpleNamespace(id=3)))
+
+        self.assertAlmostEqual(self.scanner.get_status()['queue_lag_seconds'], 5.0, delta=0.5)
@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+import time
+import wave
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from scanner.output import FrameRing, OutputStream, match_channels, resample
+
+
+class FrameRingTests(SimpleTestCase):
+    def test_write_and_read_wrap_around(self):
+        ring = FrameRing(8, 1)
+        self.assertEqual(ring.write(np.arange(6, dtype=np.float32)[:, None]), 6)
+
+        out = np.empty((4, 1), dtype=np.float32)
+        self.assertEqual(ring.read_into(out), 4)
+        self.assertEqual(out[:, 0].tolist(), [0, 1, 2, 3])
+
+        # Starts at slot 6 and wraps to the front of the buffer
+        self.assertEqual(ring.write(np.arange(6, 12, dtype=np.float32)[:, None]), 6)
+        self.assertEqual(ring.available(), 8)
+        self.assertEqual(ring.free(), 0)
+
+        out = np.empty((8, 1), dtype=np.float32)
+        self.assertEqual(ring.read_into(out), 8)
+        self.assertEqual(out[:, 0].tolist(), list(range(4, 12)))
+        self.assertEqual((ring.written, ring.read), (12, 12))
+
+    def test_full_ring_accepts_only_free_frames(self):
+        ring = FrameRing(4, 2)
+        self.assertEqual(ring.write(np.ones((6, 2), dtype=np.float32)), 4)
+        self.assertEqual(ring.write(np.ones((1, 2), dtype=np.float32)), 0)
+
+    def test_short_read_pads_with_silence(self):
+        ring = FrameRing(4, 1)
+        ring.write(np.full((2, 1), 0.5, dtype=np.float32))
+        out = np.full((4, 1), 9.0, dtype=np.float32)
+        self.assertEqual(ring.read_into(out), 2)
+        self.assertEqual(out[:, 0].tolist(), [0.5, 0.5, 0.0, 0.0])
+
+
+class ConversionTests(SimpleTestCase):
+    def test_resample_scales_frame_count(self):
+        samples = np.linspace(0, 1, 1000, dtype=np.float32)[:, None]
+        self.assertEqual(len(resample(samples, 22050, 44100)), 2000)
+        self.assertEqual(len(resample(samples, 44100, 8000)), 181)
+        self.assertIs(resample(samples, 8000, 8000), samples)
+
+    def test_match_channels(self):
+        mono = np.ones((3, 1), dtype=np.float32)
+        self.assertEqual(match_channels(mono, 2).shape, (3, 2))
+        self.assertEqual(match_channels(np.ones((3, 2), dtype=np.float32), 1).shape, (3, 1))
+
+
+class OutputStreamTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.path = os.path.join(self.directory, 'out.wav')
+
+    def test_play_into_file_resamples_and_writes_every_frame(self):
+        output = OutputStream(backend='file', sample_rate=8000, channels=2, ring_seconds=0.5,
+                              buffer_ms=10, path=self.path)
+        started = []
+        # 0.25 s of mono at 4 kHz becomes 2000 stereo frames at 8 kHz
+        self.assertTrue(output.play(np.full((1000, 1), 0.5, dtype=np.float32), 4000,
+                                    on_first_sample=lambda: started.append(True)))
+        self.assertTrue(output.drain(timeout=5))
+        status = output.get_status()
+        output.close()
+
+        self.assertEqual(started, [True])
+        self.assertEqual(status['clips'], 1)
+        self.assertEqual(status['resampled'], 1)
+        self.assertEqual(status['frames_played'], 2000)
+        self.assertEqual(status['underruns'], 0)
+
+        with wave.open(self.path, 'rb') as wav:
+            self.assertEqual(wav.getnchannels(), 2)
+            self.assertEqual(wav.getframerate(), 8000)
+            frames = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16).reshape(-1, 2)
+        # The sink writes silence around the clip; the clip itself is every non-silent frame
+        self.assertEqual(int(np.count_nonzero(frames.any(axis=1))), 2000)
+
+    def test_starved_stream_counts_underruns(self):
+        output = OutputStream(backend='null', sample_rate=8000, channels=1, ring_seconds=0.5, buffer_ms=10)
+        self.addCleanup(output.close)
+
+        def blocks():
+            yield np.full((400, 1), 0.5, dtype=np.float32)
+            # The device runs dry while the next block is still being produced
+            time.sleep(0.3)
+            yield np.full((400, 1), 0.5, dtype=np.float32)
+
+        self.assertTrue(output.play_stream(blocks(), 8000, prebuffer=0))
+        output.drain(timeout=5)
+        self.assertGreater(output.underruns, 0)
+
+    def test_idle_silence_is_not_an_underrun(self):
+        output = OutputStream(backend='null', sample_rate=8000, channels=1, ring_seconds=0.5, buffer_ms=10)
+        self.addCleanup(output.close)
+        output.play(np.full((400, 1), 0.5, dtype=np.float32), 8000)
+        output.drain(timeout=5)
+        time.sleep(0.1)
+        self.assertEqual(output.underruns, 0)
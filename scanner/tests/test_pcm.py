@@ -0,0 +1,46 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from scanner.pcm import time_compress
+
+RATE = 16000
+
+
+def _tone(frequency, seconds=2.0, channels=1):
+    t = np.arange(int(RATE * seconds)) / RATE
+    samples = (0.5 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+    return np.repeat(samples[:, None], channels, axis=1)
+
+
+def _dominant_frequency(samples):
+    mono = samples[:, 0]
+    spectrum = np.abs(np.fft.rfft(mono * np.hanning(len(mono))))
+    return np.fft.rfftfreq(len(mono), 1 / RATE)[np.argmax(spectrum)]
+
+
+class TimeCompressTests(SimpleTestCase):
+    def test_length_shrinks_by_the_rate(self):
+        tone = _tone(440)
+        for rate in (1.25, 1.5, 2.0):
+            with self.subTest(rate=rate):
+                out = time_compress(tone, rate, sample_rate=RATE)
+                self.assertEqual(out.dtype, np.float32)
+                # Within one 40 ms frame of the ideal length
+                self.assertAlmostEqual(len(out), len(tone) / rate, delta=RATE * 0.04)
+
+    def test_pitch_is_preserved(self):
+        for frequency in (300, 440, 1000):
+            with self.subTest(frequency=frequency):
+                out = time_compress(_tone(frequency), 1.5, sample_rate=RATE)
+                self.assertAlmostEqual(_dominant_frequency(out), frequency, delta=5)
+
+    def test_channels_are_kept(self):
+        out = time_compress(_tone(440, channels=2), 2.0, sample_rate=RATE)
+        self.assertEqual(out.shape[1], 2)
+        np.testing.assert_allclose(out[:, 0], out[:, 1])
+
+    def test_unchanged_at_normal_rate_or_for_short_clips(self):
+        tone = _tone(440)
+        self.assertIs(time_compress(tone, 1.0, sample_rate=RATE), tone)
+        short = _tone(440, seconds=0.01)
+        self.assertIs(time_compress(short, 2.0, sample_rate=RATE), short)
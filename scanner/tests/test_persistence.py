@@ -0,0 +1,97 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from scanner.models import AudioTransmission, TrafficRollup
+from scanner.persistence import TransmissionWriter, to_model
+from scanner.scanner_service import AudioData
+from scanner.tests.standin import wait_until
+
+
+def _audio(audio_id, airport='KPHX', stamp=1704067200):
+    return AudioData(
+        id=audio_id, url=f'https://example.com/{audio_id}.mp3', who_from='pilot', frequency='120.900',
+        station_name='PHX_TWR', pilot='N123', airport=airport, position='TWR', voice_name='',
+        from_userid='1', flight_rules='VFR', lat=33.0, lon=-111.0, stamp=stamp
+    )
+
+
+class WriterBatchingTests(SimpleTestCase):
+    """The worker thread with the database write stubbed out"""
+
+    def setUp(self):
+        self.writer = TransmissionWriter(batch_size=2, flush_interval=0.05)
+        self.batches = []
+        self.results = []
+
+        def flush(buffer):
+            self.batches.append([audio.id for audio in buffer])
+            return self.results.pop(0) if self.results else True
+
+        patcher = mock.patch.object(self.writer, '_flush', side_effect=flush)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.writer.stop)
+
+    def test_flushes_in_batches(self):
+        self.writer.submit([_audio(i) for i in range(1, 6)])
+        self.writer.start()
+        self.assertTrue(wait_until(lambda: sum(map(len, self.batches)) == 5))
+        self.assertEqual(self.batches, [[1, 2], [3, 4], [5]])
+
+    def test_failed_flush_keeps_the_batch(self):
+        self.results = [False]
+        self.writer.submit([_audio(1), _audio(2)])
+        self.writer.start()
+        self.assertTrue(wait_until(lambda: len(self.batches) == 2))
+        self.assertEqual(self.batches, [[1, 2], [1, 2]])
+
+    def test_stop_drains_pending_rows(self):
+        self.writer.start()
+        self.writer.submit([_audio(i) for i in range(1, 4)])
+        self.writer.stop()
+        self.assertEqual(sorted(sum(self.batches, [])), [1, 2, 3])
+
+    def test_backlog_is_capped(self):
+        self.writer.max_pending = 3
+        self.writer.submit([_audio(i) for i in range(1, 6)])
+        self.assertEqual(self.writer.get_status()['pending'], 3)
+        self.assertEqual(self.writer.get_status()['dropped'], 2)
+
+
+class WriterFlushTests(TestCase):
+    def setUp(self):
+        self.writer = TransmissionWriter(batch_size=2)
+
+    def _rollup(self, value):
+        return TrafficRollup.objects.get(bucket='hour', dimension='airport', value=value).count
+
+    def test_inserts_rows_and_rollups(self):
+        self.assertTrue(self.writer._flush([_audio(1), _audio(2), _audio(3, airport='KTUS')]))
+
+        self.assertEqual(sorted(AudioTransmission.objects.values_list('transmission_id', flat=True)), [1, 2, 3])
+        self.assertEqual((self._rollup('KPHX'), self._rollup('KTUS')), (2, 1))
+        self.assertEqual(self.writer.get_status()['rows_inserted'], 3)
+
+    def test_duplicate_ids_are_ignored(self):
+        self.writer._flush([_audio(1), _audio(2)])
+        self.assertTrue(self.writer._flush([_audio(2), _audio(3), _audio(3)]))
+
+        self.assertEqual(AudioTransmission.objects.count(), 3)
+        self.assertEqual(self._rollup('KPHX'), 3)
+        status = self.writer.get_status()
+        self.assertEqual((status['rows_flushed'], status['rows_inserted']), (5, 3))
+
+    def test_conflicting_insert_is_ignored(self):
+        # A row written by another process between the existence check and the insert
+        existing = AudioTransmission.objects.filter
+        conflict = to_model(_audio(1))
+        conflict.save()
+        with mock.patch.object(AudioTransmission.objects, 'filter',
+                               side_effect=lambda **kw: existing(**kw).none()):
+            self.assertTrue(self.writer._flush([_audio(1), _audio(2)]))
+        self.assertEqual(AudioTransmission.objects.count(), 2)
+
+    def test_oversized_values_are_truncated(self):
+        audio = _audio(1, airport='K' * 500)
+        self.assertEqual(len(to_model(audio).airport), AudioTransmission._meta.get_field('airport').max_length)
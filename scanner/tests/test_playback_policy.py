@@ -0,0 +1,38 @@
+from django.test import SimpleTestCase
+
+from scanner.playback_policy import PlaybackPolicy
+
+NOW = 1_700_000_000.0
+
+
+class PlaybackPolicyTests(SimpleTestCase):
+    def setUp(self):
+        self.policy = PlaybackPolicy(compress_after=60, drop_after=180, min_rate=1.25, max_rate=2.0)
+
+    def test_rate_follows_the_thresholds(self):
+        cases = [(None, 1.0), (0, 1.0), (59.9, 1.0), (60, 1.25), (120, 1.625), (179.9, 1.999),
+                 (180, None), (600, None)]
+        for lag, rate in cases:
+            with self.subTest(lag=lag):
+                self.assertEqual(self.policy.rate_for(lag), rate)
+
+    def test_decide_counts_outcomes(self):
+        rates = [self.policy.decide(NOW - lag, now=NOW) for lag in (10, 90, 200)]
+        rates.append(self.policy.decide(None, now=NOW))
+
+        self.assertEqual(rates, [1.0, 1.438, None, 1.0])
+        status = self.policy.get_status()
+        self.assertEqual((status['played'], status['compressed'], status['dropped'], status['unstamped']),
+                         (3, 1, 1, 1))
+        self.assertEqual((status['lag_seconds'], status['max_lag_seconds']), (200, 200))
+
+    def test_future_stamps_count_as_live(self):
+        self.assertEqual(self.policy.decide(NOW + 30, now=NOW), 1.0)
+
+    def test_disabled_policy_plays_everything(self):
+        policy = PlaybackPolicy.from_config({'enabled': False})
+        self.assertEqual(policy.decide(NOW - 3600, now=NOW), 1.0)
+
+    def test_thresholds_must_be_ordered(self):
+        with self.assertRaises(ValueError):
+            PlaybackPolicy(compress_after=60, drop_after=60)
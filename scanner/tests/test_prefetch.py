@@ -0,0 +1,97 @@
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+from scanner.prefetch import PrefetchWindow
+
+
+class PrefetchWindowTests(SimpleTestCase):
+    def setUp(self):
+        self.queue = [SimpleNamespace(id=i) for i in range(1, 11)]
+        self.cached = set()
+        self.futures = {}
+
+    def window(self, **kwargs):
+        def prefetch(item):
+            self.futures[item.id] = Future()
+            return self.futures[item.id]
+
+        return PrefetchWindow(upcoming=lambda n: self.queue[:n], prefetch=prefetch,
+                              is_cached=lambda audio_id: audio_id in self.cached, **kwargs)
+
+    def finish(self, audio_id, size=10):
+        self.cached.add(audio_id)
+        self.futures[audio_id].set_result(b'x' * size)
+
+    def test_fetches_only_k_ahead(self):
+        window = self.window(min_ahead=2, min_concurrency=4)
+        window.pump()
+        self.assertEqual(sorted(self.futures), [1, 2])
+
+        # Finished downloads do not pull the window further ahead
+        self.finish(1)
+        self.finish(2)
+        self.assertEqual(sorted(self.futures), [1, 2])
+
+        self.queue.pop(0)
+        window.pump()
+        self.assertEqual(sorted(self.futures), [1, 2, 3])
+
+    def test_concurrency_limits_downloads_in_flight(self):
+        window = self.window(min_ahead=4, min_concurrency=2)
+        window.pump()
+        self.assertEqual(sorted(self.futures), [1, 2])
+
+        self.finish(1)
+        self.assertEqual(sorted(self.futures), [1, 2, 3])
+        self.assertEqual(window.get_status()['inflight'], 2)
+
+    def test_skips_cached_clips(self):
+        self.cached.update({1, 2})
+        window = self.window(min_ahead=3, min_concurrency=3)
+        window.pump()
+        self.assertEqual(sorted(self.futures), [3])
+
+    def test_window_follows_download_and_clip_time(self):
+        window = self.window(min_ahead=2, max_ahead=8, max_concurrency=6)
+        window.record_download(3.0)
+        window.record_playback(1.0)
+        self.assertEqual((window.concurrency, window.ahead), (5, 5))
+
+        window.pump()
+        self.assertEqual(sorted(self.futures), [1, 2, 3, 4, 5])
+
+    def test_classifies_plays_and_counts_wasted_bytes(self):
+        window = self.window(min_ahead=4, min_concurrency=4)
+        window.pump()
+        self.finish(1, size=10)
+        self.finish(2, size=20)
+        self.finish(3, size=30)
+
+        window.on_dequeue(self.queue[0])
+        # 2 was evicted from the cache before its turn
+        self.cached.discard(2)
+        window.on_dequeue(self.queue[1])
+        # 3 left the queue without playing
+        window.discard(self.queue[2])
+        # 4 is still downloading
+        window.on_dequeue(self.queue[3])
+        window.on_dequeue(SimpleNamespace(id=99))
+
+        status = window.get_status()
+        self.assertEqual((status['hits'], status['partial_hits'], status['misses']), (1, 1, 2))
+        self.assertEqual((status['wasted'], status['wasted_bytes']), (2, 50))
+        self.assertEqual(status['prefetched_bytes'], 60)
+
+    def test_failed_download_is_left_to_the_player(self):
+        window = self.window(min_ahead=2, min_concurrency=1)
+        window.pump()
+        self.futures[1].set_exception(OSError('unavailable'))
+
+        # The next clip is started, the failed one is not retried
+        self.assertEqual(sorted(self.futures), [1, 2])
+        self.assertTrue(self.futures[1].done())
+        window.on_dequeue(self.queue[0])
+        status = window.get_status()
+        self.assertEqual((status['failed'], status['misses'], status['prefetched_bytes']), (1, 1, 0))
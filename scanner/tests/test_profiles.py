@@ -0,0 +1,58 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from scanner.models import ScannerSettings
+from scanner.views import scanner_service
+
+
+class ProfileSettingsTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(scanner_service, 'multi_tenant', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.region = scanner_service.geofence.names[0]
+
+    def _post(self, data):
+        return self.client.post('/api/settings/', json.dumps(data), content_type='application/json')
+
+    def test_user_regions_are_saved_and_read_back(self):
+        user = User.objects.create_user('pilot', password='secret')
+        self.client.force_login(user)
+        self.addCleanup(scanner_service.profile_router.unregister, f"user:{user.pk}")
+
+        response = self._post({'geo_filter': True, 'regions': [self.region]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['settings']['regions'], [self.region])
+        self.assertEqual(ScannerSettings.objects.get(user=user).regions, [self.region])
+
+        # A fresh profile (e.g. after the router expired it) is rebuilt from the saved row
+        scanner_service.profile_router.unregister(f"user:{user.pk}")
+        status = self.client.get('/api/status/').json()
+        self.assertEqual(status['settings']['regions'], [self.region])
+
+    def test_session_regions_are_saved(self):
+        response = self._post({'geo_filter': True, 'regions': [self.region]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.session['scanner_profile']['regions'], [self.region])
+        self.addCleanup(scanner_service.profile_router.unregister,
+                        f"session:{self.client.session.session_key}")
+
+    def test_unknown_region_is_rejected_before_saving(self):
+        user = User.objects.create_user('pilot', password='secret')
+        self.client.force_login(user)
+        self.addCleanup(scanner_service.profile_router.unregister, f"user:{user.pk}")
+
+        response = self._post({'geo_filter': True, 'regions': ['BOGUS']})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['message'], 'Unknown region: BOGUS')
+        self.assertFalse(ScannerSettings.objects.filter(user=user).exists())
+
+    def test_unknown_region_in_global_settings(self):
+        with mock.patch.object(scanner_service, 'multi_tenant', False):
+            before = dict(scanner_service.current_settings)
+            response = self._post({'regions': ['BOGUS']})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(scanner_service.current_settings, before)
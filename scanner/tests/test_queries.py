@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.test import TestCase
+
+from scanner.geofence import GeofenceIndex
+from scanner.models import AudioTransmission
+from scanner.queries import TransmissionFilter, fetch_page
+
+GEOFENCE = GeofenceIndex({'BOX': [[34.0, -112.0], [34.0, -110.0], [32.0, -110.0], [32.0, -112.0]]})
+
+
+def _transmission(transmission_id, airport='KPHX', inside=True):
+    return AudioTransmission(
+        transmission_id=transmission_id,
+        url=f'https://example.com/{transmission_id}.mp3',
+        who_from='pilot', frequency='120.900', station_name='PHX_TWR', pilot='N123',
+        airport=airport, position='TWR', voice_name='', from_userid='1', flight_rules='VFR',
+        latitude=33.0 if inside else 40.0,
+        longitude=-111.0 if inside else -111.0,
+        timestamp=datetime(2024, 1, 1, tzinfo=dt_timezone.utc) + timedelta(minutes=transmission_id)
+    )
+
+
+class KeysetPagingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Every third transmission is outside the region and at another airport
+        AudioTransmission.objects.bulk_create([
+            _transmission(i, airport='KTUS' if i % 3 == 0 else 'KPHX', inside=i % 3 != 0)
+            for i in range(1, 31)
+        ])
+
+    def _walk(self, filters, limit, **kwargs):
+        pages = []
+        before = None
+        while True:
+            rows, before = fetch_page(filters, before=before, limit=limit, **kwargs)
+            pages.append([row['transmission_id'] for row in rows])
+            if before is None:
+                return pages
+
+    def test_pages_cover_every_row_once_in_order(self):
+        pages = self._walk(TransmissionFilter(), limit=7)
+        self.assertEqual([len(page) for page in pages], [7, 7, 7, 7, 2])
+        self.assertEqual(sum(pages, []), list(range(30, 0, -1)))
+
+    def test_exact_multiple_has_no_empty_trailing_page(self):
+        pages = self._walk(TransmissionFilter(), limit=10)
+        self.assertEqual([len(page) for page in pages], [10, 10, 10])
+
+    def test_cursor_continues_below_before(self):
+        rows, next_before = fetch_page(TransmissionFilter(), before=12, limit=5)
+        self.assertEqual([row['transmission_id'] for row in rows], [11, 10, 9, 8, 7])
+        self.assertEqual(next_before, 7)
+
+    def test_filtered_pages(self):
+        pages = self._walk(TransmissionFilter(airports=('KTUS',)), limit=4)
+        self.assertEqual(sum(pages, []), list(range(30, 0, -3)))
+        self.assertEqual([len(page) for page in pages], [4, 4, 2])
+
+    def test_region_pages_cross_chunk_boundaries(self):
+        pages = self._walk(TransmissionFilter(region='BOX'), limit=6, geofence=GEOFENCE)
+        expected = [i for i in range(30, 0, -1) if i % 3 != 0]
+        self.assertEqual(sum(pages, []), expected)
+        self.assertEqual([len(page) for page in pages], [6, 6, 6, 2])
+
+    def test_unknown_region(self):
+        with self.assertRaisesMessage(ValueError, 'Unknown region: nope'):
+            fetch_page(TransmissionFilter(region='nope'), geofence=GEOFENCE)
+
+    def test_unknown_region_returns_400(self):
+        response = self.client.get('/api/transmissions/', {'region': 'nope'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['message'], 'Unknown region: nope')
@@ -0,0 +1,82 @@
+import gzip
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from scanner.models import AudioTransmission
+from scanner.retention import RetentionScheduler, prune
+
+
+def _transmission(transmission_id, age_days):
+    return AudioTransmission(
+        transmission_id=transmission_id,
+        url=f'https://example.com/{transmission_id}.mp3',
+        who_from='pilot', frequency='120.900', station_name='PHX_TWR', pilot='N123',
+        airport='KPHX', position='TWR', voice_name='', from_userid='1', flight_rules='VFR',
+        latitude=33.0, longitude=-111.0,
+        timestamp=timezone.now() - timedelta(days=age_days)
+    )
+
+
+class PruneTests(TestCase):
+    def setUp(self):
+        # 1-25 are expired, 26-30 are inside the window
+        AudioTransmission.objects.bulk_create(
+            [_transmission(i, 40) for i in range(1, 26)] + [_transmission(i, 1) for i in range(26, 31)]
+        )
+
+    def _archive_dir(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        return directory
+
+    def test_deletes_expired_rows_in_batches(self):
+        result = prune(30, batch_size=10)
+
+        self.assertEqual(result['rows_pruned'], 25)
+        self.assertEqual(result['batches'], 3)
+        self.assertIsNone(result['archive'])
+        self.assertGreaterEqual(result['seconds'], 0)
+        self.assertEqual(sorted(AudioTransmission.objects.values_list('transmission_id', flat=True)),
+                         list(range(26, 31)))
+
+    def test_max_batches_removes_oldest_first(self):
+        result = prune(30, batch_size=10, max_batches=1)
+
+        self.assertEqual(result['rows_pruned'], 10)
+        self.assertEqual(result['batches'], 1)
+        self.assertFalse(AudioTransmission.objects.filter(transmission_id__lte=10).exists())
+        self.assertEqual(AudioTransmission.objects.count(), 20)
+
+    def test_archives_pruned_rows_as_gzip_ndjson(self):
+        result = prune(30, batch_size=10, archive_dir=self._archive_dir())
+
+        with gzip.open(result['archive'], 'rt', encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual([row['transmission_id'] for row in rows], list(range(1, 26)))
+        self.assertEqual(rows[0]['airport'], 'KPHX')
+        self.assertIn('timestamp', rows[0])
+
+    def test_nothing_expired(self):
+        result = prune(60, batch_size=10, archive_dir=self._archive_dir())
+
+        self.assertEqual(result['rows_pruned'], 0)
+        self.assertEqual(result['batches'], 0)
+        self.assertIsNone(result['archive'])
+        self.assertEqual(AudioTransmission.objects.count(), 30)
+
+    def test_scheduler_run_accumulates_totals(self):
+        scheduler = RetentionScheduler(30, batch_size=10, pause=0)
+
+        scheduler.run_once()
+        scheduler.run_once()
+
+        status = scheduler.get_status()
+        self.assertEqual(status['runs'], 2)
+        self.assertEqual(status['errors'], 0)
+        self.assertEqual(status['rows_pruned'], 25)
+        self.assertEqual(status['last_run']['rows_pruned'], 0)
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.test import TestCase
+
+from scanner import rollups
+from scanner.models import TrafficRollup
+from scanner.persistence import TransmissionWriter
+from scanner.scanner_service import AudioData
+
+START = datetime(2024, 1, 1, 10, 0, tzinfo=dt_timezone.utc)
+
+
+def _audio(audio_id, minutes, airport='KPHX', frequency='120.900', flight_rules='VFR'):
+    return AudioData(
+        id=audio_id, url=f'https://example.com/{audio_id}.mp3', who_from='pilot', frequency=frequency,
+        station_name='TWR', pilot='N1', airport=airport, position='TWR', voice_name='', from_userid='1',
+        flight_rules=flight_rules, stamp=(START + timedelta(minutes=minutes)).timestamp()
+    )
+
+
+def _snapshot():
+    return sorted(TrafficRollup.objects.values_list('bucket', 'dimension', 'bucket_start', 'value', 'count'))
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        writer = TransmissionWriter()
+        # Several flushes that land in the same buckets, spanning two hours
+        batches = [
+            [_audio(1, 0), _audio(2, 0.5, airport='KTUS'), _audio(3, 1, flight_rules='IFR')],
+            [_audio(4, 1.5), _audio(5, 59, frequency='118.300'), _audio(3, 1, flight_rules='IFR')],
+            [_audio(6, 61, airport='KTUS'), _audio(7, 75)],
+        ]
+        for batch in batches:
+            self.assertTrue(writer._flush(batch))
+
+    def test_incremental_rollups_match_a_rebuild(self):
+        incremental = _snapshot()
+        self.assertTrue(incremental)
+
+        rollups.rebuild()
+        self.assertEqual(_snapshot(), incremental)
+
+    def test_partial_rebuild_keeps_earlier_hours(self):
+        incremental = _snapshot()
+        rollups.rebuild(since=START + timedelta(minutes=70))
+        self.assertEqual(_snapshot(), incremental)
+
+    def test_query_reads_the_rollups(self):
+        data = rollups.query('hour', 'airport', since=START, until=START + timedelta(hours=2))
+        self.assertEqual(data['totals'], {'KPHX': 5, 'KTUS': 2})
+        self.assertEqual([point['counts'] for point in data['series']],
+                         [{'KPHX': 4, 'KTUS': 1}, {'KPHX': 1, 'KTUS': 1}])
+
+        minutes = rollups.query('minute', 'flight_rules', since=START, until=START + timedelta(minutes=2), top=1)
+        self.assertEqual(minutes['totals'], {'VFR': 3})
+
+    def test_range_is_bounded(self):
+        with self.assertRaises(ValueError):
+            rollups.query('minute', 'airport', since=START, until=START + timedelta(days=30))
+        with self.assertRaises(ValueError):
+            rollups.query('day', 'airport')
@@ -0,0 +1,73 @@
+from unittest import mock
+
+from dataclasses import replace
+
+from django.test import SimpleTestCase
+
+from scanner.filters import CompiledFilter
+from scanner.scanner_service import AudioData, ScannerService
+
+
+def _audio(audio_id):
+    return AudioData(
+        id=audio_id, url=f'https://example.com/{audio_id}.mp3', who_from='pilot', frequency='120.900',
+        station_name='TWR', pilot='N1', airport='KPHX', position='TWR', voice_name='', from_userid='1',
+        flight_rules='VFR'
+    )
+
+
+class EnqueueTests(SimpleTestCase):
+    def setUp(self):
+        self.service = ScannerService()
+        self._drain()
+        self.events = []
+        self.service.add_listener(self._listener)
+        self.addCleanup(self.service.remove_listener, self._listener)
+        self.addCleanup(self._drain)
+
+    def _drain(self):
+        while not self.service.audio_queue.empty():
+            self.service.audio_queue.get_nowait()
+
+    def _listener(self, event_type, data):
+        self.events.append((event_type, data['id']))
+
+    def test_single_tenant_uses_global_queue(self):
+        with mock.patch.object(self.service, 'multi_tenant', False):
+            self.service._enqueue_audio(_audio(1))
+        self.assertEqual(self.service.audio_queue.qsize(), 1)
+        self.assertEqual(self.events, [('new_transmission', 1)])
+
+    def test_multi_tenant_skips_global_queue(self):
+        with mock.patch.object(self.service, 'multi_tenant', True):
+            for audio_id in range(3):
+                self.service._enqueue_audio(_audio(audio_id))
+        self.assertEqual(self.service.audio_queue.qsize(), 0)
+        self.assertEqual([event for event, _ in self.events], ['new_transmission'] * 3)
+
+
+class RegionTaggingTests(SimpleTestCase):
+    def setUp(self):
+        self.service = ScannerService()
+        for patcher in (mock.patch.object(self.service, 'persist_transmissions', False),
+                        mock.patch.object(self.service, 'audio_filter',
+                                          CompiledFilter(geo_filter=True, geofence=self.service.geofence))):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_batch_is_classified_once(self):
+        inside = self.service.geofence.bbox(self.service.geofence.names[0])
+        audio_list = [
+            replace(_audio(1), lat=(inside[0] + inside[2]) / 2, lon=(inside[1] + inside[3]) / 2),
+            replace(_audio(2), lat=0.0, lon=0.0),
+            _audio(3),
+        ]
+        membership = self.service.geofence.membership
+        with mock.patch.object(self.service.geofence, 'membership', side_effect=membership) as classify:
+            tagged = self.service._tag_regions(audio_list)
+            self.service._handle_batch(tagged)
+            accepted = self.service.filter_batch(tagged)
+
+        self.assertEqual(classify.call_count, 1)
+        self.assertTrue(tagged[0].regions)
+        self.assertEqual([audio.id for audio in accepted], [1, 3])
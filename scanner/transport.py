@@ -0,0 +1,128 @@
+"""
+Shared pooled HTTP transport for the feed poller, prefetcher and playback.
+
+Kept free of Django imports so scanner_live.py can use it directly.
+"""
+
+import threading
+import time
+import logging
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRANSPORT_CONFIG = {
+    'pool_connections': 4,
+    'pool_maxsize': 16,
+    'pool_block': True,
+    'retries': 3,
+    'backoff_factor': 0.5,
+    'timeout': 10,
+}
+
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+
+class HttpTransport:
+    """Keep-alive connection pools with retry/backoff and timing counters"""
+
+    def __init__(self, config: Optional[dict] = None):
+        options = dict(DEFAULT_TRANSPORT_CONFIG)
+        options.update(config or {})
+        self.timeout = options['timeout']
+        self.retries = options['retries']
+        self.backoff_factor = options['backoff_factor']
+
+        retry = Retry(
+            total=options['retries'],
+            connect=options['retries'],
+            read=options['retries'],
+            status=options['retries'],
+            backoff_factor=options['backoff_factor'],
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False,
+        )
+        # pool_maxsize is per host; pool_block makes it a hard connection limit
+        adapter = HTTPAdapter(
+            pool_connections=options['pool_connections'],
+            pool_maxsize=options['pool_maxsize'],
+            pool_block=options['pool_block'],
+            max_retries=retry,
+        )
+
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._errors = 0
+        self._bytes = 0
+        self._total_time = 0.0
+        self._max_time = 0.0
+        self._last_time = 0.0
+
+    def get(self, url: str, timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        """GET through the shared pool, recording latency and payload size"""
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, timeout=timeout or self.timeout, **kwargs)
+        except Exception:
+            self._record(time.perf_counter() - started, 0, error=True)
+            raise
+
+        size = 0 if kwargs.get('stream') else len(response.content)
+        self._record(time.perf_counter() - started, size, error=response.status_code >= 400)
+        return response
+
+    def max_duration(self, timeout: Optional[float] = None) -> float:
+        """Upper bound on one get(): every attempt timing out plus the backoff between them"""
+        attempts = self.retries + 1
+        backoff = sum(min(self.backoff_factor * 2 ** n, Retry.DEFAULT_BACKOFF_MAX) for n in range(self.retries))
+        return attempts * (timeout or self.timeout) + backoff
+
+    def _record(self, elapsed: float, size: int, error: bool = False):
+        with self._stats_lock:
+            self._requests += 1
+            self._bytes += size
+            self._total_time += elapsed
+            self._last_time = elapsed
+            if elapsed > self._max_time:
+                self._max_time = elapsed
+            if error:
+                self._errors += 1
+
+    def get_stats(self) -> Dict:
+        with self._stats_lock:
+            avg = self._total_time / self._requests if self._requests else 0.0
+            return {
+                'requests': self._requests,
+                'errors': self._errors,
+                'bytes': self._bytes,
+                'avg_ms': round(avg * 1000, 2),
+                'max_ms': round(self._max_time * 1000, 2),
+                'last_ms': round(self._last_time * 1000, 2),
+            }
+
+    def close(self):
+        self.session.close()
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport(config: Optional[dict] = None) -> HttpTransport:
+    """Return the process-wide transport, creating it on first use"""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HttpTransport(config)
+                logger.info("HTTP transport initialized")
+    return _transport
@@ -15,4 +15,7 @@ urlpatterns = [
     path('api/settings/', views.update_settings, name='update_settings'),
     path('api/next-audio/', views.get_next_audio, name='get_next_audio'),
     path('api/transmissions/', views.transmissions_list, name='transmissions_list'),
+    path('api/transmissions/export/', views.export_transmissions, name='export_transmissions'),
+    path('api/analytics/', views.analytics, name='analytics'),
+    path('api/audio/<int:audio_id>/', views.audio_proxy, name='audio_proxy'),
 ]
@@ -1,29 +1,65 @@
 from django.shortcuts import render, redirect
-from django.http import JsonResponse, StreamingHttpResponse
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
+from urllib.parse import urlencode
 import json
 import logging
 from .scanner_service import ScannerService
-from .models import ScannerSettings, AudioTransmission, ScannerSession
+from .models import ScannerSettings, ScannerSession
+from .profiles import PROFILE_FILTER_KEYS
+from .queries import (TransmissionFilter, fetch_page, page_size, parse_time,
+                      API_FIELDS, DASHBOARD_FIELDS, HISTORY_FIELDS)
+from .export import EXPORT_FORMATS, export_rows, iter_export
+from . import rollups
+from .audio_proxy import iter_file_range, parse_range, sniff_content_type
 
 logger = logging.getLogger(__name__)
 
 scanner_service = ScannerService()
 
 
+def _profile_settings(request) -> dict:
+    settings = dict(scanner_service.current_settings)
+    if request.user.is_authenticated:
+        row = ScannerSettings.objects.filter(user=request.user).first()
+        if row:
+            settings.update(vfr_only=row.vfr_only, geo_filter=row.geo_filter, airports=row.airports,
+                            regions=row.regions)
+    else:
+        settings.update(request.session.get('scanner_profile', {}))
+    return settings
+
+
+def _profile_key(request):
+    """Filter profile for this user/session in multi-tenant mode, else None"""
+    if not scanner_service.multi_tenant:
+        return None
+
+    if request.user.is_authenticated:
+        key = f"user:{request.user.pk}"
+    else:
+        if not request.session.session_key:
+            request.session.save()
+        key = f"session:{request.session.session_key}"
+
+    if not scanner_service.has_profile(key):
+        scanner_service.register_profile(key, _profile_settings(request))
+    return key
+
+
 def index(request):
     context = {
-        'status': scanner_service.get_status(),
+        'status': scanner_service.get_status(_profile_key(request)),
     }
     return render(request, 'scanner/index.html', context)
 
 
 def dashboard(request):
-    status = scanner_service.get_status()
-    recent_transmissions = AudioTransmission.objects.all()[:20]
+    status = scanner_service.get_status(_profile_key(request))
+    recent_transmissions, _ = fetch_page(TransmissionFilter(), limit=20, fields=DASHBOARD_FIELDS)
 
     context = {
         'status': status,
@@ -39,6 +75,8 @@ def start_scanner(request):
         data = json.loads(request.body) if request.body else {}
         result = scanner_service.start(data)
         return JsonResponse(result)
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Error starting scanner: {e}")
         return JsonResponse({"status": "error", "message": str(e)}, status=500)
@@ -58,7 +96,7 @@ def stop_scanner(request):
 @require_http_methods(["GET"])
 def get_status(request):
     try:
-        status = scanner_service.get_status()
+        status = scanner_service.get_status(_profile_key(request))
         return JsonResponse(status)
     except Exception as e:
         logger.error(f"Error getting status: {e}")
@@ -70,8 +108,22 @@ def get_status(request):
 def update_settings(request):
     try:
         data = json.loads(request.body)
+        profile_key = _profile_key(request)
+        if profile_key:
+            # Only this listener's filters change; the shared upstream loop is untouched
+            profile_settings = {key: data[key] for key in PROFILE_FILTER_KEYS if key in data}
+            # Compiling the profile validates it (e.g. region names) before anything is saved
+            scanner_service.register_profile(profile_key, {**_profile_settings(request), **profile_settings})
+            if request.user.is_authenticated:
+                ScannerSettings.objects.update_or_create(user=request.user, defaults=profile_settings)
+            else:
+                request.session['scanner_profile'] = {**request.session.get('scanner_profile', {}), **profile_settings}
+            return JsonResponse({"status": "updated", "settings": scanner_service.get_status(profile_key)['settings']})
+
         result = scanner_service.update_settings(data)
         return JsonResponse(result)
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Error updating settings: {e}")
         return JsonResponse({"status": "error", "message": str(e)}, status=500)
@@ -80,9 +132,9 @@ def update_settings(request):
 @require_http_methods(["GET"])
 def get_next_audio(request):
     try:
-        audio = scanner_service.get_next_audio()
+        audio = scanner_service.get_next_audio(_profile_key(request))
         if audio:
-            return JsonResponse(audio.to_dict())
+            return HttpResponse(audio.to_json(), content_type='application/json')
         else:
             return JsonResponse({"status": "no_audio"}, status=204)
     except Exception as e:
@@ -90,27 +142,142 @@ def get_next_audio(request):
         return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
 
+def _transmission_page(request, fields, default_limit):
+    filters = TransmissionFilter.from_params(request.GET)
+    before = request.GET.get('before')
+    rows, next_before = fetch_page(
+        filters,
+        before=int(before) if before else None,
+        limit=page_size(request.GET.get('limit'), default_limit),
+        fields=fields,
+        geofence=scanner_service.geofence
+    )
+    return filters, rows, next_before
+
+
 @require_http_methods(["GET"])
 def transmissions_list(request):
-    limit = int(request.GET.get('limit', 50))
-    transmissions = AudioTransmission.objects.all()[:limit]
+    try:
+        filters, rows, next_before = _transmission_page(request, API_FIELDS, 50)
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+
+    regions = scanner_service.geofence.classify(
+        [r['latitude'] if r['latitude'] is not None else float('nan') for r in rows],
+        [r['longitude'] if r['longitude'] is not None else float('nan') for r in rows]
+    )
     data = [{
-        'id': t.transmission_id,
-        'station_name': t.station_name,
-        'frequency': t.frequency,
-        'pilot': t.pilot,
-        'airport': t.airport,
-        'flight_rules': t.flight_rules,
-        'timestamp': t.timestamp.isoformat() if t.timestamp else None,
-    } for t in transmissions]
-    return JsonResponse(data, safe=False)
+        'id': r['transmission_id'],
+        'station_name': r['station_name'],
+        'frequency': r['frequency'],
+        'pilot': r['pilot'],
+        'airport': r['airport'],
+        'flight_rules': r['flight_rules'],
+        'regions': list(names),
+        'timestamp': r['timestamp'].isoformat() if r['timestamp'] else None,
+    } for r, names in zip(rows, regions)]
+    return JsonResponse({'results': data, 'next_before': next_before, 'filters': filters.to_params()})
+
+
+@require_http_methods(["GET"])
+def export_transmissions(request):
+    fmt = request.GET.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return JsonResponse({"status": "error", "message": f"Unknown format: {fmt}"}, status=400)
+    try:
+        filters = TransmissionFilter.from_params(request.GET)
+        rows = export_rows(filters, geofence=scanner_service.geofence)
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+
+    response = StreamingHttpResponse(iter_export(fmt, rows), content_type=EXPORT_FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="transmissions.{fmt}"'
+    return response
+
+
+@require_http_methods(["GET"])
+def analytics(request):
+    try:
+        top = request.GET.get('top')
+        data = rollups.query(
+            request.GET.get('bucket', 'hour'),
+            request.GET.get('dimension', 'airport'),
+            since=parse_time(request.GET.get('since')),
+            until=parse_time(request.GET.get('until')),
+            top=int(top) if top else None
+        )
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+    return JsonResponse(data)
+
+
+def _clip_response(request, stored):
+    """Serve a stored clip with ETag revalidation and single-range requests"""
+    entry, clip = stored
+    etag = f'"{entry.digest}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        clip.close()
+        response = HttpResponse(status=304)
+    else:
+        content_type = sniff_content_type(clip.read(4))
+        clip.seek(0)
+        try:
+            byte_range = parse_range(request.headers.get('Range'), entry.size)
+        except ValueError:
+            clip.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{entry.size}'
+            return response
+
+        if byte_range is None:
+            response = FileResponse(clip, content_type=content_type)
+        else:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(iter_file_range(clip, start, length),
+                                             status=206, content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{entry.size}'
+            response['Content-Length'] = str(length)
+
+    response['ETag'] = etag
+    response['Accept-Ranges'] = 'bytes'
+    # A transmission's audio never changes once published
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
+@require_http_methods(["GET"])
+def audio_proxy(request, audio_id):
+    try:
+        entry = scanner_service.audio_proxy.get(audio_id)
+    except Exception as e:
+        logger.error(f"Error proxying audio {audio_id}: {e}")
+        return JsonResponse({"status": "error", "message": "Upstream fetch failed"}, status=502)
+
+    stored = scanner_service.clip_store.open(audio_id) if entry else None
+    if stored is None:
+        raise Http404("Unknown transmission")
+    return _clip_response(request, stored)
 
 
 def settings_page(request):
-    status = scanner_service.get_status()
+    status = scanner_service.get_status(_profile_key(request))
     return render(request, 'scanner/settings.html', {'settings': status['settings']})
 
 
 def history(request):
-    transmissions = AudioTransmission.objects.all()[:100]
-    return render(request, 'scanner/history.html', {'transmissions': transmissions})
+    try:
+        filters, transmissions, next_before = _transmission_page(request, HISTORY_FIELDS, 100)
+    except ValueError as e:
+        return HttpResponse(str(e), status=400)
+
+    next_url = None
+    if next_before is not None:
+        next_url = '?' + urlencode({**filters.to_params(), 'before': next_before})
+    context = {
+        'transmissions': transmissions,
+        'next_url': next_url,
+        'is_first_page': not request.GET.get('before'),
+        'newest_url': '?' + urlencode(filters.to_params()),
+    }
+    return render(request, 'scanner/history.html', context)
@@ -11,24 +11,36 @@ import platform
 import time
 import asyncio
 import platform
-import requests
 import time
 import threading
 import queue
 import argparse
 import asyncio
-from typing import Dict, List, Optional, Callable
+import itertools
+import heapq
+import random
+from typing import Dict, Iterable, List, Optional, Callable
 from dataclasses import dataclass
 from urllib.parse import urljoin
 import logging
-import sounddevice as sd
 import numpy as np
-import io
 import json
 from pathlib import Path
 import subprocess
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
+from scanner.transport import get_transport
+from scanner.filters import CompiledFilter
+from scanner.geofence import GeofenceIndex
+from scanner.cursor import IngestCursor
+from scanner.clip_cache import ClipCache
+from scanner.clip_store import ClipStore
+from scanner.prefetch import PrefetchWindow
+from scanner.pcm import LatencyStats, PCMClip, decode_clip, time_compress
+from scanner.playback_policy import PlaybackPolicy
+from scanner.output import OutputStream
+from scanner.mixer import Mixer
+from scanner.stream_decode import MINIAUDIO_AVAILABLE as STREAM_DECODE_AVAILABLE, ProgressiveDecoder
 
 try:
     import websocket
@@ -36,22 +48,11 @@ try:
 except ImportError:
     WEBSOCKET_AVAILABLE = False
     print("WebSocket support not available. Install with: pip install websocket-client rel")
-try:
-    from pydub import AudioSegment
-    PYDUB_AVAILABLE = True
-except ImportError:
-    PYDUB_AVAILABLE = False
-    print("Pydub not available. Install with: pip install pydub")
-
-try:
-    import miniaudio
-    MINIAUDIO_AVAILABLE = True
-except ImportError:
-    MINIAUDIO_AVAILABLE = False
 
 # Load environment variables
 load_dotenv()
 API_URL = os.getenv("API_URL", os.getenv("URL"))
+WS_URL = os.getenv("WS_URL", API_URL)
 
 # Configure logging
 logging.basicConfig(
@@ -75,6 +76,8 @@ def load_config(config_path: str = "config.json") -> dict:
 
 
 CONFIG = load_config()
+TRANSPORT = get_transport(CONFIG.get('transport'))
+BATCH_LIMIT = CONFIG.get('scheduler', {}).get('batch_limit', 50)
 
 
 @dataclass
@@ -100,132 +103,155 @@ class AudioData:
 class AudioBuffer:
     """Manages pre-fetched audio data for instant playback"""
 
-    def __init__(self, max_size: int = 10):
-        self.buffer = {}
-        self.max_size = max_size
-        self.executor = ThreadPoolExecutor(max_workers=3)
-        self.lock = threading.Lock()
-
-    def prefetch(self, audio_data: AudioData):
-        """Prefetch audio data in background"""
-        if len(self.buffer) >= self.max_size:
-            # Remove oldest entry
-            with self.lock:
-                if self.buffer:
-                    oldest = min(self.buffer.keys())
-                    del self.buffer[oldest]
-
-        self.executor.submit(self._fetch_audio, audio_data)
-
-    def _fetch_audio(self, audio_data: AudioData):
-        """Fetch and cache audio data"""
-        try:
-            response = requests.get(audio_data.url, timeout=10)
-            response.raise_for_status()
-            with self.lock:
-                self.buffer[audio_data.id] = response.content
-            logger.debug(f"Prefetched audio ID {audio_data.id}")
-        except Exception as e:
-            logger.warning(f"Failed to prefetch audio {audio_data.id}: {e}")
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, max_workers: int = 3,
+                 store: Optional[ClipStore] = None,
+                 on_download: Optional[Callable[[float], None]] = None,
+                 decoder: Callable[[bytes], PCMClip] = decode_clip,
+                 pcm_max_bytes: int = 0,
+                 decode_workers: int = 2):
+        self.cache = ClipCache(max_bytes=max_bytes)
+        self.store = store
+        self.on_download = on_download
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        # Decode-ahead stage: prefetched clips are decoded off the player thread
+        self.decoder = decoder
+        self.pcm_cache = None
+        self.decode_executor = None
+        if pcm_max_bytes > 0:
+            self.pcm_cache = ClipCache(max_bytes=pcm_max_bytes, sizeof=lambda clip: clip.nbytes)
+            self.decode_executor = ThreadPoolExecutor(max_workers=decode_workers)
+
+    def prefetch(self, audio_data: AudioData) -> Future:
+        """Start (or join) a background download of audio data, decoding it once it arrives"""
+        future = self.cache.get_or_load(audio_data.id, lambda: self._fetch_audio(audio_data), self.executor)
+        if self.pcm_cache is not None and audio_data.id not in self.pcm_cache:
+            future.add_done_callback(lambda f: self._decode_ahead(audio_data, f))
+        return future
+
+    def _decode_ahead(self, audio_data: AudioData, future: Future):
+        if not future.cancelled() and future.exception() is None:
+            self.prefetch_pcm(audio_data)
+
+    def prefetch_pcm(self, audio_data: AudioData) -> Future:
+        """Start (or join) decoding a clip to PCM"""
+        return self.pcm_cache.get_or_load(
+            audio_data.id, lambda: self.decoder(self.fetch(audio_data)), self.decode_executor)
+
+    def _fetch_audio(self, audio_data: AudioData) -> bytes:
+        """Read from the disk store or download; the cache stores the result"""
+        if self.store is not None:
+            stored = self.store.read(audio_data.id)
+            if stored is not None:
+                return stored
+
+        started = time.perf_counter()
+        response = TRANSPORT.get(audio_data.url, timeout=10)
+        response.raise_for_status()
+        if self.on_download:
+            self.on_download(time.perf_counter() - started)
+        logger.debug(f"Prefetched audio ID {audio_data.id}")
+        if self.store is not None:
+            try:
+                self.store.put(audio_data.id, response.content)
+            except OSError as e:
+                logger.warning(f"Failed to store audio {audio_data.id}: {e}")
+        return response.content
+
+    def has(self, audio_id: int) -> bool:
+        """Whether a clip is cached, stored or already loading"""
+        if self.pcm_cache is not None and (audio_id in self.pcm_cache or self.pcm_cache.loading(audio_id)):
+            return True
+        if audio_id in self.cache or self.cache.loading(audio_id):
+            return True
+        return self.store is not None and audio_id in self.store
+
+    def keep(self, audio_id: int, content: bytes):
+        """Cache a clip that was downloaded outside the prefetcher"""
+        self.cache.put(audio_id, content)
+        if self.store is not None:
+            self.store.put(audio_id, content)
 
     def get(self, audio_id: int) -> Optional[bytes]:
         """Get cached audio data"""
-        with self.lock:
-            return self.buffer.get(audio_id)
+        return self.cache.get(audio_id)
+
+    def fetch(self, audio_data: AudioData, timeout: float = 10) -> bytes:
+        """Cached bytes, sharing any download already in flight"""
+        return self.prefetch(audio_data).result(timeout=timeout)
+
+    def fetch_pcm(self, audio_data: AudioData, timeout: float = 20) -> PCMClip:
+        """Decoded samples, sharing any decode already in flight"""
+        if self.pcm_cache is None:
+            return self.decoder(self.fetch(audio_data, timeout=timeout))
+        return self.prefetch_pcm(audio_data).result(timeout=timeout)
 
     def clear(self):
         """Clear the buffer"""
-        with self.lock:
-            self.buffer.clear()
+        self.cache.clear()
+        if self.pcm_cache is not None:
+            self.pcm_cache.clear()
+
+    def get_status(self) -> Dict:
+        status = self.cache.get_status()
+        if self.pcm_cache is not None:
+            status["pcm"] = self.pcm_cache.get_status()
+        if self.store is not None:
+            status["store"] = self.store.get_status()
+        return status
 
 
 class EnhancedAudioStreamer:
     """Enhanced audio streaming with lower latency"""
 
-    def __init__(self, volume: float = 1.0):
+    def __init__(self, volume: float = 1.0, sample_rate: int = 44100, channels: int = 1,
+                 output: Optional[OutputStream] = None):
         self.volume = volume
-        self.is_playing = False
-        self.current_stream = None
-
-    def stream_audio_instant(self, audio_data: bytes) -> bool:
-        """Stream audio with minimal latency"""
+        self.sample_rate = sample_rate
+        self.channels = channels
+        # One stream for the whole session; clips are queued into it back to back
+        self.output = output or OutputStream(sample_rate=sample_rate)
+
+    @property
+    def is_playing(self) -> bool:
+        return self.output.is_playing
+
+    def stream_audio_instant(self, audio_data: bytes,
+                             on_first_sample: Optional[Callable[[], None]] = None) -> bool:
+        """Decode and stream encoded audio"""
         try:
-            # Try miniaudio first (lowest latency)
-            if MINIAUDIO_AVAILABLE:
-                return self._play_miniaudio(audio_data)
-
-            # Fallback to pydub/sounddevice
-            if PYDUB_AVAILABLE:
-                return self._play_pydub(audio_data)
-
-            logger.error("No audio backend available")
-            return False
-
+            clip = decode_clip(audio_data, self.sample_rate, self.channels)
         except Exception as e:
-            logger.error(f"Error streaming audio: {e}")
+            logger.error(f"Error decoding audio: {e}")
             return False
+        return self.play_pcm(clip, on_first_sample)
 
-    def _play_miniaudio(self, audio_data: bytes) -> bool:
-        """Play using miniaudio (low latency)"""
+    def play_pcm(self, clip: PCMClip, on_first_sample: Optional[Callable[[], None]] = None,
+                 stop_event: Optional[threading.Event] = None) -> bool:
+        """Queue already-decoded samples on the output stream"""
         try:
-            decoder = miniaudio.decode(audio_data)
-            samples = decoder.samples
-
-            # Apply volume
-            samples = samples * self.volume
-
-            with miniaudio.PlaybackDevice(
-                output_format=miniaudio.SampleFormat.FLOAT32,
-                nchannels=decoder.nchannels,
-                sample_rate=decoder.sample_rate
-            ) as device:
-                self.is_playing = True
-                device.start(samples)
-                while device.callback_generator:
-                    time.sleep(0.01)
-
-            self.is_playing = False
-            return True
+            samples = clip.samples * np.float32(self.volume)
+            return self.output.play(samples, clip.sample_rate, on_first_sample, stop_event)
         except Exception as e:
-            logger.warning(f"Miniaudio playback failed: {e}")
+            logger.error(f"Error streaming audio: {e}")
             return False
 
-    def _play_pydub(self, audio_data: bytes) -> bool:
-        """Play using pydub/sounddevice"""
+    def play_stream(self, blocks: Iterable[np.ndarray], sample_rate: int,
+                    on_first_sample: Optional[Callable[[], None]] = None,
+                    stop_event: Optional[threading.Event] = None,
+                    prebuffer: float = 0.2) -> bool:
+        """Queue samples on the output stream as they are decoded"""
         try:
-            audio = AudioSegment.from_mp3(io.BytesIO(audio_data))
-
-            # Convert to numpy array
-            samples = np.array(audio.get_array_of_samples())
-
-            if audio.sample_width == 2:
-                samples = samples.astype(np.float32) / 32768.0
-            else:
-                samples = samples.astype(np.float32) / 128.0
-
-            # Reshape for channels
-            if audio.channels == 2:
-                samples = samples.reshape((-1, 2))
-
-            # Apply volume
-            samples = samples * self.volume
-
-            self.is_playing = True
-            sd.play(samples, samplerate=audio.frame_rate, blocking=True)
-            self.is_playing = False
-            return True
-
+            volume = np.float32(self.volume)
+            return self.output.play_stream((block * volume for block in blocks), sample_rate,
+                                           on_first_sample, stop_event, prebuffer)
         except Exception as e:
-            logger.error(f"Pydub playback failed: {e}")
+            logger.error(f"Error streaming audio: {e}")
             return False
 
     def stop(self):
-        """Stop current playback"""
-        self.is_playing = False
-        try:
-            sd.stop()
-        except:
-            pass
+        """Stop playback and close the output stream"""
+        self.output.close()
 
 
 class RealtimeScanner:
@@ -239,7 +265,9 @@ class RealtimeScanner:
                  prefetch_audio: bool = True,
                  vfr_only: bool = False,
                  geo_filter: bool = False,
-                 airports: List[str] = None):
+                 airports: List[str] = None,
+                 regions: List[str] = None,
+                 mix_voices: Optional[int] = None):
 
         self.api_base_url = api_base_url or API_URL
         self.volume = volume
@@ -251,16 +279,92 @@ class RealtimeScanner:
         self.airports = airports or []
 
         # Audio components
-        self.audio_streamer = EnhancedAudioStreamer(volume=volume)
-        self.audio_buffer = AudioBuffer() if prefetch_audio else None
+        pcm_config = CONFIG.get('pcm', {})
+        playback_config = CONFIG.get('playback', {})
+        sample_rate = pcm_config.get('sample_rate', 44100)
+        self.audio_streamer = EnhancedAudioStreamer(
+            volume=volume,
+            sample_rate=sample_rate,
+            channels=pcm_config.get('channels', 1),
+            output=OutputStream(
+                backend=playback_config.get('backend'),
+                sample_rate=playback_config.get('sample_rate') or sample_rate,
+                channels=playback_config.get('channels', 2),
+                ring_seconds=playback_config.get('ring_seconds', 2.0),
+                buffer_ms=playback_config.get('buffer_ms', 50),
+                path=playback_config.get('path')
+            )
+        )
+        mixer_config = CONFIG.get('mixer', {})
+        self.mixer = None
+        if mix_voices or mixer_config.get('enabled', False):
+            self.mixer = Mixer(
+                self.audio_streamer.output,
+                max_voices=mix_voices or mixer_config.get('max_voices', 4),
+                volume=volume,
+                gains=mixer_config.get('gains'),
+                pans=mixer_config.get('pans'),
+                default_gain=mixer_config.get('default_gain', 1.0),
+                block_frames=mixer_config.get('block_frames', 1024),
+                lead_seconds=mixer_config.get('lead_seconds', 0.1),
+                clip_threshold=mixer_config.get('clip_threshold', 0.8)
+            )
+        self.playback_policy = PlaybackPolicy.from_config(CONFIG.get('playback_policy'))
+        self.decode_stats = LatencyStats()
+        self.first_sample_stats = LatencyStats()
+        self.miss_first_sample_stats = LatencyStats()
+        cache_config = CONFIG.get('audio_cache', {})
+        store_config = CONFIG.get('clip_store', {})
+        prefetch_config = CONFIG.get('prefetch', {})
+        self.audio_buffer = None
+        self.prefetch_window = None
+        if prefetch_audio:
+            max_concurrency = prefetch_config.get('max_concurrency', 6)
+            self.audio_buffer = AudioBuffer(
+                max_bytes=cache_config.get('max_bytes', 32 * 1024 * 1024),
+                # One spare worker so a player miss never waits behind prefetches
+                max_workers=max_concurrency + 1,
+                store=ClipStore(
+                    store_config.get('path', 'data/clips'),
+                    max_bytes=store_config.get('max_bytes', 512 * 1024 * 1024)
+                ),
+                on_download=lambda seconds: self.prefetch_window.record_download(seconds),
+                decoder=self._decode,
+                pcm_max_bytes=pcm_config.get('max_bytes', 64 * 1024 * 1024) if pcm_config.get('decode_ahead', True) else 0,
+                decode_workers=pcm_config.get('workers', 2)
+            )
+            self.prefetch_window = PrefetchWindow(
+                upcoming=self._upcoming,
+                prefetch=self.audio_buffer.prefetch,
+                is_cached=lambda audio_id: audio_id in self.audio_buffer.cache,
+                min_ahead=prefetch_config.get('min_ahead', 2),
+                max_ahead=prefetch_config.get('max_ahead', 8),
+                min_concurrency=prefetch_config.get('min_concurrency', 1),
+                max_concurrency=max_concurrency
+            )
 
         # Queue with priority support
         self.audio_queue = queue.PriorityQueue()
 
+        # Durable cursor and dedupe window shared by push and REST ingest
+        cursor_config = CONFIG.get('cursor', {})
+        self.cursor = IngestCursor(
+            cursor_config.get('live_path', 'data/live_cursor.json'),
+            dedupe_window=cursor_config.get('dedupe_window', 5000),
+            min_interval=cursor_config.get('min_interval', 1.0)
+        )
+
         # State
-        self.last_played_id = 0
         self.is_running = False
         self.ws = None
+        self.ws_thread = None
+        # ws_open: the socket is up; ws_connected: it is up and the gap since the last id is filled
+        self.ws_open = False
+        self.ws_connected = False
+        self.ws_stats = {'pushed': 0, 'gap_filled': 0, 'reconnects': 0}
+        self._stop_event = threading.Event()
+        self.state_lock = threading.Lock()
+        self.sequence = itertools.count()
 
         # Geographic bounds (Albuquerque ARTCC)
         self.zab_bounds = CONFIG.get('zab_bounds', {
@@ -270,67 +374,165 @@ class RealtimeScanner:
             'west': -114.0
         })
 
+        # Filters are compiled once from the CLI options
+        self.geofence = GeofenceIndex.from_config(CONFIG.get('geofences'), self.zab_bounds)
+        self.audio_filter = CompiledFilter(
+            vfr_only=self.vfr_only,
+            geo_filter=self.geo_filter,
+            airports=self.airports,
+            geofence=self.geofence,
+            regions=regions
+        )
+
         # Threads
         self.fetch_thread = None
         self.play_thread = None
 
         logger.info(f"Realtime Scanner initialized - WebSocket: {self.use_websocket}, Prefetch: {self.prefetch_audio}")
 
-    # def connect_websocket(self):
-    #
-    #     if not self.use_websocket:
-    #         return
-
-    #     ws_url = WS_URL.replace("https://", "wss://").replace("http://", "ws://")
-
-        # def on_message(message):
-        #     try:
-        #         data = json.loads(message)
-        #         if data.get('type') == 'audio':
-        #             audio_obj = self._parse_audio_data(data.get('data', {}))
-        #             if audio_obj:
-        #                 # Add with high priority for real-time data
-        #                 self.audio_queue.put((0, time.time(), audio_obj))
-        #                 if self.audio_buffer:
-        #                     self.audio_buffer.prefetch(audio_obj)
-        #                 logger.debug(f"Received real-time audio ID {audio_obj.id}")
-        #     except Exception as e:
-        #         logger.error(f"WebSocket message error: {e}")
-
-        # def on_error(ws, error):
-        #     logger.error(f"WebSocket error: {error}")
-
-        # def on_close(ws, close_status_code, close_msg):
-        #     logger.info("WebSocket closed")
-        #     if self.is_running:
-        #         time.sleep(5)
-        #         self.connect_websocket()  # Reconnect
-
-        # def on_open(ws):
-        #     logger.info("WebSocket connected")
-        #     # Send subscription message
-        #     ws.send(json.dumps({
-        #         'type': 'subscribe',
-        #         'last_id': self.last_played_id,
-        #         'filters': {
-        #             'vfr_only': self.vfr_only,
-        #             'airports': self.airports
-        #         }
-        #     }))
-
-        # try:
-        #     self.ws = websocket.WebSocketApp(ws_url,
-        #                                     on_open=on_open,
-        #                                     on_message=on_message,
-        #                                     on_error=on_error,
-        #                                     on_close=on_close)
-
-            # Run in background thread
-        #     ws_thread = threading.Thread(target=self.ws.run_forever, daemon=True)
-        #     ws_thread.start()
-        # except Exception as e:
-        #     logger.error(f"Failed to connect WebSocket: {e}")
-        #     self.use_websocket = False
+    @property
+    def last_played_id(self) -> int:
+        """Resume point for REST and push: every id up to here has been received"""
+        return self.cursor.watermark
+
+    def connect_websocket(self):
+        """Start the push-ingest client in a background thread"""
+        if not self.use_websocket or self.ws_thread:
+            return
+
+        if not WS_URL:
+            logger.warning("WS_URL/API_URL not set, falling back to REST polling")
+            self.use_websocket = False
+            return
+
+        self.ws_thread = threading.Thread(target=self._websocket_worker, daemon=True)
+        self.ws_thread.start()
+
+    def _websocket_worker(self):
+        """Keep a push subscription open, reconnecting with backoff"""
+        ws_url = WS_URL.replace("https://", "wss://").replace("http://", "ws://")
+        ws_config = CONFIG.get('websocket', {})
+        reconnect_min = ws_config.get('reconnect_min', 1.0)
+        reconnect_max = ws_config.get('reconnect_max', 60.0)
+        backoff = reconnect_min
+
+        def on_message(ws, message):
+            try:
+                data = json.loads(message)
+                if data.get('type') != 'audio':
+                    return
+
+                items = data.get('data', {})
+                for item in items if isinstance(items, list) else [items]:
+                    audio_obj = self._parse_audio_data(item)
+                    # Add with high priority for real-time data
+                    if audio_obj and self._accept_audio(audio_obj, priority=0):
+                        self.ws_stats['pushed'] += 1
+                        logger.debug(f"Received real-time audio ID {audio_obj.id}")
+            except Exception as e:
+                logger.error(f"WebSocket message error: {e}")
+
+        def on_error(ws, error):
+            logger.error(f"WebSocket error: {error}")
+
+        def on_close(ws, close_status_code, close_msg):
+            with self.state_lock:
+                self.ws_open = False
+                self.ws_connected = False
+            logger.info("WebSocket closed")
+
+        def on_open(ws):
+            nonlocal backoff
+            logger.info("WebSocket connected")
+            backoff = reconnect_min
+            ws.send(json.dumps({
+                'type': 'subscribe',
+                'last_id': self.last_played_id,
+                'filters': {
+                    'vfr_only': self.vfr_only,
+                    'geo_filter': self.geo_filter,
+                    'airports': self.airports
+                }
+            }))
+            with self.state_lock:
+                self.ws_open = True
+            # Pushes queue up behind this callback, so the gap is filled first
+            if self._gap_fill():
+                with self.state_lock:
+                    self.ws_connected = self.ws_open
+            else:
+                logger.warning("Gap-fill failed; REST polling continues until it succeeds")
+
+        while self.is_running:
+            try:
+                self.ws = websocket.WebSocketApp(ws_url,
+                                                 on_open=on_open,
+                                                 on_message=on_message,
+                                                 on_error=on_error,
+                                                 on_close=on_close)
+                self.ws.run_forever(ping_interval=20, ping_timeout=10)
+            except Exception as e:
+                logger.error(f"WebSocket connection failed: {e}")
+
+            with self.state_lock:
+                self.ws_open = False
+                self.ws_connected = False
+            if not self.is_running:
+                break
+
+            delay = backoff * random.uniform(1.0, 1.25)
+            logger.info(f"WebSocket reconnecting in {delay:.1f}s")
+            self.ws_stats['reconnects'] += 1
+            self._stop_event.wait(delay)
+            backoff = min(backoff * 2, reconnect_max)
+
+        self.ws = None
+
+    def _gap_fill(self) -> bool:
+        """Fetch everything published since last_played_id over REST; False if a fetch failed"""
+        filled = 0
+        try:
+            while self.is_running:
+                audio_list = self._fetch_batch()
+                for audio in audio_list:
+                    if self._accept_audio(audio, priority=1):
+                        filled += 1
+                if len(audio_list) < BATCH_LIMIT:
+                    break
+        except Exception as e:
+            logger.error(f"Gap-fill failed: {e}")
+            return False
+        finally:
+            self.ws_stats['gap_filled'] += filled
+            if filled:
+                logger.info(f"Gap-filled {filled} transmissions after reconnect")
+        return True
+
+    def _accept_audio(self, audio: AudioData, priority: int = 1) -> bool:
+        """Queue a transmission unless it was already seen via push or REST"""
+        if not self.cursor.mark(audio.id):
+            return False
+        with self.state_lock:
+            sequence = next(self.sequence)
+
+        # Filtered traffic is never played, so it is neither queued nor prefetched
+        if self.should_play_audio(audio):
+            self.audio_queue.put((priority, time.time(), sequence, audio))
+            if self.prefetch_window:
+                self.prefetch_window.pump()
+        self.cursor.checkpoint()
+        return True
+
+    def _upcoming(self, count: int) -> List[AudioData]:
+        """Next ``count`` queued transmissions in play order"""
+        with self.audio_queue.mutex:
+            return [entry[-1] for entry in heapq.nsmallest(count, self.audio_queue.queue)]
+
+    def _queue_lag(self) -> float:
+        """Seconds the oldest queued transmission has been waiting"""
+        with self.audio_queue.mutex:
+            oldest = min((entry[1] for entry in self.audio_queue.queue), default=None)
+        return time.time() - oldest if oldest is not None else 0.0
 
     def _parse_audio_data(self, item: dict) -> Optional[AudioData]:
         """Parse API response to AudioData object"""
@@ -355,56 +557,88 @@ class RealtimeScanner:
             logger.warning(f"Failed to parse audio item: {e}")
             return None
 
-    def fetch_audio_batch(self) -> List[AudioData]:
-        try:
-            url = urljoin(self.api_base_url, f"/scanner/last?last={self.last_played_id}&limit=50")
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
+    def _fetch_batch(self) -> List[AudioData]:
+        """One page of transmissions after last_played_id; raises on HTTP or parse errors"""
+        url = urljoin(self.api_base_url, f"/scanner/last?last={self.last_played_id}&limit={BATCH_LIMIT}")
+        response = TRANSPORT.get(url, timeout=10)
+        response.raise_for_status()
 
-            audio_list = []
-            for item in response.json():
-                audio_obj = self._parse_audio_data(item)
-                if audio_obj:
-                    audio_list.append(audio_obj)
+        audio_list = []
+        for item in response.json():
+            audio_obj = self._parse_audio_data(item)
+            if audio_obj:
+                audio_list.append(audio_obj)
 
-            if audio_list:
-                self.last_played_id = max(a.id for a in audio_list)
-                logger.info(f"Fetched {len(audio_list)} audio files")
+        if audio_list:
+            # A page holds every id after last_played_id up to its highest one
+            self.cursor.complete_through(max(a.id for a in audio_list))
+            logger.info(f"Fetched {len(audio_list)} audio files")
 
-            return audio_list
+        return audio_list
 
+    def fetch_audio_batch(self) -> List[AudioData]:
+        try:
+            return self._fetch_batch()
         except Exception as e:
             logger.error(f"Failed to fetch audio: {e}")
             return []
 
     def should_play_audio(self, audio: AudioData) -> bool:
         """Apply filters to audio"""
-        if self.vfr_only and audio.flight_rules != 'VFR':
-            return False
-
-        if not audio.url or not audio.url.startswith('http'):
-            return False
-
-        if self.geo_filter:
-            if audio.airport in self.airports:
-                return True
-
-            if audio.lat and audio.lon:
-                in_bounds = (
-                    self.zab_bounds['south'] <= audio.lat <= self.zab_bounds['north'] and
-                    self.zab_bounds['west'] <= audio.lon <= self.zab_bounds['east']
-                )
-                if not in_bounds:
-                    return False
-
-        return True
-
-    def play_audio(self, audio: AudioData) -> bool:
+        return self.audio_filter(audio)
+
+    def _decode(self, audio_bytes: bytes) -> PCMClip:
+        """Decode to the streamer's PCM format, recording the decode time"""
+        clip = decode_clip(audio_bytes, self.audio_streamer.sample_rate, self.audio_streamer.channels)
+        self.decode_stats.record(clip.decode_seconds)
+        return clip
+
+    def _download_pcm(self, audio: AudioData) -> PCMClip:
+        response = TRANSPORT.get(audio.url, timeout=10)
+        response.raise_for_status()
+        return self._decode(response.content)
+
+    def _play_streaming(self, audio: AudioData, on_first_sample: Optional[Callable[[], None]]):
+        """Fetch, decode and play a clip progressively; returns (played, seconds)"""
+        if not STREAM_DECODE_AVAILABLE:
+            clip = self._download_pcm(audio)
+            return self.audio_streamer.play_pcm(clip, on_first_sample, self._stop_event), clip.duration
+
+        playback_config = CONFIG.get('playback', {})
+        response = TRANSPORT.get(audio.url, timeout=10, stream=True)
+        response.raise_for_status()
+        decoder = ProgressiveDecoder(
+            response.iter_content(chunk_size=playback_config.get('chunk_size', 8192)),
+            sample_rate=self.audio_streamer.sample_rate,
+            channels=self.audio_streamer.channels,
+            # Keep the whole body once it has arrived, so replays and the proxy hit the cache
+            on_complete=(lambda content: self.audio_buffer.keep(audio.id, content)) if self.audio_buffer else None
+        )
+        played = self.audio_streamer.play_stream(
+            decoder.blocks(), decoder.sample_rate, on_first_sample, self._stop_event,
+            prebuffer=playback_config.get('prebuffer_seconds', 0.2)
+        )
+        return played, decoder.duration
+
+    def play_audio(self, audio: AudioData, dequeued_at: Optional[float] = None, rate: float = 1.0) -> bool:
         """Play audio with minimal latency"""
         try:
             if not self.should_play_audio(audio):
                 return False
 
+            # Audio already queued ahead of this clip is not startup latency
+            ahead = self.audio_streamer.output.buffered_seconds()
+
+            def first_sample(*extra: LatencyStats) -> Optional[Callable[[], None]]:
+                if dequeued_at is None:
+                    return None
+
+                def record():
+                    latency = max(0.0, time.perf_counter() - dequeued_at - ahead)
+                    for stats in (self.first_sample_stats,) + extra:
+                        stats.record(latency)
+                return record
+
             # Display transmission info
             print(f"   LIVE TRANSMISSION")
             print(f"   Station: {audio.station_name}")
@@ -414,19 +648,33 @@ class RealtimeScanner:
             if audio.lat and audio.lon:
                 print(f"   Location: {audio.lat:.4f}, {audio.lon:.4f}")
 
-            # Try buffer first
-            audio_bytes = None
-            if self.audio_buffer:
-                audio_bytes = self.audio_buffer.get(audio.id)
-
-            # Fetch if not in buffer
-            if not audio_bytes:
-                response = requests.get(audio.url, timeout=10)
-                response.raise_for_status()
-                audio_bytes = response.content
-
-            
-            return self.audio_streamer.stream_audio_instant(audio_bytes)
+            # Decoded-ahead samples, or join the download/decode already in flight
+            clip = None
+            if self.audio_buffer and self.audio_buffer.has(audio.id):
+                try:
+                    clip = self.audio_buffer.fetch_pcm(audio)
+                except Exception as e:
+                    logger.warning(f"Failed to prefetch audio {audio.id}: {e}")
+
+            if clip is None and (self.mixer or rate > 1.0):
+                # Mixed and time-compressed playback need the whole clip; misses are fetched and decoded in full
+                clip = self.audio_buffer.fetch_pcm(audio) if self.audio_buffer else self._download_pcm(audio)
+            if clip is not None and rate > 1.0:
+                # Behind live: speed up without changing pitch
+                clip = clip._replace(samples=time_compress(clip.samples, rate, clip.sample_rate))
+
+            if self.mixer:
+                self.mixer.add(clip.samples, clip.sample_rate, audio.frequency, first_sample())
+                played, duration = True, clip.duration
+            elif clip is None:
+                # Miss: decode while downloading instead of waiting for the whole body
+                played, duration = self._play_streaming(audio, first_sample(self.miss_first_sample_stats))
+            else:
+                played = self.audio_streamer.play_pcm(clip, first_sample(), self._stop_event)
+                duration = clip.duration
+            if played and self.prefetch_window:
+                self.prefetch_window.record_playback(duration)
+            return played
 
         except Exception as e:
             logger.error(f"Failed to play audio {audio.id}: {e}")
@@ -435,18 +683,38 @@ class RealtimeScanner:
     def audio_player_worker(self):
         logger.info("Audio player started")
 
+        lead = CONFIG.get('playback', {}).get('lead_seconds', 0.25)
         while self.is_running:
             try:
+                # Dequeue only when the output is about to run dry (or a mixer
+                # voice frees up), so late high-priority arrivals can still jump ahead
+                if self.mixer:
+                    self.mixer.wait_for_voice(self._stop_event)
+                else:
+                    self.audio_streamer.output.wait_below(lead, self._stop_event)
+
                 # Get from priority queue (timeout for checking is_running)
                 try:
-                    priority, timestamp, audio = self.audio_queue.get(timeout=0.5)
+                    priority, timestamp, _, audio = self.audio_queue.get(timeout=0.5)
                 except queue.Empty:
                     continue
+                dequeued_at = time.perf_counter()
+
+                rate = self.playback_policy.decide(audio.stamp)
+                if rate is None:
+                    # Too far behind live to be worth hearing
+                    logger.debug(f"Dropped stale audio ID {audio.id}")
+                    if self.prefetch_window:
+                        self.prefetch_window.discard(audio)
+                    self.audio_queue.task_done()
+                    continue
 
-                # Play the audio
-                if self.play_audio(audio):
-                    # Small delay between transmissions
-                    time.sleep(0.1)
+                if self.prefetch_window:
+                    self.prefetch_window.on_dequeue(audio)
+                    self.prefetch_window.pump()
+
+                # Queue the clip on the output stream; the next one follows without a gap
+                self.play_audio(audio, dequeued_at, rate)
 
                 self.audio_queue.task_done()
 
@@ -459,24 +727,23 @@ class RealtimeScanner:
 
         while self.is_running:
             try:
-                if not self.use_websocket or not self.ws:
-                    # Fetch via REST API
-                    audio_list = self.fetch_audio_batch()
-
-                    for audio in audio_list:
-                        # Add with normal priority
-                        self.audio_queue.put((1, time.time(), audio))
-
-                        # Prefetch if enabled
-                        if self.audio_buffer:
-                            self.audio_buffer.prefetch(audio)
+                if self.ws_open and not self.ws_connected:
+                    # The socket is back but its gap-fill failed; retry before trusting pushes alone
+                    if self._gap_fill():
+                        with self.state_lock:
+                            self.ws_connected = self.ws_open
+                        logger.info("Gap filled; relying on WebSocket push")
+                elif not self.ws_connected:
+                    # Fetch via REST API with normal priority
+                    for audio in self.fetch_audio_batch():
+                        self._accept_audio(audio, priority=1)
 
                 # Wait before next fetch
-                time.sleep(self.fetch_interval)
+                self._stop_event.wait(self.fetch_interval)
 
             except Exception as e:
                 logger.error(f"Fetcher error: {e}")
-                time.sleep(5)
+                self._stop_event.wait(5)
 
     def start(self):
         """Start the scanner"""
@@ -485,10 +752,20 @@ class RealtimeScanner:
 
         logger.info("Starting Realtime Scanner...")
         self.is_running = True
+        self._stop_event.clear()
+
+        # Open the output once so the first clip does not pay for it
+        try:
+            self.audio_streamer.output.open()
+        except Exception as e:
+            logger.error(f"Failed to open audio output: {e}")
+
+        if self.mixer:
+            self.mixer.start()
 
         # Connect WebSocket if enabled
-        # if self.use_websocket:
-        #     self.connect_websocket()
+        if self.use_websocket:
+            self.connect_websocket()
 
         # Start worker threads
         self.play_thread = threading.Thread(target=self.audio_player_worker, daemon=True)
@@ -497,19 +774,13 @@ class RealtimeScanner:
         self.play_thread.start()
         self.fetch_thread.start()
 
-        # Initial fetch
-        initial_audio = self.fetch_audio_batch()
-        for audio in initial_audio:
-            self.audio_queue.put((1, time.time(), audio))
-            if self.audio_buffer:
-                self.audio_buffer.prefetch(audio)
-
         logger.info("✈️  Scanner is running!")
 
     def stop(self):
         """Stop the scanner"""
         logger.info("Stopping scanner...")
         self.is_running = False
+        self._stop_event.set()
 
         if self.ws:
             self.ws.close()
@@ -517,12 +788,17 @@ class RealtimeScanner:
         if self.audio_buffer:
             self.audio_buffer.clear()
 
-        self.audio_streamer.stop()
-
         if self.play_thread:
             self.play_thread.join(timeout=2)
+        if self.mixer:
+            self.mixer.stop()
+        self.audio_streamer.stop()
         if self.fetch_thread:
             self.fetch_thread.join(timeout=2)
+        if self.ws_thread:
+            self.ws_thread.join(timeout=2)
+            self.ws_thread = None
+        self.cursor.checkpoint(force=True)
 
         logger.info("Scanner stopped")
 
@@ -531,10 +807,22 @@ class RealtimeScanner:
             "running": self.is_running,
             "playing": self.audio_streamer.is_playing,
             "queue_size": self.audio_queue.qsize(),
+            "queue_lag_seconds": round(self._queue_lag(), 2),
             "last_played_id": self.last_played_id,
-            "websocket": "connected" if self.ws else "disconnected",
+            "websocket": "connected" if self.ws_connected else "disconnected",
+            "websocket_stats": dict(self.ws_stats),
+            "cursor": self.cursor.get_status(),
             "prefetch": self.prefetch_audio,
-            "buffer_size": len(self.audio_buffer.buffer) if self.audio_buffer else 0
+            "buffer_size": len(self.audio_buffer.cache) if self.audio_buffer else 0,
+            "audio_cache": self.audio_buffer.get_status() if self.audio_buffer else None,
+            "prefetch_window": self.prefetch_window.get_status() if self.prefetch_window else None,
+            "output": self.audio_streamer.output.get_status(),
+            "mixer": self.mixer.get_status() if self.mixer else None,
+            "playback_policy": self.playback_policy.get_status(),
+            "decode": self.decode_stats.get_status(),
+            "dequeue_to_first_sample": self.first_sample_stats.get_status(),
+            "miss_to_first_sample": self.miss_first_sample_stats.get_status(),
+            "http": TRANSPORT.get_stats()
         }
 
 
@@ -548,6 +836,8 @@ def main():
     parser.add_argument("--vfr-only", action="store_true", help="Only play VFR traffic")
     parser.add_argument("--geo-filter", action="store_true", help="Enable geographic filtering")
     parser.add_argument("--airports", nargs="+", help="Filter by airports (e.g. KTUS KABQ)")
+    parser.add_argument("--regions", nargs="+", help="Geofence regions for --geo-filter (default: all)")
+    parser.add_argument("--mix", type=int, metavar="N", help="Mix up to N overlapping transmissions")
     parser.add_argument("--debug", action="store_true", help="Enable debug logging")
 
     args = parser.parse_args()
@@ -556,16 +846,21 @@ def main():
         logging.getLogger().setLevel(logging.DEBUG)
 
     # Create scanner
-    scanner = RealtimeScanner(
-        api_base_url=args.api,
-        volume=args.volume,
-        fetch_interval=args.interval,
-        use_websocket=not args.no_websocket,
-        prefetch_audio=not args.no_prefetch,
-        vfr_only=args.vfr_only,
-        geo_filter=args.geo_filter,
-        airports=args.airports
-    )
+    try:
+        scanner = RealtimeScanner(
+            api_base_url=args.api,
+            volume=args.volume,
+            fetch_interval=args.interval,
+            use_websocket=not args.no_websocket,
+            prefetch_audio=not args.no_prefetch,
+            vfr_only=args.vfr_only,
+            geo_filter=args.geo_filter,
+            airports=args.airports,
+            regions=args.regions,
+            mix_voices=args.mix
+        )
+    except ValueError as e:
+        parser.error(str(e))
 
     try:
         scanner.start()